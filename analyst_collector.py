@@ -4,9 +4,136 @@
 # Este módulo obtiene las recomendaciones de analistas
 # (upgrades, downgrades, price targets) usando Finnhub
 
-import requests
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from config import FINNHUB_API_KEY, NASDAQ_STOCKS
+from config import (
+    FINNHUB_API_KEY, ANALYST_SNAPSHOT_FILE, ANALYST_MAX_WORKERS,
+    SHARD_SIZES, SYMBOL_RESULT_MAX_AGE_HOURS, DEFAULT_UNIVERSE
+)
+from quote_service import get_quote_service
+from snapshot import atomic_write_json
+from request_scheduler import get_scheduler, PRIORITY_BULK
+from universe import get_universe, get_fetch_symbols, get_shard_scheduler, finnhub_symbol
+from log import get_logger
+
+log = get_logger("analyst")
+
+
+# ============================================
+# SNAPSHOT PERSISTENTE DE ANALISTAS
+# ============================================
+class AnalystSnapshotStore:
+    """
+    Guarda en disco los datos de analistas de cada acción
+    
+    Cada entrada tiene:
+    - date: el día en que se consultó (YYYY-MM-DD)
+    - fetched_at: timestamp de la consulta
+    - recommendation / price_target: la respuesta de Finnhub
+    - inputs_key: hash de esas respuestas
+    - scores: los scores calculados con esas respuestas
+    
+    Así cada acción se consulta como máximo una vez al día y los
+    scores solo se recalculan cuando cambian los datos
+    """
+    
+    def __init__(self, path=ANALYST_SNAPSHOT_FILE):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = self._load()
+        self.attempts = {}   # símbolo -> último intento (aunque haya fallado), solo en memoria
+    
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            log.warning("Error leyendo snapshot de analistas", error=str(e))
+            return {}
+    
+    def save(self):
+        """Escribe el snapshot de forma atómica (archivo temporal + rename)"""
+        with self.lock:
+            data = dict(self.entries)
+        try:
+            atomic_write_json(self.path, data)
+        except Exception as e:
+            log.error("Error guardando snapshot de analistas", error=str(e))
+    
+    def get(self, symbol):
+        with self.lock:
+            return self.entries.get(symbol)
+    
+    def is_fresh(self, symbol, today):
+        entry = self.get(symbol)
+        return entry is not None and entry.get("date") == today
+    
+    def mark_attempt(self, symbol):
+        with self.lock:
+            self.attempts[symbol] = time.time()
+    
+    def last_attempt(self, symbol):
+        """Cuándo se intentó consultar la acción por última vez (0 = nunca)"""
+        with self.lock:
+            return self.attempts.get(symbol, 0)
+    
+    def update(self, symbol, today, rec_data, target_data):
+        """
+        Guarda los datos nuevos de una acción
+        
+        Si una de las dos respuestas falló (None) se conserva la anterior, y
+        la acción no cuenta como consultada hoy: se reintenta en otro refresh
+        
+        Si las respuestas son iguales a las que ya teníamos,
+        conservamos los scores calculados
+        """
+        with self.lock:
+            previous = self.entries.get(symbol) or {}
+            complete = rec_data is not None and target_data is not None
+            if rec_data is None:
+                rec_data = previous.get("recommendation")
+            if target_data is None:
+                target_data = previous.get("price_target")
+            
+            inputs_key = hashlib.sha1(
+                json.dumps([rec_data, target_data], sort_keys=True).encode()
+            ).hexdigest()
+            scores = previous.get("scores") if previous.get("inputs_key") == inputs_key else None
+            
+            self.entries[symbol] = {
+                "date": today if complete else previous.get("date"),
+                "fetched_at": time.time(),
+                "recommendation": rec_data,
+                "price_target": target_data,
+                "inputs_key": inputs_key,
+                "scores": scores
+            }
+    
+    def set_scores(self, symbol, scores):
+        with self.lock:
+            if symbol in self.entries:
+                self.entries[symbol]["scores"] = scores
+
+
+# Un solo snapshot por proceso
+_snapshot_store = None
+_snapshot_lock = threading.Lock()
+
+
+def get_snapshot_store():
+    """Devuelve el snapshot compartido del proceso, cargándolo si hace falta"""
+    global _snapshot_store
+    with _snapshot_lock:
+        if _snapshot_store is None:
+            _snapshot_store = AnalystSnapshotStore()
+        return _snapshot_store
+
 
 class AnalystCollector:
     """
@@ -16,9 +143,12 @@ class AnalystCollector:
     3. Price targets
     """
     
-    def __init__(self):
+    def __init__(self, snapshot_store=None, quote_service=None):
         self.api_key = FINNHUB_API_KEY
         self.base_url = "https://finnhub.io/api/v1"
+        self.snapshot_store = snapshot_store or get_snapshot_store()
+        self.quote_service = quote_service or get_quote_service()
+        self.scheduler = get_scheduler()
     
     def get_recommendations(self, symbol):
         """
@@ -28,12 +158,13 @@ class AnalystCollector:
         """
         url = f"{self.base_url}/stock/recommendation"
         params = {
-            "symbol": symbol,
+            "symbol": finnhub_symbol(symbol),
             "token": self.api_key
         }
         
         try:
-            response = requests.get(url, params=params)
+            # Los datos de analistas cambian poco: prioridad baja
+            response = self.scheduler.get("finnhub", url, priority=PRIORITY_BULK, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -42,7 +173,7 @@ class AnalystCollector:
                 return data[0] if data else None
             return None
         except Exception as e:
-            print(f"Error obteniendo recomendaciones de {symbol}: {e}")
+            log.warning("Error obteniendo recomendaciones", symbol=symbol, error=str(e))
             return None
     
     def get_price_target(self, symbol):
@@ -51,16 +182,16 @@ class AnalystCollector:
         """
         url = f"{self.base_url}/stock/price-target"
         params = {
-            "symbol": symbol,
+            "symbol": finnhub_symbol(symbol),
             "token": self.api_key
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.scheduler.get("finnhub", url, priority=PRIORITY_BULK, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
-            print(f"Error obteniendo price target de {symbol}: {e}")
+            log.warning("Error obteniendo price target", symbol=symbol, error=str(e))
             return None
     
     def calculate_recommendation_score(self, rec_data):
@@ -133,34 +264,144 @@ class AnalystCollector:
         # Limitar a -50 a +50 (dejamos espacio para otros factores)
         return max(-50, min(50, score))
     
-    def get_analyst_sentiment(self):
+    def _fetch_symbol(self, symbol):
+        """Pide recomendaciones y price target de una acción"""
+        return symbol, self.get_recommendations(symbol), self.get_price_target(symbol)
+    
+    def refresh_snapshot(self, symbols, limit=None):
+        """
+        Actualiza en paralelo solo las acciones que no se consultaron hoy
+        
+        - limit: máximo de acciones a pedir en esta llamada (cuota por refresh)
+        
+        Si una acción falla (o una de sus dos respuestas), se queda con los
+        datos anteriores y se reintenta en otro refresh. Se piden primero las
+        que hace más tiempo que no se intentan: así las que fallan siempre
+        no frenan a las demás
+        """
+        today = datetime.now().strftime("%Y-%m-%d")
+        stale = [s for s in symbols if not self.snapshot_store.is_fresh(s, today)]
+        stale.sort(key=self.snapshot_store.last_attempt)
+        if limit is not None:
+            stale = stale[:limit]
+        
+        if not stale:
+            return 0
+        
+        log.info("Actualizando analistas", symbols=len(stale))
+        
+        updated = 0
+        with ThreadPoolExecutor(max_workers=ANALYST_MAX_WORKERS) as executor:
+            for symbol, rec_data, target_data in executor.map(self._fetch_symbol, stale):
+                self.snapshot_store.mark_attempt(symbol)
+                if rec_data is None and target_data is None:
+                    continue
+                self.snapshot_store.update(symbol, today, rec_data, target_data)
+                self._entry_scores(symbol, self.snapshot_store.get(symbol))
+                updated += 1
+        
+        if updated:
+            self.snapshot_store.save()
+        
+        return updated
+    
+    def _entry_scores(self, symbol, entry, current_price=None):
+        """
+        Devuelve los scores de una entrada del snapshot
+        
+        - El score de recomendaciones solo se calcula si los datos cambiaron
+        - El score de price target solo se recalcula si cambió el precio
+        """
+        scores = dict(entry.get("scores") or {})
+        changed = False
+        
+        if "recommendation_score" not in scores:
+            scores["recommendation_score"] = self.calculate_recommendation_score(entry.get("recommendation"))
+            changed = True
+        
+        if current_price is not None and scores.get("price") != current_price:
+            scores["price"] = current_price
+            scores["price_target_score"] = self.calculate_price_target_score(
+                entry.get("price_target"), current_price
+            )
+            changed = True
+        
+        if changed:
+            self.snapshot_store.set_scores(symbol, scores)
+        return scores
+    
+    def get_analyst_sentiment(self, universe=DEFAULT_UNIVERSE):
         """
         Obtiene el sentimiento general basado en recomendaciones de analistas
+        (de las acciones del universo que se pida, ver UNIVERSES en config.py)
+        
+        Los datos salen del snapshot diario. En cada refresh:
+        - Se piden a Finnhub como máximo SHARD_SIZES["analyst"] acciones
+          que todavía no se consultaron hoy
+        - Se actualiza el precio de un shard de acciones (round-robin);
+          las demás usan el último precio conocido
         """
-        print("🎯 Obteniendo recomendaciones de analistas...")
+        refreshed = self.refresh()
+        return self.summarize(universe, refreshed)
+    
+    def refresh(self):
+        """
+        Actualiza el snapshot (acciones de todos los universos, sin repetir)
+        y pide los precios en vivo del shard que toca
+        
+        Retorna lo que summarize necesita para cada universo
+        """
+        log.info("🎯 Obteniendo recomendaciones de analistas...")
+        
+        refreshed = self.refresh_snapshot(get_fetch_symbols(), limit=SHARD_SIZES.get("analyst", 10))
+        
+        # Precios en vivo del shard en una sola petición
+        shard = get_shard_scheduler("analyst").next_shard()
+        quotes = self.quote_service.get_quotes(shard)
+        
+        return {"refreshed": refreshed, "quotes": quotes}
+    
+    def summarize(self, universe=DEFAULT_UNIVERSE, refreshed=None):
+        """
+        Score de analistas de un universo a partir del snapshot (sin peticiones a Finnhub)
+        
+        - refreshed: lo que devolvió refresh (precios en vivo del shard)
+        """
+        refreshed = refreshed or {}
+        quotes = refreshed.get("quotes", {})
+        symbols = get_universe(universe)
+        
+        max_age_seconds = SYMBOL_RESULT_MAX_AGE_HOURS.get("analyst", 72) * 3600
+        now = time.time()
+        stale = missing = 0
         
         all_rec_scores = []
         all_target_scores = []
         details = {}
         
-        for symbol in NASDAQ_STOCKS:
-            # Obtener recomendaciones
-            rec_data = self.get_recommendations(symbol)
-            rec_score = self.calculate_recommendation_score(rec_data)
+        for symbol in symbols:
+            entry = self.snapshot_store.get(symbol)
+            if not entry:
+                missing += 1
+                continue
+            
+            if now - entry.get("fetched_at", 0) > max_age_seconds:
+                stale += 1
+                continue
+            
+            rec_data = entry.get("recommendation")
+            target_data = entry.get("price_target")
+            live_price = quotes[symbol]["price"] if symbol in quotes else None
+            scores = self._entry_scores(symbol, entry, live_price)
+            current_price = scores.get("price")
+            rec_score = scores["recommendation_score"]
+            target_score = scores.get("price_target_score", 0) if current_price else 0
             
             if rec_score != 0:
                 all_rec_scores.append(rec_score)
             
-            # Obtener price target
-            target_data = self.get_price_target(symbol)
-            
-            # Para el price target necesitamos el precio actual
-            # Por simplicidad, usamos el targetMean como referencia
-            if target_data:
-                current = target_data.get("targetMean", 0) * 0.9  # Aproximación
-                target_score = self.calculate_price_target_score(target_data, current)
-                if target_score != 0:
-                    all_target_scores.append(target_score)
+            if target_score != 0:
+                all_target_scores.append(target_score)
             
             # Guardar detalles
             if rec_data or target_data:
@@ -173,10 +414,14 @@ class AnalystCollector:
                         "sell": rec_data.get("sell", 0) if rec_data else 0,
                         "strongSell": rec_data.get("strongSell", 0) if rec_data else 0,
                     },
-                    "price_target": target_data.get("targetMean", 0) if target_data else 0
+                    "price_target": target_data.get("targetMean", 0) if target_data else 0,
+                    "current_price": current_price,
+                    "price_target_score": round(target_score, 2),
+                    "as_of": entry.get("date")
                 }
                 
-                print(f"  {symbol}: Rec Score: {rec_score:.1f}")
+                if symbol in quotes:
+                    log.debug("Recomendaciones", symbol=symbol, rec_score=round(rec_score, 1))
         
         # Calcular scores finales
         avg_rec_score = sum(all_rec_scores) / len(all_rec_scores) if all_rec_scores else 0
@@ -190,7 +435,14 @@ class AnalystCollector:
             "recommendation_score": round(avg_rec_score, 2),
             "price_target_score": round(avg_target_score, 2),
             "stocks_analyzed": len(details),
-            "details": details
+            "details": details,
+            "coverage": {
+                "symbols_total": len(symbols),
+                "symbols_fresh": len(symbols) - stale - missing,
+                "symbols_stale": stale,
+                "symbols_missing": missing,
+                "refreshed_now": refreshed.get("refreshed", 0)
+            }
         }
 
 
@@ -0,0 +1,263 @@
+# ============================================
+# CÁLCULO EN LOTE (CLI)
+# ============================================
+# Calcula muchos scores de una vez y los escribe como NDJSON (un
+# resultado JSON por línea) en stdout o en un archivo, sin el resumen
+# impreso de cada cálculo.
+#
+# Uso:
+#   python batch.py                                    # ahora, todos los universos
+#   python batch.py --universe nasdaq --universe sp500 --out scores.ndjson
+#   python batch.py --dates 2025-01-02:2025-06-30 --workers 8 > backfill.ndjson
+#
+# Sin --dates se hace un cálculo normal de los universos pedidos (juntos:
+# así los datos compartidos se piden una sola vez).
+#
+# Con --dates se recalcula el score de días pasados (backfill):
+# - Las velas diarias de cada ETF y del VIX se piden UNA vez para todo el
+#   rango, en este proceso (así se respetan los límites de PROVIDER_LIMITS)
+# - Los días se reparten en bloques entre un pool de procesos (--workers,
+#   por defecto uno por núcleo) que calculan y serializan los resultados
+# - Solo hay historia de los componentes de mercado: técnicos (con velas
+#   diarias: las de 15m solo existen de los últimos 60 días), VIX y
+#   Put/Call. Noticias, Reddit y analistas salen con "error" y no cuentan
+#   en el score final (igual que un componente que falla)
+#
+# Los mensajes de los recolectores van a stderr: stdout queda solo para el NDJSON
+
+import argparse
+import json
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+from config import PESOS, MARKET_HOURS, TECHNICAL_BASE_PERIOD
+from resample import to_arrays
+from sentiment_calculator import SentimentCalculator
+from technical_collector import TechnicalCollector, PERIOD_DAYS
+from universe import get_universes
+
+# Error de los componentes que no se pueden recalcular para un día pasado
+NO_HISTORY = "No historical data"
+
+# Días de velas antes de cada fecha (los mismos que ve el score en vivo)
+LOOKBACK_DAYS = PERIOD_DAYS[TECHNICAL_BASE_PERIOD]
+
+# Las fechas viajan al pool como número de día desde 1970 (como las velas)
+EPOCH = date(1970, 1, 1).toordinal()
+
+
+def parse_dates(specs):
+    """
+    Convierte los --dates en una lista ordenada de fechas
+    
+    Cada spec es "2025-03-14", "2025-01-02:2025-03-31" (rango, incluido el
+    último día) o varios separados por coma
+    """
+    days = set()
+    for spec in specs:
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            first, _, last = part.partition(":")
+            first = date.fromisoformat(first)
+            last = date.fromisoformat(last) if last else first
+            if last < first:
+                raise ValueError(f"Invalid range: {part}")
+            days.update(first + timedelta(days=i) for i in range((last - first).days + 1))
+    return sorted(days)
+
+
+def to_line(result):
+    """Un resultado como línea NDJSON"""
+    return json.dumps(result, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+# ============================================
+# CÁLCULO EN VIVO
+# ============================================
+def run_live(universes, out):
+    """Un cálculo normal de los universos pedidos, una línea por universo"""
+    calculator = SentimentCalculator(universes)
+    results = calculator.calculate_all(print_summary=False)
+    for result in results.values():
+        out.write(to_line(result))
+
+
+# ============================================
+# BACKFILL DE DÍAS PASADOS
+# ============================================
+def fetch_history(symbols, first, last):
+    """
+    Velas diarias de cada símbolo, desde LOOKBACK_DAYS antes de `first`
+    hasta `last`
+    
+    Retorna {símbolo: (días, cierres)}: días = número de día (hora de la
+    bolsa) de cada vela; los símbolos sin datos no aparecen
+    """
+    technical = TechnicalCollector()
+    start = datetime.combine(first - timedelta(days=LOOKBACK_DAYS), time()).timestamp()
+    end = datetime.combine(last + timedelta(days=1), time()).timestamp()
+    
+    history = {}
+    for symbol in symbols:
+        bars = to_arrays(technical.get_stock_data(symbol, interval="1d", start=start, end=end))
+        if bars is None:
+            continue
+        days = (bars["timestamps"] + bars["gmtoffset"]) // 86400
+        history[symbol] = (days, bars["close"])
+    return history
+
+
+# Estado de cada proceso del pool (ver _init_worker)
+_history = None
+_indexes = None
+_technical = None
+
+
+def _init_worker(history, indexes):
+    """Inicializa un proceso del pool: las velas se reciben una sola vez"""
+    global _history, _indexes, _technical
+    _history = history
+    _indexes = indexes
+    _technical = TechnicalCollector()
+    # Lo que imprimen los recolectores no se mezcla con el NDJSON
+    sys.stdout = sys.stderr
+
+
+def _has_bar(symbol, day):
+    """True si `symbol` tiene vela ese día"""
+    if symbol not in _history:
+        return False
+    days = _history[symbol][0]
+    position = np.searchsorted(days, day)
+    return position < len(days) and days[position] == day
+
+
+def _closes_until(symbol, day):
+    """Cierres de `symbol` de los LOOKBACK_DAYS días hasta `day` (incluido)"""
+    if symbol not in _history:
+        return []
+    days, closes = _history[symbol]
+    start, end = np.searchsorted(days, [day - LOOKBACK_DAYS, day], side="right")
+    return closes[start:end].tolist()
+
+
+def replay_day(day):
+    """
+    Resultados ({universo: resultado}) de un día pasado, solo con
+    técnicos, VIX y Put/Call
+    
+    Retorna {} si ese día no hubo mercado (sin vela del VIX)
+    """
+    if not _has_bar("^VIX", day):
+        return {}
+    
+    when = datetime.combine(date.fromordinal(day + EPOCH), time.fromisoformat(MARKET_HOURS[1]))
+    vix_close = _closes_until("^VIX", day)[-1]
+    vix = _technical.score_vix(vix_close)
+    put_call = _technical.score_put_call(vix_close)
+    
+    results = {}
+    for universe, index in _indexes.items():
+        closes = _closes_until(index, day)
+        if closes:
+            technical = _technical.score_prices(closes)
+            technical.update({"index": index, "price": round(closes[-1], 2)})
+        else:
+            technical = {"score": 0, "error": "No data"}
+        
+        replayed = {"technical": technical, "vix": vix, "put_call_ratio": put_call}
+        components = {}
+        for name, weight in PESOS.items():
+            data = replayed.get(name, {"error": NO_HISTORY})
+            if "error" in data:
+                components[name] = {"score": 0, "weight": weight, "error": data["error"]}
+            else:
+                components[name] = {"score": data["score"], "weight": weight, "details": data}
+        
+        final_score = SentimentCalculator._calculate_weighted_score(components)
+        results[universe] = {
+            "universe": universe,
+            "index": index,
+            "date": when.date().isoformat(),
+            "historical": True,
+            "final_score": round(final_score, 2),
+            "interpretation": SentimentCalculator._interpret_score(final_score),
+            "components": components,
+            "timestamp": when.isoformat(),
+            "weights_used": PESOS
+        }
+    return results
+
+
+def replay_chunk(days):
+    """Un bloque de días → el texto NDJSON de sus resultados (se arma en el proceso del pool)"""
+    return "".join(to_line(result) for day in days for result in replay_day(day).values())
+
+
+def run_backfill(universes, dates, out, workers=None):
+    """
+    Recalcula los días de `dates` en un pool de procesos y escribe los
+    resultados en orden de fecha
+    """
+    definitions = get_universes()
+    indexes = {name: definitions[name]["index"] for name in universes}
+    history = fetch_history(list(dict.fromkeys(list(indexes.values()) + ["^VIX"])), dates[0], dates[-1])
+    if "^VIX" not in history:
+        raise SystemExit("No hay velas del VIX para esas fechas")
+    
+    days = [d.toordinal() - EPOCH for d in dates]
+    
+    workers = workers or os.cpu_count() or 1
+    # Varios bloques por proceso: si uno tarda más, los demás siguen
+    size = max(1, math.ceil(len(days) / (workers * 4)))
+    chunks = [days[i:i + size] for i in range(0, len(days), size)]
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(history, indexes)) as pool:
+        for lines in pool.map(replay_chunk, chunks):
+            out.write(lines)
+            out.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calcula scores en lote y los escribe como NDJSON")
+    parser.add_argument("--universe", action="append", dest="universes",
+                        help="Universo a calcular (se puede repetir; por defecto todos)")
+    parser.add_argument("--dates", action="append",
+                        help="Días pasados: 2025-03-14, 2025-01-02:2025-03-31 o varios separados por coma")
+    parser.add_argument("--workers", type=int, help="Procesos para el backfill (por defecto uno por núcleo)")
+    parser.add_argument("--out", help="Archivo NDJSON (por defecto stdout)")
+    args = parser.parse_args()
+    
+    available = get_universes()
+    universes = list(dict.fromkeys(u.lower() for u in args.universes)) if args.universes else list(available)
+    unknown = [u for u in universes if u not in available]
+    if unknown:
+        parser.error(f"Unknown universe: {', '.join(unknown)} (valid: {', '.join(available)})")
+    
+    try:
+        dates = parse_dates(args.dates) if args.dates else None
+    except ValueError as e:
+        parser.error(str(e))
+    
+    out = open(args.out, "w") if args.out else sys.stdout
+    try:
+        # Los mensajes de los recolectores van a stderr
+        with redirect_stdout(sys.stderr):
+            if dates:
+                run_backfill(universes, dates, out, args.workers)
+            else:
+                run_live(universes, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
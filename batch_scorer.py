@@ -0,0 +1,149 @@
+# ============================================
+# ANÁLISIS DE SENTIMIENTO EN LOTE (BAG OF WORDS)
+# ============================================
+# Analiza miles de titulares/resúmenes de una vez con numpy,
+# con el mismo criterio que NewsCollector.analyze_headline:
+#
+# - Una palabra del léxico cuenta si aparece dentro del texto
+#   (una sola vez por texto, aunque aparezca varias veces)
+# - score = promedio de los pesos encontrados, limitado a -1..+1
+#
+# Cómo lo hace rápido:
+# 1. Parte cada texto en tokens (\w+)
+# 2. Cada token distinto se traduce UNA vez a los ids del léxico que
+#    contiene (ej: "surges" → "surge", "surges"); eso queda en un
+#    vocabulario compartido entre lotes
+# 3. Con los pares (texto, palabra del léxico) hace sumas con
+#    np.bincount en vez de recorrer el léxico texto por texto
+
+import re
+import threading
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+# Separa los textos de un lote (en mayúsculas: no puede salir de .lower())
+DOC_SEPARATOR = " ZZ "
+SEPARATOR_ID = -2
+
+# Tokens distintos que recordamos antes de vaciar el vocabulario
+MAX_VOCABULARY = 200000
+
+
+class BagOfWordsScorer:
+    """
+    Parámetros:
+    - lexicon: {palabra: peso} con pesos de -1 a +1
+    """
+    
+    def __init__(self, lexicon):
+        self.words = list(lexicon)
+        self.weights = np.array([lexicon[w] for w in self.words], dtype=np.float64)
+        self.lock = threading.Lock()
+        self._reset_vocabulary()
+    
+    def _reset_vocabulary(self):
+        # token -> id en el vocabulario (el id 0 = "no contiene nada del léxico")
+        self.vocabulary = {DOC_SEPARATOR.strip(): SEPARATOR_ID}
+        # Matriz dispersa (formato CSR) id de token -> ids del léxico que contiene:
+        # los del token t están en lexicon_ids[offsets[t]:offsets[t + 1]]
+        self.offsets = [0, 0]
+        self.lexicon_ids = []
+        self._csr = None
+    
+    def _add_token(self, token):
+        """Agrega un token nuevo al vocabulario y devuelve su id"""
+        found = [i for i, word in enumerate(self.words) if word in token]
+        if not found:
+            self.vocabulary[token] = 0
+            return 0
+        
+        token_id = len(self.offsets) - 1
+        self.lexicon_ids.extend(found)
+        self.offsets.append(len(self.lexicon_ids))
+        self.vocabulary[token] = token_id
+        self._csr = None
+        return token_id
+    
+    def _token_ids(self, tokens):
+        """Traduce una lista de tokens a ids del vocabulario"""
+        vocabulary = self.vocabulary
+        ids = [vocabulary.get(token, -1) for token in tokens]
+        for i, token_id in enumerate(ids):
+            if token_id == -1:
+                token = tokens[i]
+                token_id = vocabulary.get(token)
+                ids[i] = self._add_token(token) if token_id is None else token_id
+        
+        if self._csr is None:
+            self._csr = (np.array(self.offsets, dtype=np.int64),
+                         np.array(self.lexicon_ids, dtype=np.int64))
+        csr = self._csr
+        
+        # Los ids de este lote siguen valiendo con `csr` aunque se vacíe después
+        if len(self.vocabulary) > MAX_VOCABULARY:
+            self._reset_vocabulary()
+        
+        return np.array(ids, dtype=np.int64), csr
+    
+    def totals(self, texts):
+        """
+        Suma de pesos y cantidad de palabras del léxico encontradas en cada texto
+        
+        Retorna (sums, found), dos arrays de numpy con un valor por texto
+        """
+        n_texts = len(texts)
+        sums = np.zeros(n_texts)
+        found = np.zeros(n_texts, dtype=np.int64)
+        if n_texts == 0:
+            return sums, found
+        
+        # 1. Tokens de todo el lote con un solo findall. Los textos se unen
+        #    con DOC_SEPARATOR, que nunca aparece en texto ya pasado a minúsculas
+        blob = DOC_SEPARATOR.join(text.lower() for text in texts)
+        tokens = TOKEN_PATTERN.findall(blob)
+        
+        with self.lock:
+            token_ids, (offsets, lexicon_ids) = self._token_ids(tokens)
+        
+        # Número de texto de cada token = separadores vistos antes que él
+        docs = np.cumsum(token_ids == SEPARATOR_ID)
+        
+        # 2. Pares (texto, token) que tocan el léxico
+        matched = token_ids > 0
+        docs, token_ids = docs[matched], token_ids[matched]
+        if len(token_ids) == 0:
+            return sums, found
+        
+        # 3. Pares (texto, palabra del léxico), cada palabra una vez por texto
+        starts = offsets[token_ids]
+        counts = offsets[token_ids + 1] - starts
+        pair_docs = np.repeat(docs, counts)
+        positions = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_words = lexicon_ids[np.repeat(starts, counts) + positions]
+        
+        n_words = len(self.words)
+        keys = np.unique(pair_docs * n_words + pair_words)
+        pair_docs, pair_words = keys // n_words, keys % n_words
+        
+        # 4. Sumas por texto
+        sums = np.bincount(pair_docs, weights=self.weights[pair_words], minlength=n_texts)
+        found = np.bincount(pair_docs, minlength=n_texts)
+        return sums, found
+    
+    def score_batch(self, texts):
+        """
+        Analiza una lista de textos
+        
+        Retorna un array de numpy con un score de -1 a +1 por texto
+        """
+        sums, found = self.totals(texts)
+        scores = np.zeros(len(texts))
+        has_words = found > 0
+        scores[has_words] = np.clip(sums[has_words] / found[has_words], -1, 1)
+        return scores
+    
+    def score(self, text):
+        """Analiza un solo texto"""
+        return float(self.score_batch([text])[0])
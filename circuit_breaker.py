@@ -0,0 +1,118 @@
+# ============================================
+# CIRCUIT BREAKERS POR UPSTREAM
+# ============================================
+# Si un endpoint (ej: Finnhub company-news) falla varias veces seguidas,
+# dejamos de llamarlo un rato: las peticiones fallan al instante en vez
+# de esperar una conexión que no va a responder.
+#
+# Estados:
+# - closed: todo normal, las peticiones pasan
+# - open: el endpoint está caído, las peticiones fallan de inmediato
+# - half_open: pasó el tiempo de espera, dejamos pasar UNA petición de prueba
+
+import threading
+import time
+from config import BREAKER_FAILURE_THRESHOLD, BREAKER_RECOVERY_SECONDS
+from log import get_logger
+
+log = get_logger("breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Se lanza cuando el circuito de un endpoint está abierto"""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de un endpoint
+    
+    Parámetros:
+    - failure_threshold: fallos seguidos para abrir el circuito
+    - recovery_seconds: cuánto esperar abierto antes de la petición de prueba
+    """
+    
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 recovery_seconds=BREAKER_RECOVERY_SECONDS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.rejected = 0
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """¿Puede pasar una petición ahora?"""
+        with self.lock:
+            if self.state == CLOSED:
+                return True
+            
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = HALF_OPEN
+                self.probe_in_flight = False
+            
+            if self.state == HALF_OPEN and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            
+            self.rejected += 1
+            return False
+    
+    def record_success(self):
+        with self.lock:
+            if self.state != CLOSED:
+                log.info("🟢 Circuito cerrado de nuevo", circuit=self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self.probe_in_flight = False
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_in_flight = False
+            
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    log.warning("🔴 Circuito abierto", circuit=self.name, failures=self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+    
+    def status(self):
+        with self.lock:
+            status = {
+                "state": self.state,
+                "failures": self.failures,
+                "rejected": self.rejected
+            }
+            if self.state == OPEN:
+                remaining = self.recovery_seconds - (time.monotonic() - self.opened_at)
+                status["retry_in_seconds"] = round(max(0, remaining), 1)
+            return status
+
+
+# Un breaker por endpoint, compartidos en el proceso
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    """Devuelve el breaker del endpoint `name`, creándolo si hace falta"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breakers_status():
+    """Estado de todos los breakers (para /api/health)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.status() for breaker in breakers}
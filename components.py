@@ -0,0 +1,234 @@
+# ============================================
+# REGISTRO DE COMPONENTES Y EJECUTOR DE DEPENDENCIAS
+# ============================================
+# Cada componente del score se declara con:
+# - inputs: los datos que necesita, como claves "tipo:argumentos"
+#     "price:^VIX"         último valor del VIX
+#     "bars:{index}:1d"    velas diarias del ETF del universo
+#                          ("bars:QQQ:15m:60d" = velas de 15m de 60 días)
+#     "news:shard"         noticias del shard que toca
+#     "recs:*"             recomendaciones y price targets
+#   {index} y {query} se reemplazan con los datos de cada universo
+#   (ver UNIVERSES en config.py)
+# - score(universe, inputs): arma el resultado con esos datos, SIN hacer
+#   peticiones (inputs = {clave tal como se declaró: dato})
+#
+# El ejecutor junta las claves de todos los componentes y universos, pide
+# cada dato UNA sola vez (en paralelo) y calcula cada componente apenas
+# llegan sus inputs. Así el VIX se pide una vez aunque lo usen VIX y
+# Put/Call, y un componente nuevo que usa datos que ya se piden no suma
+# ninguna petición.
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import COMPONENT_FETCH_WORKERS, TECHNICAL_BASE_INTERVAL, TECHNICAL_BASE_PERIOD
+from request_scheduler import PRIORITY_CRITICAL
+from universe import get_universes
+
+# Datos que se siguen pidiendo, de este cálculo o de uno anterior que ya
+# pasó su deadline: un cálculo nuevo espera esos mismos Futures en vez de
+# pedirlos otra vez (así "news:shard" no avanza el shard dos veces ni dos
+# hilos escriben el mismo store)
+_in_flight = {}     # clave concreta -> Future
+_in_flight_lock = threading.RLock()
+
+
+class Component:
+    """
+    Parámetros:
+    - name: nombre del componente (el mismo que en PESOS)
+    - label: nombre para los mensajes (ej: "noticias")
+    - inputs: claves de los datos que necesita (ver arriba)
+    - score: función (universe, inputs) → resultado con "score" (o con "error")
+    - per_universe: False si el resultado es el mismo en todos los
+      universos (ej: VIX); entonces se calcula una vez con universe=None
+    """
+    
+    def __init__(self, name, label, inputs, score, per_universe=True):
+        self.name = name
+        self.label = label
+        self.inputs = list(inputs)
+        self.score = score
+        self.per_universe = per_universe
+    
+    def resolve(self, definition):
+        """Claves concretas de un universo: {clave declarada: clave concreta}"""
+        return {key: key.format(**definition) for key in self.inputs}
+
+
+class DependencyExecutor:
+    """
+    Pide los datos de un conjunto de componentes y los calcula
+    
+    Parámetros:
+    - sources: {tipo: fetch(*argumentos)}; ej: "bars:QQQ:1d" llama a
+      sources["bars"]("QQQ", "1d")
+    - max_workers: máximo de datos que se piden a la vez
+    """
+    
+    def __init__(self, sources, max_workers=COMPONENT_FETCH_WORKERS):
+        self.sources = sources
+        self.max_workers = max_workers
+    
+    def fetch(self, key):
+        """Pide un dato por su clave"""
+        kind, _, args = key.partition(":")
+        if kind not in self.sources:
+            raise KeyError(f"No hay fuente de datos para {key}")
+        return self.sources[kind](*args.split(":")) if args else self.sources[kind]()
+    
+    def run(self, components, universes):
+        """
+        Lanza todas las peticiones y devuelve {(componente, universo): Future}
+        
+        Cada Future se completa apenas llegan los inputs de su componente:
+        con el resultado de score, o con la excepción del dato que falló.
+        No espera a nada: el que llama decide cuánto esperar
+        (los componentes con per_universe=False comparten el mismo Future)
+        """
+        definitions = get_universes()
+        futures = {}
+        nodes = []
+        waiting = {}    # clave concreta -> nodos que la necesitan
+        
+        for component in components:
+            targets = universes if component.per_universe else [None]
+            for universe in targets:
+                keys = component.resolve(definitions[universe] if universe else {})
+                node = {
+                    "component": component,
+                    "universe": universe,
+                    "keys": keys,
+                    "pending": set(keys.values()),
+                    "future": Future()
+                }
+                nodes.append(node)
+                for key in node["pending"]:
+                    waiting.setdefault(key, []).append(node)
+                
+                for target in (universes if universe is None else [universe]):
+                    futures[(component.name, target)] = node["future"]
+        
+        # Componentes sin inputs: se calculan ya
+        for node in nodes:
+            if not node["pending"]:
+                self._score(node, {})
+        
+        if waiting:
+            fetched = {}
+            lock = threading.Lock()
+            pool = None
+            with _in_flight_lock:
+                for key in waiting:
+                    future = _in_flight.get(key)
+                    if future is None:
+                        if pool is None:
+                            pool = ThreadPoolExecutor(max_workers=min(len(waiting), self.max_workers))
+                        future = _in_flight[key] = pool.submit(self.fetch, key)
+                        future.add_done_callback(self._forget(key))
+                    fetched[key] = future
+            # Los callbacks se agregan después: así `fetched` ya tiene todas las claves
+            for key, future in fetched.items():
+                future.add_done_callback(self._fetched(key, waiting, fetched, lock))
+            # Lo que no terminó sigue en background (no esperamos aquí)
+            if pool is not None:
+                pool.shutdown(wait=False)
+        
+        return futures
+    
+    @staticmethod
+    def _forget(key):
+        """Callback de un dato: ya no está en curso"""
+        def callback(future):
+            with _in_flight_lock:
+                if _in_flight.get(key) is future:
+                    del _in_flight[key]
+        return callback
+    
+    def _fetched(self, key, waiting, fetched, lock):
+        """Callback de un dato: calcula los componentes que ya tienen todos sus inputs"""
+        def callback(_future):
+            ready = []
+            with lock:
+                for node in waiting[key]:
+                    node["pending"].discard(key)
+                    if not node["pending"]:
+                        ready.append(node)
+            for node in ready:
+                self._score(node, fetched)
+        return callback
+    
+    @staticmethod
+    def _score(node, fetched):
+        component = node["component"]
+        try:
+            inputs = {declared: fetched[key].result() for declared, key in node["keys"].items()}
+            node["future"].set_result(component.score(node["universe"], inputs))
+        except Exception as e:
+            node["future"].set_exception(e)
+
+
+# ============================================
+# FUENTES Y COMPONENTES POR DEFECTO
+# ============================================
+def default_sources(news, reddit, technical, analyst):
+    """
+    Fuentes de datos de los recolectores
+    
+    Las que terminan en ":shard" refrescan el shard que toca y guardan
+    los resultados por acción en su store (ver universe.py)
+    """
+    quote_service = technical.quote_service
+    return {
+        "price": technical.get_last_price,
+        "quote": quote_service.get_price,
+        "bars": lambda symbol, interval="1d", period="1mo": technical.get_stock_data(
+            symbol, period=period, interval=interval, priority=PRIORITY_CRITICAL
+        ),
+        "technicals": lambda scope: technical.refresh_symbol_technicals(),
+        "news": lambda scope: news.refresh(),
+        "social": lambda scope: reddit.refresh_shard(),
+        "posts": reddit.search_market,
+        "recs": lambda scope: analyst.refresh()
+    }
+
+
+def default_components(news, reddit, technical, analyst):
+    """Los seis componentes del score (los de PESOS en config.py)"""
+    
+    # Una sola descarga fina por ETF (de ahí salen todas las temporalidades)
+    index_bars = f"bars:{{index}}:{TECHNICAL_BASE_INTERVAL}:{TECHNICAL_BASE_PERIOD}"
+    
+    def score_technical(universe, inputs):
+        index = get_universes()[universe]["index"]
+        index_result = technical.score_index_bars(index, inputs[index_bars], inputs["quote:{index}"])
+        return technical.summarize(universe, index_result)
+    
+    return [
+        Component(
+            "news_sentiment", "noticias", ["news:shard"],
+            lambda universe, inputs: news.summarize(universe, inputs["news:shard"])
+        ),
+        Component(
+            "social_sentiment", "Reddit", ["social:shard", "posts:{query}"],
+            lambda universe, inputs: reddit.summarize(universe, inputs["posts:{query}"])
+        ),
+        Component(
+            "technical", "técnicos", [index_bars, "quote:{index}", "technicals:shard"],
+            score_technical
+        ),
+        Component(
+            "vix", "VIX", ["price:^VIX"],
+            lambda universe, inputs: technical.score_vix(inputs["price:^VIX"]),
+            per_universe=False
+        ),
+        Component(
+            "put_call_ratio", "Put/Call", ["price:^VIX"],
+            lambda universe, inputs: technical.score_put_call(inputs["price:^VIX"]),
+            per_universe=False
+        ),
+        Component(
+            "analyst_recommendations", "analistas", ["recs:*"],
+            lambda universe, inputs: analyst.summarize(universe, inputs["recs:*"])
+        )
+    ]
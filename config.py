@@ -34,4 +34,153 @@ NASDAQ_STOCKS = [
     "INTC",
 ]
 
-NASDAQ_INDEX = "QQQ"
\ No newline at end of file
+NASDAQ_INDEX = "QQQ"
+
+# Modo streaming de Reddit
+# Si esta activo, un hilo en background sigue /new de cada subreddit
+# y mantiene una ventana de sentimiento por accion en memoria
+REDDIT_STREAM_ENABLED = False
+REDDIT_STREAM_POLL_SECONDS = 60      # Cada cuanto consultar /new
+REDDIT_STREAM_WINDOW_HOURS = 24      # Cuanto tiempo cuenta un post
+
+# Snapshot de analistas (las recomendaciones cambian una vez al mes)
+# Cada accion se consulta como maximo una vez al dia
+ANALYST_SNAPSHOT_FILE = "analyst_snapshot.json"
+ANALYST_MAX_WORKERS = 5              # Peticiones en paralelo cuando el snapshot esta viejo
+
+# Servicio de cotizaciones (precios en vivo en lote)
+QUOTE_CACHE_SECONDS = 60             # Cuanto tiempo reutilizamos un precio
+QUOTE_BATCH_SIZE = 20                # Simbolos por peticion (limite de Yahoo spark)
+CHART_FALLBACK_WORKERS = 4           # Velas pedidas de a una en paralelo cuando spark no las trae
+
+# Universo de acciones
+# Archivo con un simbolo por linea; si no existe se usa NASDAQ_STOCKS
+UNIVERSE_FILE = "universes/nasdaq100.txt"
+
+# Cada cuanto se recalcula el sentiment (minutos)
+CACHE_DURATION_MINUTES = 15
+
+# Cuantas acciones procesa cada recolector en cada refresh (round-robin)
+# Asi el costo de un refresh no crece con el numero de acciones del universo
+# Es un minimo: si la union de los universos no alcanza a recorrerse entera
+# dentro de SYMBOL_RESULT_MAX_AGE_HOURS (un refresh cada CACHE_DURATION_MINUTES),
+# el shard se agranda lo necesario (ver universe.shard_size)
+SHARD_SIZES = {
+    "news": 10,       # 1 peticion por accion
+    "social": 5,      # 2 peticiones por accion (modo busqueda)
+    "analyst": 10,    # 2 peticiones por accion (solo si no se consulto hoy)
+    "technical": 40   # Velas en lote (1 peticion cada QUOTE_BATCH_SIZE acciones)
+}
+
+# Despues de cuantas horas el resultado de una accion se considera viejo
+# y deja de contar en el score del componente
+SYMBOL_RESULT_MAX_AGE_HOURS = {
+    "news": 6,
+    "social": 6,
+    "analyst": 72,
+    "technical": 6
+}
+
+# Limites de cada proveedor (peticiones por minuto y rafaga maxima)
+# Todas las peticiones pasan por request_scheduler.py
+PROVIDER_LIMITS = {
+    "finnhub": {"per_minute": 55, "burst": 10},
+    "yahoo": {"per_minute": 100, "burst": 10},
+    "reddit": {"per_minute": 55, "burst": 5}
+}
+
+# Si un proveedor responde 429 con Retry-After, cuanto estamos dispuestos a esperar
+MAX_RETRY_AFTER_SECONDS = 30
+MAX_RETRIES = 2
+
+# Canal de eventos (Server-Sent Events) en /api/sentiment/stream
+SSE_HEARTBEAT_SECONDS = 15           # Comentario vacio para mantener viva la conexion
+
+# Snapshot del ultimo resultado (para arrancar rapido despues de un reinicio)
+SNAPSHOT_FILE = "sentiment_snapshot.json"
+
+# Presupuesto de tiempo para calcular el score completo
+# Si un componente no termina a tiempo (o falla) se usa su ultimo valor bueno,
+# atenuado segun su antiguedad
+SENTIMENT_DEADLINE_SECONDS = 45
+LAST_GOOD_HALF_LIFE_MINUTES = 60     # Cada 60 min el valor viejo pesa la mitad
+LAST_GOOD_MAX_AGE_HOURS = 24         # Mas viejo que esto ya no se usa
+
+# Timeouts de las peticiones HTTP (conexion, lectura) en segundos
+REQUEST_TIMEOUT_SECONDS = (3.05, 10)
+
+# Cache HTTP en disco de las respuestas GET (respeta Cache-Control, ETag y Last-Modified)
+HTTP_CACHE_DIR = ".http_cache"       # None o "" lo desactiva
+HTTP_CACHE_MAX_MB = 100              # Pasado este tamano se borran las respuestas menos usadas
+HTTP_CACHE_MEMORY_ENTRIES = 500      # Respuestas que ademas quedan en memoria (con su JSON parseado)
+
+# Circuit breakers por host y endpoint
+BREAKER_FAILURE_THRESHOLD = 5        # Fallos seguidos para abrir el circuito
+BREAKER_RECOVERY_SECONDS = 60        # Cuanto esperar antes de probar de nuevo
+
+# Indice de noticias (cada articulo se analiza una sola vez aunque aparezca
+# en varias acciones)
+NEWS_WINDOW_DAYS = 7                 # Noticias mas viejas salen del indice
+NEWS_INDEX_MAX_ARTICLES = 20000      # Tope de memoria del indice
+
+# Analisis de sentimiento de texto (noticias y Reddit)
+# - "keyword": promedio de palabras clave
+# - "local": modelo lineal entrenado offline con train_scorer.py
+#   (si no hay pesos en SENTIMENT_MODEL_DIR, se usan palabras clave)
+SENTIMENT_SCORER = "keyword"
+SENTIMENT_MODEL_DIR = "models/sentiment"
+SENTIMENT_CACHE_FILE = "models/sentiment/score_cache.sqlite"   # "" = sin cache
+SENTIMENT_CACHE_MAX_ENTRIES = 500000
+
+# Universos que se calculan juntos (las peticiones se comparten: el VIX y las
+# acciones que aparecen en varios universos se piden una sola vez)
+# - index: ETF de referencia para los tecnicos del universo
+# - file: archivo con las acciones (un simbolo por linea)
+# - query: busqueda general en Reddit para el universo
+UNIVERSES = {
+    "nasdaq": {"index": NASDAQ_INDEX, "file": UNIVERSE_FILE, "query": "NASDAQ"},
+    "sp500": {"index": "SPY", "file": "universes/sp500.txt", "query": "S&P 500"},
+    "russell": {"index": "IWM", "file": "universes/russell2000.txt", "query": "Russell 2000"}
+}
+DEFAULT_UNIVERSE = "nasdaq"          # El que se usa si no se pide ?universe=
+
+# Datos que se piden en paralelo al calcular los componentes (ver components.py)
+# Cada dato ("bars:QQQ:1d", "news:shard", ...) se pide una sola vez por calculo
+COMPONENT_FETCH_WORKERS = 16
+
+# Modo intradia: en horario de mercado VIX, Put/Call y tecnicos se recalculan
+# cada INTRADAY_REFRESH_SECONDS con velas de INTRADAY_INTERVAL (solo se piden
+# las velas nuevas); noticias, Reddit y analistas siguen cada 15 minutos
+INTRADAY_ENABLED = False
+INTRADAY_INTERVAL = "5m"             # "1m" o "5m"
+INTRADAY_REFRESH_SECONDS = 60
+INTRADAY_WARMUP_PERIOD = "5d"        # Velas que se piden la primera vez (Yahoo da 1m solo de 7 dias)
+MARKET_TIMEZONE = "America/New_York"
+MARKET_HOURS = ("09:30", "16:00")    # Lunes a viernes (no contempla feriados)
+
+# Tecnicos en varias temporalidades con UNA descarga por simbolo: se piden
+# velas de TECHNICAL_BASE_INTERVAL y se agrupan en velas mas largas (resample.py)
+TECHNICAL_BASE_INTERVAL = "15m"
+TECHNICAL_BASE_PERIOD = "60d"        # Yahoo da velas de 15m solo de los ultimos 60 dias
+TECHNICAL_TIMEFRAMES = {             # Peso de cada temporalidad en el score tecnico
+    "1d": 0.5,
+    "1h": 0.3,
+    "15m": 0.2
+}
+
+# Maximo de escenarios de pesos por peticion a /api/sentiment/whatif
+WHATIF_MAX_SCENARIOS = 10000
+
+# Estadisticas del historial de scores (z-score y percentil en las respuestas)
+# Cada ventana se divide en buckets de tiempo: memoria fija, sin guardar el historial
+STATS_WINDOWS = {
+    "1d": {"hours": 24, "buckets": 24, "halflife_hours": 4},
+    "7d": {"hours": 168, "buckets": 28, "halflife_hours": 24},
+    "30d": {"hours": 720, "buckets": 30, "halflife_hours": 96}
+}
+STATS_FILE = "score_stats.json"
+
+# Logs (en stderr; los escribe un hilo aparte para no frenar el refresh)
+# Se pueden cambiar con las variables de entorno LOG_LEVEL y LOG_FORMAT
+LOG_LEVEL = "INFO"                   # "DEBUG" muestra el detalle por accion
+LOG_FORMAT = "text"                  # "text" o "json" (una linea JSON por mensaje)
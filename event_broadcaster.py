@@ -0,0 +1,86 @@
+# ============================================
+# DIFUSIÓN DE EVENTOS (SERVER-SENT EVENTS)
+# ============================================
+# Cuando se publica un score nuevo, todas las conexiones abiertas
+# en /api/sentiment/stream lo reciben.
+#
+# No hay una cola por cliente: todos esperan sobre la misma
+# condición y leen el último evento (ya serializado una sola vez).
+# Con gunicorn + gevent cada conexión es una greenlet, no un hilo.
+
+import json
+import threading
+import time
+from config import SSE_HEARTBEAT_SECONDS
+
+class EventBroadcaster:
+    """
+    Guarda el último evento publicado y despierta a los clientes
+    
+    Cada evento tiene un id, así un cliente que se reconecta con
+    Last-Event-ID solo recibe lo que no vio. El id son los milisegundos
+    desde 1970 al publicar (sin repetirse): sigue subiendo después de un
+    reinicio y es comparable entre los workers de gunicorn
+    """
+    
+    def __init__(self, heartbeat_seconds=SSE_HEARTBEAT_SECONDS):
+        self.heartbeat_seconds = heartbeat_seconds
+        self.condition = threading.Condition()
+        self.event_id = 0
+        self.message = None     # Evento ya formateado para SSE
+        self.clients = 0
+    
+    def publish(self, data, event="score"):
+        """
+        Publica un evento nuevo (se serializa una sola vez para todos)
+        
+        Retorna el id del evento
+        """
+        payload = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        
+        with self.condition:
+            self.event_id = max(self.event_id + 1, int(time.time() * 1000))
+            self.message = f"id: {self.event_id}\nevent: {event}\ndata: {payload}\n\n"
+            self.condition.notify_all()
+            return self.event_id
+    
+    def stream(self, last_event_id=None):
+        """
+        Generador para la respuesta SSE de un cliente
+        
+        - Si hay un evento que el cliente no vio, lo manda de inmediato
+        - Después espera eventos nuevos y manda heartbeats mientras tanto
+        
+        Un Last-Event-ID mayor que el último id de este proceso (ej: lo
+        dio otro worker un instante después) no se reconoce: se manda el
+        evento actual en vez de esperar a alcanzarlo
+        """
+        seen = last_event_id or 0
+        
+        with self.condition:
+            self.clients += 1
+            if seen > self.event_id:
+                seen = 0
+        
+        try:
+            # Decirle al navegador cuánto esperar antes de reconectarse
+            yield f"retry: {int(self.heartbeat_seconds * 1000)}\n\n"
+            
+            while True:
+                with self.condition:
+                    if self.event_id <= seen:
+                        self.condition.wait(timeout=self.heartbeat_seconds)
+                    event_id, message = self.event_id, self.message
+                
+                if message is not None and event_id > seen:
+                    seen = event_id
+                    yield message
+                else:
+                    yield ": heartbeat\n\n"
+        finally:
+            with self.condition:
+                self.clients -= 1
+
+
+# Un solo broadcaster por proceso
+broadcaster = EventBroadcaster()
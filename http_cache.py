@@ -0,0 +1,368 @@
+# ============================================
+# CACHE HTTP EN DISCO
+# ============================================
+# Muchas respuestas de los proveedores no cambian entre un refresh y el
+# siguiente (ej: /stock/recommendation y /stock/price-target de Finnhub).
+# El planificador (request_scheduler.py) guarda aquí las respuestas GET
+# y las reusa según sus headers HTTP:
+# - Cache-Control: max-age / Expires: mientras la respuesta esté fresca
+#   se sirve sin ninguna petición (ni token del proveedor)
+# - ETag / Last-Modified: cuando ya no está fresca se pregunta con
+#   If-None-Match / If-Modified-Since; si el proveedor responde 304 no se
+#   descarga nada y se reusa el JSON ya parseado
+# - Cache-Control: no-store no se guarda; no-cache siempre se revalida
+#
+# Un archivo por respuesta en HTTP_CACHE_DIR (una línea JSON con los
+# headers y después el cuerpo tal cual). Si la carpeta pasa de
+# HTTP_CACHE_MAX_MB se borran las respuestas usadas hace más tiempo.
+# Las últimas HTTP_CACHE_MEMORY_ENTRIES respuestas quedan también en
+# memoria con su JSON parseado.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from config import HTTP_CACHE_DIR, HTTP_CACHE_MAX_MB, HTTP_CACHE_MEMORY_ENTRIES
+from log import get_logger
+
+log = get_logger("http_cache")
+
+# Headers que se guardan con cada respuesta
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control", "Expires", "Date", "Age")
+
+# Al pasar el límite se borra hasta quedar en esta fracción (así no se limpia en cada escritura)
+EVICT_TO = 0.9
+
+# JSON todavía no parseado
+_UNPARSED = object()
+
+
+def parse_cache_control(value):
+    """'max-age=60, no-cache' → {"max-age": "60", "no-cache": None}"""
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value):
+    """Fecha HTTP → timestamp (None si no se puede leer)"""
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except Exception:
+        return None
+
+
+def freshness_lifetime(headers):
+    """
+    Segundos que la respuesta puede usarse sin preguntar (0 = revalidar siempre)
+    
+    Sale de Cache-Control: max-age (o de Expires - Date) menos Age
+    """
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return 0
+    
+    lifetime = 0
+    if "max-age" in directives:
+        try:
+            lifetime = int(directives["max-age"])
+        except (TypeError, ValueError):
+            lifetime = 0
+    elif headers.get("Expires"):
+        expires = _http_date(headers["Expires"])
+        date = _http_date(headers.get("Date")) or time.time()
+        lifetime = expires - date if expires is not None else 0
+    
+    try:
+        age = int(headers.get("Age") or 0)
+    except ValueError:
+        age = 0
+    return max(lifetime - age, 0)
+
+
+class CacheEntry:
+    """Una respuesta guardada: headers, cuerpo y (cuando alguien lo pide) su JSON"""
+    
+    __slots__ = ("key", "headers", "body", "fresh_until", "parsed")
+    
+    def __init__(self, key, headers, body, fresh_until):
+        self.key = key
+        self.headers = headers
+        self.body = body
+        self.fresh_until = fresh_until
+        self.parsed = _UNPARSED
+    
+    def is_fresh(self, now=None):
+        return (time.time() if now is None else now) < self.fresh_until
+    
+    def validators(self):
+        """Headers para preguntar si cambió (If-None-Match / If-Modified-Since)"""
+        conditional = {}
+        if self.headers.get("ETag"):
+            conditional["If-None-Match"] = self.headers["ETag"]
+        if self.headers.get("Last-Modified"):
+            conditional["If-Modified-Since"] = self.headers["Last-Modified"]
+        return conditional
+    
+    def json(self):
+        # Se parsea una sola vez por versión de la respuesta
+        if self.parsed is _UNPARSED:
+            self.parsed = json.loads(self.body)
+        return self.parsed
+
+
+class CachedResponse(requests.Response):
+    """
+    Respuesta armada desde el cache (se usa igual que la de requests)
+    
+    - cache_status: "miss" (se descargó), "revalidated" (304) o "hit"
+      (fresca, sin petición)
+    - json() devuelve el objeto ya parseado de la entrada, compartido
+      entre llamadas: no hay que modificarlo
+    """
+    
+    def __init__(self, entry, url, cache_status):
+        super().__init__()
+        self.status_code = 200
+        self.reason = "OK"
+        self.url = url
+        self.headers = CaseInsensitiveDict(entry.headers)
+        self.encoding = get_encoding_from_headers(self.headers)
+        self._content = entry.body
+        self._content_consumed = True
+        self.entry = entry
+        self.cache_status = cache_status
+    
+    def json(self, **kwargs):
+        return self.entry.json()
+
+
+class HTTPCache:
+    """
+    Cache de respuestas GET en disco (ver el comentario del módulo)
+    
+    Uso (lo hace RequestScheduler.request):
+        entry = cache.lookup(url, params)
+        if entry is not None and entry.is_fresh():
+            return cache.hit(entry, url)
+        headers.update(entry.validators())     # si hay entry
+        response = requests.get(...)
+        return cache.store(url, params, response, entry)
+    """
+    
+    def __init__(self, directory=HTTP_CACHE_DIR, max_mb=HTTP_CACHE_MAX_MB, memory_entries=HTTP_CACHE_MEMORY_ENTRIES):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()     # clave -> CacheEntry (la más usada al final)
+        self.size = None                # bytes en disco (se calcula al primer uso)
+        self.lock = threading.Lock()
+        
+        # Estadísticas para /api/health
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(url, params=None):
+        """Nombre del archivo de una petición (hash de la URL y los parámetros)"""
+        if params:
+            items = sorted(params.items()) if isinstance(params, dict) else sorted(params)
+            url = f"{url}?{urlencode(items)}"
+        return hashlib.sha256(url.encode()).hexdigest()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.cache")
+    
+    def _remember(self, entry):
+        """Guarda la entrada en memoria (descartando la menos usada si no entra)"""
+        with self.lock:
+            self.memory[entry.key] = entry
+            self.memory.move_to_end(entry.key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+    
+    def lookup(self, url, params=None):
+        """La respuesta guardada de esta petición (fresca o no), o None"""
+        key = self.key(url, params)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                return entry
+        
+        try:
+            with open(self._path(key), "rb") as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning("Error leyendo respuesta guardada", key=key, error=str(e))
+            return None
+        
+        entry = CacheEntry(key, meta["headers"], body, meta["fresh_until"])
+        self._remember(entry)
+        return entry
+    
+    def hit(self, entry, url):
+        """Respuesta para una entrada fresca (sin petición)"""
+        with self.lock:
+            self.hits += 1
+        self._touch(entry.key)
+        return CachedResponse(entry, url, "hit")
+    
+    def store(self, url, params, response, entry=None):
+        """
+        Procesa la respuesta del proveedor a una petición (condicional si
+        había `entry`)
+        
+        - 304: la entrada sigue valiendo → se renueva su frescura
+        - 200 que se puede guardar → se guarda
+        - Otra cosa → se devuelve tal cual
+        
+        Retorna la respuesta que debe ver el recolector
+        """
+        if response.status_code == 304 and entry is not None:
+            with self.lock:
+                self.revalidated += 1
+            # El 304 puede traer headers nuevos (ETag, Cache-Control...)
+            headers = dict(entry.headers)
+            headers.update({h: response.headers[h] for h in STORED_HEADERS
+                            if h in response.headers and h != "Content-Type"})
+            entry.headers = headers
+            entry.fresh_until = time.time() + freshness_lifetime(headers)
+            self._write(entry)
+            return CachedResponse(entry, url, "revalidated")
+        
+        with self.lock:
+            self.misses += 1
+        
+        if response.status_code != 200 or not self._storable(response.headers):
+            return response
+        
+        headers = {h: response.headers[h] for h in STORED_HEADERS if h in response.headers}
+        fresh_until = time.time() + freshness_lifetime(headers)
+        new_entry = CacheEntry(self.key(url, params), headers, response.content, fresh_until)
+        self._remember(new_entry)
+        self._write(new_entry)
+        return CachedResponse(new_entry, url, "miss")
+    
+    @staticmethod
+    def _storable(headers):
+        """True si vale la pena guardar la respuesta: se puede revalidar o tiene frescura"""
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        if "no-store" in directives or headers.get("Vary") == "*":
+            return False
+        return bool(headers.get("ETag") or headers.get("Last-Modified") or freshness_lifetime(headers) > 0)
+    
+    def _touch(self, key):
+        """Marca el archivo como usado recién (el borrado empieza por los más viejos)"""
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+    
+    def _write(self, entry):
+        """Escribe la entrada de forma atómica (archivo temporal + rename)"""
+        meta = json.dumps({"headers": entry.headers, "fresh_until": entry.fresh_until}).encode()
+        path = self._path(entry.key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(meta + b"\n" + entry.body)
+                # Si la respuesta ya estaba guardada (304 o respuesta nueva) se reemplaza
+                try:
+                    replaced = os.path.getsize(path)
+                except OSError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            log.warning("Error guardando respuesta", key=entry.key, error=str(e))
+            return
+        
+        with self.lock:
+            if self.size is None:
+                self.size = self._scan()[1]
+            else:
+                self.size += len(meta) + 1 + len(entry.body) - replaced
+            over = self.size > self.max_bytes
+        if over:
+            self._evict()
+    
+    def _scan(self):
+        """Los archivos del cache [(usado, bytes, ruta)] y el total de bytes"""
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for item in entries:
+                    if item.name.endswith(".cache"):
+                        stat = item.stat()
+                        files.append((stat.st_mtime, stat.st_size, item.path))
+        except FileNotFoundError:
+            pass
+        return files, sum(size for _, size, _ in files)
+    
+    def _evict(self):
+        """Borra las respuestas usadas hace más tiempo hasta bajar de EVICT_TO del límite"""
+        files, total = self._scan()
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+            with self.lock:
+                self.memory.pop(os.path.basename(path)[:-len(".cache")], None)
+        
+        with self.lock:
+            self.size = total
+        log.debug("Cache HTTP recortado", removed=removed, size_mb=round(total / 1024 / 1024, 1))
+    
+    def status(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "misses": self.misses,
+                "memory_entries": len(self.memory),
+                "size_mb": round(self.size / 1024 / 1024, 2) if self.size is not None else None
+            }
+
+
+# Un solo cache por proceso (None si HTTP_CACHE_DIR está vacío)
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache():
+    """Devuelve el cache HTTP del proceso, creándolo si hace falta"""
+    global _cache
+    if not HTTP_CACHE_DIR:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HTTPCache()
+        return _cache
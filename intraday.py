@@ -0,0 +1,320 @@
+# ============================================
+# MODO INTRADÍA (VIX, PUT/CALL Y TÉCNICOS CADA MINUTO)
+# ============================================
+# En horario de mercado un hilo en background:
+# 1. Pide SOLO las velas nuevas (1m/5m) del VIX y del ETF de cada
+#    universo (desde la última vela vista)
+# 2. Actualiza los indicadores de forma incremental: cada vela nueva
+#    cuesta O(1), no se recalcula toda la serie
+# 3. Recalcula VIX, Put/Call y técnicos con los componentes de
+#    components.py y avisa al servidor
+#
+# Noticias, Reddit y analistas siguen con el refresh normal (15 minutos)
+
+import threading
+from collections import deque
+from concurrent.futures import wait
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from config import (
+    INTRADAY_INTERVAL, INTRADAY_REFRESH_SECONDS, INTRADAY_WARMUP_PERIOD,
+    MARKET_TIMEZONE, MARKET_HOURS, PESOS
+)
+from components import Component, DependencyExecutor
+from request_scheduler import PRIORITY_CRITICAL
+from sentiment_calculator import SentimentCalculator, remember_component
+from technical_collector import TechnicalCollector
+from universe import get_universes
+from log import get_logger
+
+log = get_logger("intraday")
+
+
+def is_market_open(now=None):
+    """True si ahora es día de semana y está dentro de MARKET_HOURS (hora de Nueva York)"""
+    now = now or datetime.now(ZoneInfo(MARKET_TIMEZONE))
+    if now.weekday() >= 5:
+        return False
+    opens, closes = MARKET_HOURS
+    return opens <= now.strftime("%H:%M") < closes
+
+
+# ============================================
+# INDICADORES INCREMENTALES
+# ============================================
+class IncrementalIndicators:
+    """
+    RSI, MACD y medias (SMA 5 y 20) de una serie que crece vela a vela,
+    con los mismos resultados que TechnicalCollector.score_prices sobre
+    la serie completa
+    
+    La última vela puede estar formándose todavía (Yahoo la va
+    actualizando): queda "pendiente" y se reemplaza si vuelve a llegar
+    con el mismo timestamp. Se confirma cuando llega una vela más nueva.
+    """
+    
+    RSI_PERIOD = 14
+    EMA_PERIODS = (12, 26)
+    
+    def __init__(self):
+        self.count = 0                  # Velas confirmadas
+        self.last_close = None          # Cierre de la última vela confirmada
+        self.last_timestamp = None      # De la vela pendiente
+        self.pending = None             # Cierre de la vela que se está formando
+        self.closes = deque(maxlen=20)
+        self.deltas = deque(maxlen=self.RSI_PERIOD)
+        # Cada EMA empieza con el promedio de sus primeros `period` cierres
+        self.seed_sums = {period: 0.0 for period in self.EMA_PERIODS}
+        self.emas = {period: None for period in self.EMA_PERIODS}
+    
+    def update(self, timestamp, close):
+        """Agrega (o corrige) una vela"""
+        if close is None:
+            return
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            return
+        if timestamp != self.last_timestamp and self.pending is not None:
+            self._commit(self.pending)
+        self.pending = close
+        self.last_timestamp = timestamp
+    
+    def _commit(self, close):
+        if self.last_close is not None:
+            self.deltas.append(close - self.last_close)
+        self.closes.append(close)
+        self.count += 1
+        for period in self.EMA_PERIODS:
+            self.emas[period] = self._ema(period, close, self.count)
+            if self.count <= period:
+                self.seed_sums[period] += close
+        self.last_close = close
+    
+    def _ema(self, period, close, bars):
+        """EMA si `close` es la vela número `bars` (igual que TechnicalCollector._calculate_ema)"""
+        if bars < period:
+            return None
+        if bars == period:
+            return (self.seed_sums[period] + close) / period
+        multiplier = 2 / (period + 1)
+        return (close - self.emas[period]) * multiplier + self.emas[period]
+    
+    def values(self):
+        """
+        Indicadores con las velas confirmadas + la pendiente
+        
+        Retorna {"close", "bars", "rsi", "macd", "sma5", "sma20"} (None si no hay velas)
+        """
+        if self.pending is None:
+            return None
+        
+        close = self.pending
+        bars = self.count + 1
+        
+        # RSI: promedio simple de las últimas 14 subidas y bajadas
+        rsi = None
+        if bars >= self.RSI_PERIOD + 1:
+            recent = list(self.deltas)[1 - self.RSI_PERIOD:] + [close - self.last_close]
+            avg_gain = sum(d if d > 0 else 0 for d in recent) / self.RSI_PERIOD
+            avg_loss = sum(-d if d < 0 else 0 for d in recent) / self.RSI_PERIOD
+            rsi = 100 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+        
+        # MACD: EMA 12 - EMA 26
+        ema12, ema26 = (self._ema(period, close, bars) for period in self.EMA_PERIODS)
+        macd = ema12 - ema26 if ema26 is not None else None
+        
+        # Tendencia: SMA 5 vs SMA 20
+        sma5 = sma20 = None
+        if bars >= 20:
+            closes = list(self.closes)[-19:] + [close]
+            sma5 = sum(closes[-5:]) / 5
+            sma20 = sum(closes) / 20
+        
+        return {"close": close, "bars": bars, "rsi": rsi, "macd": macd, "sma5": sma5, "sma20": sma20}
+
+
+# ============================================
+# SEGUIMIENTO INTRADÍA
+# ============================================
+class IntradayTracker:
+    """
+    Mantiene los indicadores intradía del VIX y de los ETFs de los
+    universos y recalcula VIX, Put/Call y técnicos
+    
+    Parámetros:
+    - technical_collector: el que pide las velas y convierte a score
+    - interval: velas de "1m" o "5m"
+    - refresh_seconds: cada cuánto se recalcula (en horario de mercado)
+    """
+    
+    def __init__(self, technical_collector=None, interval=INTRADAY_INTERVAL,
+                 refresh_seconds=INTRADAY_REFRESH_SECONDS):
+        self.technical = technical_collector or TechnicalCollector()
+        self.interval = interval
+        self.refresh_seconds = refresh_seconds
+        self.universes = list(get_universes())
+        
+        self.indicators = {}   # símbolo -> IncrementalIndicators
+        self.lock = threading.Lock()
+        
+        self.components = intraday_components(self.technical, interval)
+        self.executor = DependencyExecutor({"intraday": self.update_symbol})
+        
+        self.start_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.on_update = None
+        self.last_update = None
+        self.latest = {}       # Lo último que devolvió refresh
+    
+    def update_symbol(self, symbol):
+        """
+        Pide las velas nuevas de un símbolo (la primera vez,
+        INTRADAY_WARMUP_PERIOD) y actualiza sus indicadores
+        
+        Retorna los indicadores actuales (o None si no hay velas)
+        """
+        with self.lock:
+            indicators = self.indicators.setdefault(symbol, IncrementalIndicators())
+            start = indicators.last_timestamp
+        
+        data = self.technical.get_stock_data(
+            symbol, period=INTRADAY_WARMUP_PERIOD, interval=self.interval,
+            priority=PRIORITY_CRITICAL, start=start
+        )
+        if data:
+            with self.lock:
+                for timestamp, close in zip(data["timestamps"], data["close"]):
+                    indicators.update(timestamp, close)
+        
+        with self.lock:
+            return indicators.values()
+    
+    def refresh(self, timeout=None):
+        """
+        Recalcula los componentes intradía de todos los universos
+        
+        Retorna {universo: {componente: resultado}} con los que salieron
+        bien (si algo falla se queda el valor del refresh normal)
+        """
+        futures = self.executor.run(self.components, self.universes)
+        done, _ = wait(set(futures.values()), timeout=timeout or self.refresh_seconds)
+        
+        updates = {universe: {} for universe in self.universes}
+        for (name, universe), future in futures.items():
+            if future not in done or future.exception() is not None:
+                continue
+            result = future.result()
+            if "error" not in result:
+                updates[universe][name] = {
+                    "score": result["score"],
+                    "weight": PESOS.get(name, 0),
+                    "details": result
+                }
+                remember_component(name, result["score"], result, universe=universe)
+        
+        self.last_update = datetime.now()
+        self.latest = updates
+        return updates
+    
+    def recent_updates(self):
+        """Lo último que devolvió refresh, si es de los últimos minutos (si no, {})"""
+        if self.last_update is None:
+            return {}
+        age = (datetime.now() - self.last_update).total_seconds()
+        return self.latest if age <= 3 * self.refresh_seconds else {}
+    
+    def start(self, on_update):
+        """
+        Arranca el hilo (si no está corriendo ya)
+        
+        - on_update(updates): recibe lo que devuelve refresh cada vez
+        """
+        with self.start_lock:
+            self.on_update = on_update
+            if self.thread and self.thread.is_alive():
+                return
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def stop(self):
+        """Detiene el hilo"""
+        self.stop_event.set()
+    
+    def _run(self):
+        while not self.stop_event.wait(self.refresh_seconds):
+            if not is_market_open():
+                continue
+            try:
+                self.on_update(self.refresh())
+            except Exception as e:
+                log.error("Error en el modo intradía", error=str(e))
+
+
+def intraday_components(technical, interval=INTRADAY_INTERVAL):
+    """VIX, Put/Call y técnicos a partir de los indicadores intradía"""
+    
+    def score_technical(universe, inputs):
+        values = inputs["intraday:{index}"]
+        if not values:
+            return technical.summarize(universe, None)
+        result = technical.score_indicators(values["rsi"], values["macd"], values["sma5"], values["sma20"])
+        result.update({"interval": interval, "bars": values["bars"], "price": round(values["close"], 2)})
+        return technical.summarize(universe, result)
+    
+    def close(values):
+        return values["close"] if values else None
+    
+    return [
+        Component(
+            "technical", "técnicos", ["intraday:{index}"], score_technical
+        ),
+        Component(
+            "vix", "VIX", ["intraday:^VIX"],
+            lambda universe, inputs: technical.score_vix(close(inputs["intraday:^VIX"])),
+            per_universe=False
+        ),
+        Component(
+            "put_call_ratio", "Put/Call", ["intraday:^VIX"],
+            lambda universe, inputs: technical.score_put_call(close(inputs["intraday:^VIX"])),
+            per_universe=False
+        )
+    ]
+
+
+def apply_intraday(results, updates):
+    """
+    Reemplaza en cada resultado los componentes recalculados y
+    recalcula el score final (sin peticiones)
+    
+    Retorna resultados nuevos (no modifica los que recibe)
+    """
+    timestamp = datetime.now().isoformat()
+    merged = {}
+    for universe, result in results.items():
+        components = dict(result["components"])
+        components.update(updates.get(universe, {}))
+        final_score = SentimentCalculator._calculate_weighted_score(components)
+        
+        merged[universe] = dict(result)
+        merged[universe].update({
+            "final_score": round(final_score, 2),
+            "interpretation": SentimentCalculator._interpret_score(final_score),
+            "components": components,
+            "timestamp": timestamp
+        })
+    return merged
+
+
+# Un solo tracker por proceso
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_intraday_tracker():
+    """Devuelve el tracker compartido del proceso, creándolo si hace falta"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = IntradayTracker()
+        return _tracker
@@ -0,0 +1,379 @@
+# ============================================
+# PRUEBA DE CARGA DE LA API
+# ============================================
+# Mide cuántas peticiones por segundo aguantan /api/sentiment,
+# /api/sentiment/components y /api/health, y con qué latencia
+# (p50/p95/p99), sin tocar las APIs reales.
+#
+# Uso:
+#   python loadtest.py                                 # app en este proceso (Flask test client)
+#   python loadtest.py --gunicorn                      # a través de un gunicorn local
+#   python loadtest.py --gunicorn --worker-class gthread --workers 4 --concurrency 64
+#   python loadtest.py --collector-latency 5 --herd 200
+#
+# Escenarios:
+# - hit:   el cache está fresco
+# - stale: el cache está viejo; la primera petición lanza el refresh en
+#          background y todas se sirven con el dato viejo mientras tanto
+# - cold:  el servidor arranca sin datos y llegan --herd peticiones a
+#          /api/sentiment a la vez (thundering herd). Se cuenta cuántos
+#          cálculos se lanzaron y cuántas respuestas no fueron 200
+#
+# El cálculo (recolectores incluidos) se reemplaza por StubCalculator:
+# devuelve resultados del mismo tamaño que los reales después de esperar
+# --collector-latency segundos. Nada se escribe en disco (ni snapshot ni
+# estadísticas) y no se lee el snapshot al arrancar.
+
+import argparse
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from config import PESOS
+
+ENDPOINTS = ("/api/sentiment", "/api/sentiment/components", "/api/health")
+
+
+# ============================================
+# CÁLCULO FALSO (EN LUGAR DE LOS RECOLECTORES)
+# ============================================
+def stub_results():
+    """Resultados falsos de todos los universos, con detalles por acción como los reales"""
+    from sentiment_calculator import SentimentCalculator
+    from universe import get_universes
+    
+    rng = random.Random(42)
+    timestamp = datetime.now().isoformat()
+    results = {}
+    for name, universe in get_universes().items():
+        symbols = universe["symbols"]
+        components = {}
+        for component, weight in PESOS.items():
+            score = round(rng.uniform(-60, 60), 2)
+            details = {"score": score}
+            if component in ("news_sentiment", "social_sentiment", "technical", "analyst_recommendations"):
+                details["symbols"] = {s: {"score": round(rng.uniform(-100, 100), 2)} for s in symbols}
+                details["coverage"] = 1.0
+            components[component] = {"score": score, "weight": weight, "details": details}
+        
+        final_score = SentimentCalculator._calculate_weighted_score(components)
+        results[name] = {
+            "universe": name,
+            "index": universe["index"],
+            "final_score": round(final_score, 2),
+            "interpretation": SentimentCalculator._interpret_score(final_score),
+            "components": components,
+            "timestamp": timestamp,
+            "weights_used": PESOS
+        }
+    return results
+
+
+class StubCalculator:
+    """
+    Reemplaza a SentimentCalculator en el servidor: espera `latency`
+    segundos (como si pidiera los datos) y devuelve stub_results()
+    
+    Cuenta los cálculos en `calls` (y en LOADTEST_CALLS_FILE si está
+    definido: con gunicorn cada worker es otro proceso)
+    """
+    
+    latency = 0.0
+    calls = 0
+    lock = threading.Lock()
+    release = threading.Event()   # Termina antes el cálculo en curso
+    
+    def __init__(self, universes=None):
+        pass
+    
+    def calculate_all(self, print_summary=False):
+        with StubCalculator.lock:
+            StubCalculator.calls += 1
+        calls_file = os.environ.get("LOADTEST_CALLS_FILE")
+        if calls_file:
+            with open(calls_file, "a") as f:
+                f.write(f"{os.getpid()}\n")
+        StubCalculator.release.wait(StubCalculator.latency)
+        return stub_results()
+
+
+def install_stubs(latency):
+    """Conecta StubCalculator al servidor y desactiva lo que escribe en disco"""
+    import server
+    
+    StubCalculator.latency = latency
+    server.SentimentCalculator = StubCalculator
+    server.save_snapshot = lambda *args, **kwargs: None
+    server.score_stats.save = lambda *args, **kwargs: None
+    return server
+
+
+def prepare(server, scenario):
+    """Deja el cache del servidor como pide el escenario"""
+    server.sentiment_cache.update({"results": None, "last_updated": None, "updating": False, "source": None})
+    server.projection_caches.clear()
+    server.whatif_cache.clear()
+    StubCalculator.calls = 0
+    
+    if scenario == "cold":
+        return
+    last_updated = datetime.now()
+    if scenario == "stale":
+        last_updated -= timedelta(minutes=server.CACHE_DURATION_MINUTES + 1)
+    server.publish_result(stub_results(), last_updated, "live", record=False)
+
+
+def create_app():
+    """
+    App para gunicorn ("loadtest:create_app()"), configurada con las
+    variables LOADTEST_SCENARIO y LOADTEST_LATENCY
+    """
+    server = install_stubs(float(os.environ.get("LOADTEST_LATENCY", "0")))
+    prepare(server, os.environ.get("LOADTEST_SCENARIO", "hit"))
+    return server.app
+
+
+# ============================================
+# CLIENTES
+# ============================================
+class InProcessClient:
+    """Peticiones con el test client de Flask (sin red: mide solo la app)"""
+    
+    def __init__(self, app):
+        self.client = app.test_client()
+    
+    def get(self, path):
+        response = self.client.get(path)
+        response.close()
+        return response.status_code
+
+
+class HTTPClient:
+    """Peticiones HTTP a un servidor local (conexión reutilizada si el worker lo permite)"""
+    
+    def __init__(self, base_url):
+        import requests
+        self.session = requests.Session()
+        self.base_url = base_url
+    
+    def get(self, path):
+        try:
+            return self.session.get(self.base_url + path, timeout=120).status_code
+        except Exception:
+            return 0   # Error de conexión
+
+
+def run_load(make_client, path, concurrency, duration):
+    """
+    `concurrency` clientes pidiendo `path` sin pausa durante `duration` segundos
+    
+    Retorna (latencias en segundos, {status: cantidad}, segundos reales)
+    """
+    latencies = [[] for _ in range(concurrency)]
+    statuses = [{} for _ in range(concurrency)]
+    start = threading.Barrier(concurrency + 1)
+    
+    def worker(i):
+        client = make_client()
+        start.wait()
+        deadline = time.perf_counter() + duration
+        while True:
+            begin = time.perf_counter()
+            if begin >= deadline:
+                break
+            status = client.get(path)
+            latencies[i].append(time.perf_counter() - begin)
+            statuses[i][status] = statuses[i].get(status, 0) + 1
+    
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return merge(latencies, statuses) + (time.perf_counter() - began,)
+
+
+def run_herd(make_client, path, clients):
+    """
+    `clients` peticiones a `path` que salen exactamente a la vez
+    
+    Retorna (latencias en segundos, {status: cantidad}, segundos reales)
+    """
+    latencies = [[] for _ in range(clients)]
+    statuses = [{} for _ in range(clients)]
+    ready = threading.Barrier(clients + 1)
+    
+    def worker(i):
+        client = make_client()
+        ready.wait()
+        begin = time.perf_counter()
+        status = client.get(path)
+        latencies[i].append(time.perf_counter() - begin)
+        statuses[i][status] = 1
+    
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    ready.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return merge(latencies, statuses) + (time.perf_counter() - began,)
+
+
+def merge(latencies, statuses):
+    merged = {}
+    for counts in statuses:
+        for status, count in counts.items():
+            merged[status] = merged.get(status, 0) + count
+    return np.array([l for per_client in latencies for l in per_client]), merged
+
+
+# ============================================
+# REPORTE
+# ============================================
+def report_row(scenario, path, latencies, statuses, elapsed, calculations=None):
+    """Una fila de la tabla de resultados"""
+    if len(latencies):
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    else:
+        p50 = p95 = p99 = float("nan")
+    codes = " ".join(f"{status}×{count}" for status, count in sorted(statuses.items()))
+    calculations = "" if calculations is None else str(calculations)
+    print(f"{scenario:<6} {path:<28} {len(latencies):>8} {len(latencies) / elapsed:>9.1f} "
+          f"{p50:>8.2f} {p95:>8.2f} {p99:>8.2f} {calculations:>6}  {codes}")
+
+
+def print_header(title):
+    print(f"\n{title}")
+    print(f"{'escen.':<6} {'endpoint':<28} {'pedidos':>8} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'calc.':>6}  status")
+
+
+# ============================================
+# MODOS
+# ============================================
+def run_in_process(args):
+    server = install_stubs(args.collector_latency)
+    print_header(f"En proceso (test client) · {args.concurrency} clientes · {args.duration}s por prueba")
+    
+    for scenario in ("hit", "stale"):
+        # En "stale" el refresh dura toda la prueba: así se mide servir el dato viejo
+        StubCalculator.latency = args.duration + 5 if scenario == "stale" else args.collector_latency
+        for path in args.endpoints:
+            prepare(server, scenario)
+            latencies, statuses, elapsed = run_load(
+                lambda: InProcessClient(server.app), path, args.concurrency, args.duration
+            )
+            report_row(scenario, path, latencies, statuses, elapsed, StubCalculator.calls)
+            # Que el refresh de esta prueba no siga corriendo en la siguiente
+            StubCalculator.release.set()
+            with server.update_lock:
+                StubCalculator.release.clear()
+    
+    StubCalculator.latency = args.collector_latency
+    prepare(server, "cold")
+    latencies, statuses, elapsed = run_herd(lambda: InProcessClient(server.app), "/api/sentiment", args.herd)
+    report_row("cold", f"/api/sentiment (herd {args.herd})", latencies, statuses, elapsed, StubCalculator.calls)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(args, scenario, latency, calls_file):
+    """Arranca gunicorn con la app falsa y espera a que responda"""
+    port = free_port()
+    env = dict(os.environ, LOADTEST_SCENARIO=scenario, LOADTEST_LATENCY=str(latency),
+               LOADTEST_CALLS_FILE=calls_file)
+    command = [
+        sys.executable, "-m", "gunicorn", "loadtest:create_app()",
+        "--bind", f"127.0.0.1:{port}",
+        "--workers", str(args.workers),
+        "--worker-class", args.worker_class,
+        "--threads", str(args.threads),
+        "--worker-connections", str(max(1000, args.concurrency, args.herd)),
+        "--timeout", "120",
+        "--log-level", "warning"
+    ]
+    process = subprocess.Popen(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("gunicorn no arrancó (¿está instalado? pip install -r requirements.txt)")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("gunicorn no respondió en 30 segundos")
+
+
+def run_gunicorn(args):
+    print_header(f"gunicorn ({args.worker_class}, {args.workers} workers) · "
+                 f"{args.concurrency} clientes · {args.duration}s por prueba")
+    
+    def run(scenario, latency, measure):
+        with tempfile.NamedTemporaryFile(prefix="loadtest-calls-", delete=False) as f:
+            calls_file = f.name
+        process, base_url = start_gunicorn(args, scenario, latency, calls_file)
+        try:
+            latencies, statuses, elapsed = measure(lambda: HTTPClient(base_url))
+        finally:
+            process.terminate()
+            process.wait()
+        with open(calls_file) as f:
+            calculations = sum(1 for _ in f)
+        os.remove(calls_file)
+        return latencies, statuses, elapsed, calculations
+    
+    for scenario in ("hit", "stale"):
+        latency = args.duration + 5 if scenario == "stale" else args.collector_latency
+        for path in args.endpoints:
+            results = run(scenario, latency,
+                          lambda make_client: run_load(make_client, path, args.concurrency, args.duration))
+            report_row(scenario, path, *results)
+    
+    results = run("cold", args.collector_latency,
+                  lambda make_client: run_herd(make_client, "/api/sentiment", args.herd))
+    report_row("cold", f"/api/sentiment (herd {args.herd})", *results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API con los recolectores simulados")
+    parser.add_argument("--gunicorn", action="store_true", help="Probar a través de un gunicorn local")
+    parser.add_argument("--duration", type=float, default=5, help="Segundos de cada prueba")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes en paralelo")
+    parser.add_argument("--herd", type=int, default=100, help="Peticiones simultáneas en el arranque en frío")
+    parser.add_argument("--collector-latency", type=float, default=2.0,
+                        help="Segundos que tarda el cálculo simulado")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="Endpoint a probar (se puede repetir; por defecto los tres)")
+    parser.add_argument("--workers", type=int, default=1, help="Workers de gunicorn")
+    parser.add_argument("--worker-class", default="gevent", help="Worker de gunicorn (gevent, gthread, sync)")
+    parser.add_argument("--threads", type=int, default=1, help="Hilos por worker (con gthread)")
+    args = parser.parse_args()
+    args.endpoints = args.endpoints or list(ENDPOINTS)
+    
+    if args.gunicorn:
+        run_gunicorn(args)
+    else:
+        run_in_process(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# ============================================
+# LOGS ESTRUCTURADOS Y ASÍNCRONOS
+# ============================================
+# Reemplaza los print() del camino del refresh:
+# - Cada mensaje tiene nivel (DEBUG, INFO, WARNING, ERROR), el componente
+#   que lo emite ("news", "technical", "server"...) y campos sueltos
+#   (symbol=AAPL score=24.0) en vez de texto armado a mano
+# - El que loguea solo deja el registro en una cola; un hilo aparte
+#   (QueueListener) le da formato y lo escribe en stderr. Así el refresh
+#   nunca espera a la terminal o al log de gunicorn
+# - Si el nivel está desactivado (ej: DEBUG, el detalle por acción) la
+#   llamada retorna antes de crear nada
+#
+# Uso:
+#   from log import get_logger
+#   log = get_logger("news")
+#   log.info("📰 Recolectando noticias...")
+#   log.debug("Noticias analizadas", symbol=symbol, articles=5, score=24.0)
+#
+# LOG_LEVEL y LOG_FORMAT ("text" o "json") están en config.py y se pueden
+# cambiar con las variables de entorno del mismo nombre
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from config import LOG_LEVEL, LOG_FORMAT
+
+ROOT_LOGGER = "sentiment"
+
+
+class StructuredLogger:
+    """
+    Logger de un componente: log.info("mensaje", campo=valor, ...)
+    
+    Los campos viajan tal cual hasta el hilo que escribe: no hay que
+    armar el texto (ni hacer f-strings) en el camino caliente
+    """
+    
+    __slots__ = ("component", "logger")
+    
+    def __init__(self, component):
+        self.component = component
+        self.logger = logging.getLogger(f"{ROOT_LOGGER}.{component}")
+    
+    def enabled(self, level):
+        """True si `level` ("debug", "info"...) está activo (para no preparar campos caros en vano)"""
+        return self.logger.isEnabledFor(logging.getLevelName(level.upper()))
+    
+    def _log(self, level, message, fields, exc_info=False):
+        self.logger.log(level, message, exc_info=exc_info,
+                        extra={"component": self.component, "fields": fields})
+    
+    # Cada método mira el nivel antes que nada: desactivado cuesta una
+    # llamada y una consulta al cache de niveles de logging
+    def debug(self, message, **fields):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._log(logging.DEBUG, message, fields)
+    
+    def info(self, message, **fields):
+        if self.logger.isEnabledFor(logging.INFO):
+            self._log(logging.INFO, message, fields)
+    
+    def warning(self, message, **fields):
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._log(logging.WARNING, message, fields)
+    
+    def error(self, message, exc_info=False, **fields):
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._log(logging.ERROR, message, fields, exc_info)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler que no formatea en el hilo que loguea (el de la librería
+    sí lo hace): el registro se formatea en el hilo del QueueListener
+    """
+    
+    def prepare(self, record):
+        return record
+
+
+class TextFormatter(logging.Formatter):
+    """14:03:07 INFO    news       Noticias analizadas symbol=AAPL articles=5"""
+    
+    def format(self, record):
+        fields = getattr(record, "fields", None) or {}
+        line = (f"{self.formatTime(record, '%H:%M:%S')} {record.levelname:<7} "
+                f"{getattr(record, 'component', record.name):<10} {record.getMessage()}")
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class JSONFormatter(logging.Formatter):
+    """Una línea JSON por mensaje: {"ts", "level", "component", "message", ...campos}"""
+    
+    def format(self, record):
+        data = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "component": getattr(record, "component", record.name),
+            "message": record.getMessage()
+        }
+        data.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, ensure_ascii=False)
+
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def _start_listener():
+    """Crea la cola y el hilo que escribe (también en cada proceso hijo, ver os.register_at_fork)"""
+    global _listener
+    records = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JSONFormatter() if os.environ.get("LOG_FORMAT", LOG_FORMAT) == "json" else TextFormatter())
+    
+    root = logging.getLogger(ROOT_LOGGER)
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(_DeferredQueueHandler(records))
+    
+    _listener = QueueListener(records, handler)
+    _listener.start()
+
+
+def _stop_listener():
+    """Escribe lo que quedó en la cola (al salir)"""
+    if _listener is not None:
+        _listener.stop()
+
+
+def setup():
+    """Configura el logger raíz una sola vez por proceso"""
+    with _setup_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(os.environ.get("LOG_LEVEL", LOG_LEVEL).upper())
+        root.propagate = False
+        _start_listener()
+        atexit.register(_stop_listener)
+        # Después de un fork (gunicorn, ProcessPoolExecutor) el hilo que
+        # escribe no existe en el hijo: se crea uno nuevo
+        os.register_at_fork(after_in_child=_start_listener)
+
+
+def get_logger(component):
+    """Logger de un componente (ej: "news", "server")"""
+    setup()
+    return StructuredLogger(component)
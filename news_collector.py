@@ -3,9 +3,188 @@
 # ============================================
 # Este módulo busca noticias financieras y analiza su sentimiento
 
-import requests
+import hashlib
+import threading
+import time
 from datetime import datetime, timedelta
-from config import FINNHUB_API_KEY, NASDAQ_STOCKS
+from config import FINNHUB_API_KEY, NEWS_WINDOW_DAYS, NEWS_INDEX_MAX_ARTICLES, DEFAULT_UNIVERSE
+from request_scheduler import get_scheduler, PRIORITY_NORMAL
+from scorers import create_scorer
+from universe import get_universe, get_shard_scheduler, get_result_store, finnhub_symbol
+from log import get_logger
+
+log = get_logger("news")
+
+
+# ============================================
+# LÉXICO DE NOTICIAS
+# ============================================
+# Palabras positivas y su peso
+POSITIVE_WORDS = {
+    "surge": 0.8, "surges": 0.8, "soar": 0.8, "soars": 0.8,
+    "jump": 0.6, "jumps": 0.6, "gain": 0.5, "gains": 0.5,
+    "rise": 0.5, "rises": 0.5, "rally": 0.7, "rallies": 0.7,
+    "bull": 0.6, "bullish": 0.7, "boom": 0.7,
+    "record": 0.5, "high": 0.4, "growth": 0.5,
+    "beat": 0.6, "beats": 0.6, "exceed": 0.6, "exceeds": 0.6,
+    "upgrade": 0.7, "upgraded": 0.7, "buy": 0.5,
+    "profit": 0.5, "profits": 0.5, "revenue": 0.3,
+    "success": 0.6, "successful": 0.6, "win": 0.5, "wins": 0.5,
+    "positive": 0.5, "optimism": 0.6, "optimistic": 0.6,
+    "strong": 0.4, "strength": 0.4, "recover": 0.5, "recovery": 0.5,
+    "breakout": 0.6, "momentum": 0.4, "outperform": 0.6,
+}
+
+# Palabras negativas y su peso
+NEGATIVE_WORDS = {
+    "crash": -0.9, "crashes": -0.9, "plunge": -0.8, "plunges": -0.8,
+    "drop": -0.6, "drops": -0.6, "fall": -0.5, "falls": -0.5,
+    "decline": -0.5, "declines": -0.5, "sink": -0.6, "sinks": -0.6,
+    "bear": -0.6, "bearish": -0.7, "bust": -0.7,
+    "low": -0.4, "loss": -0.6, "losses": -0.6,
+    "miss": -0.6, "misses": -0.6, "missed": -0.6,
+    "downgrade": -0.7, "downgraded": -0.7, "sell": -0.5,
+    "fear": -0.6, "fears": -0.6, "concern": -0.4, "concerns": -0.4,
+    "risk": -0.4, "risks": -0.4, "warning": -0.5, "warn": -0.5,
+    "negative": -0.5, "pessimism": -0.6, "pessimistic": -0.6,
+    "weak": -0.4, "weakness": -0.4, "trouble": -0.5,
+    "crisis": -0.8, "recession": -0.7, "inflation": -0.4,
+    "layoff": -0.6, "layoffs": -0.6, "cut": -0.4, "cuts": -0.4,
+    "lawsuit": -0.5, "investigation": -0.5, "fraud": -0.8,
+}
+
+
+# ============================================
+# ÍNDICE DE ARTÍCULOS (SIN DUPLICADOS)
+# ============================================
+class ArticleIndex:
+    """
+    Finnhub devuelve la misma noticia general (ej: "Tech stocks rally")
+    para varias acciones. Este índice:
+    1. Identifica cada artículo por su id de Finnhub y por el hash de su URL
+    2. Lo analiza una sola vez
+    3. Guarda a qué acciones se atribuyó
+    
+    Los artículos más viejos que window_days salen del índice, así la
+    memoria queda acotada por el tamaño de la ventana
+    """
+    
+    def __init__(self, window_days=NEWS_WINDOW_DAYS, max_articles=NEWS_INDEX_MAX_ARTICLES):
+        self.window_seconds = window_days * 86400
+        self.max_articles = max_articles
+        self.articles = {}    # clave -> {"sentiment", "datetime", "symbols"}
+        self.aliases = {}     # id o hash de URL -> clave
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def article_keys(news):
+        """Claves con las que se puede reconocer un artículo"""
+        keys = []
+        if news.get("id"):
+            keys.append(f"id:{news['id']}")
+        url = (news.get("url") or "").strip().lower().rstrip("/")
+        if url:
+            keys.append("url:" + hashlib.sha1(url.encode()).hexdigest())
+        if not keys:
+            headline = (news.get("headline") or "").strip().lower()
+            keys.append("headline:" + hashlib.sha1(headline.encode()).hexdigest())
+        return keys
+    
+    def missing(self, news_list):
+        """
+        Artículos de la lista que todavía no están en el índice
+        (sin repetir: si un artículo viene dos veces, se devuelve una)
+        """
+        new = []
+        seen = set()
+        with self.lock:
+            for news in news_list:
+                keys = self.article_keys(news)
+                if any(k in self.aliases or k in seen for k in keys):
+                    continue
+                seen.update(keys)
+                new.append(news)
+        return new
+    
+    def add(self, news, symbol, sentiments):
+        """
+        Registra un artículo para una acción y devuelve su clave
+        
+        - sentiments: {clave: sentimiento} de los artículos nuevos (ya
+          analizados en lote); solo se usa si el artículo no estaba en el índice
+        """
+        keys = self.article_keys(news)
+        
+        with self.lock:
+            key = next((self.aliases[k] for k in keys if k in self.aliases), None)
+            
+            if key is None:
+                key = keys[0]
+                self.articles[key] = {
+                    "sentiment": sentiments.get(key, 0),
+                    "datetime": news.get("datetime") or time.time(),
+                    "symbols": set()
+                }
+            
+            for k in keys:
+                self.aliases[k] = key
+            self.articles[key]["symbols"].add(symbol)
+            return key
+    
+    def sentiments(self, keys):
+        """Sentimiento de cada clave que sigue en el índice"""
+        with self.lock:
+            return [self.articles[k]["sentiment"] for k in keys if k in self.articles]
+    
+    def prune(self, now=None):
+        """Saca los artículos fuera de la ventana (y los más viejos si hay demasiados)"""
+        cutoff = (now or time.time()) - self.window_seconds
+        
+        with self.lock:
+            expired = [k for k, a in self.articles.items() if a["datetime"] < cutoff]
+            
+            overflow = len(self.articles) - len(expired) - self.max_articles
+            if overflow > 0:
+                alive = sorted(
+                    (a["datetime"], k) for k, a in self.articles.items() if a["datetime"] >= cutoff
+                )
+                expired += [k for _, k in alive[:overflow]]
+            
+            for key in expired:
+                del self.articles[key]
+            self.aliases = {alias: key for alias, key in self.aliases.items() if key in self.articles}
+    
+    def __len__(self):
+        return len(self.articles)
+
+
+# Un solo índice por proceso
+_article_index = None
+_article_index_lock = threading.Lock()
+
+
+def get_article_index():
+    """Devuelve el índice de artículos del proceso, creándolo si hace falta"""
+    global _article_index
+    with _article_index_lock:
+        if _article_index is None:
+            _article_index = ArticleIndex()
+        return _article_index
+
+
+# Un solo scorer de noticias por proceso (su vocabulario se reutiliza entre refreshes)
+_news_scorer = None
+_news_scorer_lock = threading.Lock()
+
+
+def get_news_scorer():
+    """Devuelve el scorer de noticias configurado (SENTIMENT_SCORER)"""
+    global _news_scorer
+    with _news_scorer_lock:
+        if _news_scorer is None:
+            _news_scorer = create_scorer({**POSITIVE_WORDS, **NEGATIVE_WORDS})
+        return _news_scorer
+
 
 class NewsCollector:
     """
@@ -13,11 +192,16 @@ class NewsCollector:
     1. Buscar noticias sobre las acciones del NASDAQ
     2. Analizar si son positivas o negativas
     3. Devolver un puntaje de -100 a +100
+    
+    El análisis de texto lo hace un scorer intercambiable (ver scorers.py):
+    por defecto el de SENTIMENT_SCORER, o el que se pase en `scorer`
     """
     
-    def __init__(self):
+    def __init__(self, scorer=None):
         self.api_key = FINNHUB_API_KEY
         self.base_url = "https://finnhub.io/api/v1"
+        self.scheduler = get_scheduler()
+        self.scorer = scorer or get_news_scorer()
     
     def get_news(self, symbol, days=7):
         """
@@ -41,133 +225,139 @@ class NewsCollector:
         # Hacer la petición a la API
         url = f"{self.base_url}/company-news"
         params = {
-            "symbol": symbol,
+            "symbol": finnhub_symbol(symbol),
             "from": from_date,
             "to": to_date,
             "token": self.api_key
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.scheduler.get("finnhub", url, priority=PRIORITY_NORMAL, params=params)
             response.raise_for_status()
             news = response.json()
             return news
         except Exception as e:
-            print(f"Error obteniendo noticias de {symbol}: {e}")
+            log.warning("Error obteniendo noticias", symbol=symbol, error=str(e))
             return []
     
     def analyze_headline(self, headline):
         """
         Analiza el sentimiento de un titular de noticia
         
-        Este es un análisis SIMPLE basado en palabras clave.
-        Para producción, usaríamos un modelo de IA más avanzado.
+        Usa el scorer configurado: palabras clave (POSITIVE_WORDS y
+        NEGATIVE_WORDS) o el modelo local entrenado con train_scorer.py
         
         Retorna un número de -1 (muy negativo) a +1 (muy positivo)
         """
-        headline_lower = headline.lower()
-        
-        # Palabras positivas y su peso
-        positive_words = {
-            "surge": 0.8, "surges": 0.8, "soar": 0.8, "soars": 0.8,
-            "jump": 0.6, "jumps": 0.6, "gain": 0.5, "gains": 0.5,
-            "rise": 0.5, "rises": 0.5, "rally": 0.7, "rallies": 0.7,
-            "bull": 0.6, "bullish": 0.7, "boom": 0.7,
-            "record": 0.5, "high": 0.4, "growth": 0.5,
-            "beat": 0.6, "beats": 0.6, "exceed": 0.6, "exceeds": 0.6,
-            "upgrade": 0.7, "upgraded": 0.7, "buy": 0.5,
-            "profit": 0.5, "profits": 0.5, "revenue": 0.3,
-            "success": 0.6, "successful": 0.6, "win": 0.5, "wins": 0.5,
-            "positive": 0.5, "optimism": 0.6, "optimistic": 0.6,
-            "strong": 0.4, "strength": 0.4, "recover": 0.5, "recovery": 0.5,
-            "breakout": 0.6, "momentum": 0.4, "outperform": 0.6,
-        }
-        
-        # Palabras negativas y su peso
-        negative_words = {
-            "crash": -0.9, "crashes": -0.9, "plunge": -0.8, "plunges": -0.8,
-            "drop": -0.6, "drops": -0.6, "fall": -0.5, "falls": -0.5,
-            "decline": -0.5, "declines": -0.5, "sink": -0.6, "sinks": -0.6,
-            "bear": -0.6, "bearish": -0.7, "bust": -0.7,
-            "low": -0.4, "loss": -0.6, "losses": -0.6,
-            "miss": -0.6, "misses": -0.6, "missed": -0.6,
-            "downgrade": -0.7, "downgraded": -0.7, "sell": -0.5,
-            "fear": -0.6, "fears": -0.6, "concern": -0.4, "concerns": -0.4,
-            "risk": -0.4, "risks": -0.4, "warning": -0.5, "warn": -0.5,
-            "negative": -0.5, "pessimism": -0.6, "pessimistic": -0.6,
-            "weak": -0.4, "weakness": -0.4, "trouble": -0.5,
-            "crisis": -0.8, "recession": -0.7, "inflation": -0.4,
-            "layoff": -0.6, "layoffs": -0.6, "cut": -0.4, "cuts": -0.4,
-            "lawsuit": -0.5, "investigation": -0.5, "fraud": -0.8,
-        }
-        
-        score = 0
-        word_count = 0
-        
-        # Buscar palabras positivas
-        for word, weight in positive_words.items():
-            if word in headline_lower:
-                score += weight
-                word_count += 1
-        
-        # Buscar palabras negativas
-        for word, weight in negative_words.items():
-            if word in headline_lower:
-                score += weight  # weight ya es negativo
-                word_count += 1
-        
-        # Si no encontramos palabras clave, es neutral
-        if word_count == 0:
-            return 0
+        return self.scorer.score(headline)
+    
+    def analyze_articles(self, news_list):
+        """
+        Analiza muchas noticias de una vez (titular + resumen)
         
-        # Normalizar el score
-        normalized_score = max(-1, min(1, score / max(word_count, 1)))
-        return normalized_score
+        Mismo criterio que analyze_headline, pero en un solo lote.
+        Retorna un array con un score de -1 a +1 por noticia.
+        """
+        texts = [
+            f"{news.get('headline') or ''}\n{news.get('summary') or ''}"
+            for news in news_list
+        ]
+        return self.scorer.score_batch(texts)
     
-    def get_news_sentiment(self):
+    def get_news_sentiment(self, universe=DEFAULT_UNIVERSE):
         """
         Obtiene el sentimiento general de las noticias del NASDAQ
+        (o del universo que se pida, ver UNIVERSES en config.py)
         
         Retorna:
         - score: Número de -100 a +100
         - details: Diccionario con detalles por acción
         """
-        all_scores = []
-        details = {}
+        self.refresh()
+        return self.summarize(universe)
+    
+    def refresh(self):
+        """
+        Pide las noticias del shard que toca y las guarda en el store "news"
         
-        print("📰 Recolectando noticias...")
+        El shard sale de la unión de todos los universos: lo que se pide
+        aquí sirve para el score de cualquier universo (ver summarize)
+        """
+        log.info("📰 Recolectando noticias...")
         
-        for symbol in NASDAQ_STOCKS:
+        # Solo pedimos noticias del shard que toca en este refresh
+        store = get_result_store("news")
+        shard = get_shard_scheduler("news").next_shard()
+        index = get_article_index()
+        index.prune()
+        
+        # 1. Pedimos las noticias de todo el shard
+        fetched = {}
+        for symbol in shard:
             news_list = self.get_news(symbol)
-            
-            if not news_list:
-                continue
-            
-            symbol_scores = []
-            for news in news_list[:10]:  # Máximo 10 noticias por acción
-                headline = news.get("headline", "")
-                sentiment = self.analyze_headline(headline)
-                symbol_scores.append(sentiment)
-                all_scores.append(sentiment)
+            if news_list:
+                fetched[symbol] = news_list
+        
+        # 2. Analizamos en un solo lote los artículos que no estaban en el
+        #    índice (cada artículo una vez aunque aparezca en varias acciones)
+        new_articles = index.missing(
+            [news for news_list in fetched.values() for news in news_list]
+        )
+        scores = self.analyze_articles(new_articles)
+        sentiments = {
+            index.article_keys(news)[0]: float(score)
+            for news, score in zip(new_articles, scores)
+        }
+        
+        # 3. Atribuimos TODAS las noticias de cada acción
+        for symbol, news_list in fetched.items():
+            article_keys = list(dict.fromkeys(
+                index.add(news, symbol, sentiments) for news in news_list
+            ))
+            symbol_scores = index.sentiments(article_keys)
             
             if symbol_scores:
                 avg_score = sum(symbol_scores) / len(symbol_scores)
-                details[symbol] = {
+                store.update(symbol, {
                     "score": round(avg_score * 100, 2),
-                    "news_count": len(symbol_scores)
-                }
-                print(f"  {symbol}: {len(symbol_scores)} noticias, score: {avg_score*100:.1f}")
+                    "news_count": len(symbol_scores),
+                    "weight": len(symbol_scores),
+                    "articles": article_keys
+                })
+                log.debug("Noticias analizadas", symbol=symbol, articles=len(symbol_scores), score=round(avg_score * 100, 1))
+        
+        log.info("Artículos nuevos analizados en lote", articles=len(new_articles))
+        return {"symbols_fetched": len(fetched), "new_articles": len(new_articles)}
+    
+    def summarize(self, universe=DEFAULT_UNIVERSE, refreshed=None):
+        """
+        Score de noticias de un universo a partir del store (sin peticiones)
+        
+        - refreshed: lo que devolvió refresh (no hace falta: todo está en el store)
+        
+        El score general usa cada artículo UNA vez, aunque se haya
+        atribuido a varias acciones del universo
+        """
+        store = get_result_store("news")
+        index = get_article_index()
+        
+        aggregate = store.aggregate(get_universe(universe))
+        unique_keys = set()
+        for result in aggregate["details"].values():
+            unique_keys.update(result["articles"])
         
-        # Calcular score general
-        if all_scores:
-            final_score = (sum(all_scores) / len(all_scores)) * 100
-        else:
-            final_score = 0
+        unique_scores = index.sentiments(unique_keys)
+        final_score = sum(unique_scores) / len(unique_scores) * 100 if unique_scores else 0
         
         return {
             "score": round(final_score, 2),
-            "total_news": len(all_scores),
-            "details": details
+            "total_news": len(unique_scores),
+            "attributions": aggregate["total_weight"],
+            "details": {
+                symbol: {"score": r["score"], "news_count": r["news_count"]}
+                for symbol, r in aggregate["details"].items()
+            },
+            "coverage": aggregate["coverage"]
         }
 
 
@@ -0,0 +1,127 @@
+# ============================================
+# PROYECCIONES DE LA RESPUESTA (?fields= y ?compact=1)
+# ============================================
+# La respuesta completa de /api/sentiment incluye todo el árbol de
+# componentes (detalles por acción, notas...). Muchos clientes solo
+# necesitan el score y la interpretación.
+#
+# Aquí guardamos lo esencial de cada resultado en objetos compactos
+# (con __slots__) y preparamos cada proyección una sola vez por generación.
+
+# Campos que se pueden pedir con ?fields=
+# - scores: {componente: score} (versión compacta de components)
+# - components: el árbol completo de componentes
+# - stats: z-score y percentil frente al historial (ver score_stats.py)
+PROJECTABLE_FIELDS = (
+    "universe",
+    "final_score",
+    "interpretation",
+    "timestamp",
+    "scores",
+    "components",
+    "weights_used",
+    "stats",
+)
+
+# Lo que devuelve ?compact=1
+COMPACT_FIELDS = ("final_score", "interpretation", "timestamp", "scores")
+
+
+class ComponentScore:
+    """Score de un componente, sin detalles"""
+    
+    __slots__ = ("name", "score", "weight", "ok")
+    
+    def __init__(self, name, score, weight, ok):
+        self.name = name
+        self.score = score
+        self.weight = weight
+        self.ok = ok
+
+
+class SentimentView:
+    """
+    Lo esencial de un resultado, en forma compacta
+    
+    El resultado completo (con todos los detalles) se guarda aparte
+    y solo se usa si alguien pide "components"
+    """
+    
+    __slots__ = ("universe", "final_score", "interpretation", "timestamp", "components", "weights_used", "stats", "result")
+    
+    def __init__(self, result):
+        self.universe = result.get("universe")
+        self.final_score = result.get("final_score")
+        self.interpretation = result.get("interpretation")
+        self.timestamp = result.get("timestamp")
+        self.weights_used = result.get("weights_used")
+        self.stats = result.get("stats")
+        self.components = tuple(
+            ComponentScore(name, data.get("score", 0), data.get("weight", 0), "error" not in data)
+            for name, data in result.get("components", {}).items()
+        )
+        self.result = result
+    
+    def project(self, fields):
+        """Devuelve un diccionario solo con los campos pedidos"""
+        data = {}
+        for field in fields:
+            if field == "scores":
+                data["scores"] = {c.name: c.score for c in self.components}
+            elif field == "components":
+                data["components"] = self.result.get("components", {})
+            else:
+                data[field] = getattr(self, field)
+        return data
+
+
+def parse_fields(fields_param, compact=False):
+    """
+    Convierte ?fields=a,b,c en una tupla ordenada y sin repetidos
+    
+    Retorna (fields, invalid):
+    - fields: None si hay que devolver la respuesta completa
+    - invalid: lista de campos que no existen
+    """
+    if compact:
+        return COMPACT_FIELDS, []
+    
+    if not fields_param:
+        return None, []
+    
+    requested = [f.strip() for f in fields_param.split(",") if f.strip()]
+    invalid = [f for f in requested if f not in PROJECTABLE_FIELDS]
+    fields = tuple(f for f in PROJECTABLE_FIELDS if f in requested)
+    
+    return fields, invalid
+
+
+class ProjectionCache:
+    """
+    Guarda el JSON ya serializado de cada proyección de la generación actual
+    
+    La clave es la tupla de campos (None = respuesta completa). Como los
+    campos válidos son pocos, el número de proyecciones está acotado.
+    """
+    
+    def __init__(self):
+        self.generation = None
+        self.view = None
+        self.payloads = {}
+    
+    def get(self, generation, result, fields, build):
+        """
+        Devuelve el JSON de una proyección, construyéndolo la primera vez
+        
+        - build(view, fields): función que arma el cuerpo de la respuesta
+        """
+        if self.generation != generation:
+            self.generation = generation
+            self.view = SentimentView(result)
+            self.payloads = {}
+        
+        payload = self.payloads.get(fields)
+        if payload is None:
+            payload = build(self.view, fields)
+            self.payloads[fields] = payload
+        return payload
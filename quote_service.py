@@ -0,0 +1,128 @@
+# ============================================
+# SERVICIO DE COTIZACIONES EN LOTE
+# ============================================
+# Este módulo obtiene el último precio de muchas acciones
+# con una sola petición a Yahoo Finance (endpoint "spark")
+# y lo guarda un rato para que todos los recolectores lo compartan
+
+import threading
+import time
+from config import QUOTE_CACHE_SECONDS, QUOTE_BATCH_SIZE
+from request_scheduler import get_scheduler, PRIORITY_CRITICAL
+from log import get_logger
+
+log = get_logger("quotes")
+
+class QuoteService:
+    """
+    Esta clase:
+    1. Pide los precios de hasta QUOTE_BATCH_SIZE símbolos por petición
+    2. Guarda cada precio durante QUOTE_CACHE_SECONDS segundos
+    3. Solo vuelve a pedir los símbolos que no tiene o que caducaron
+    """
+    
+    def __init__(self, ttl_seconds=QUOTE_CACHE_SECONDS, batch_size=QUOTE_BATCH_SIZE):
+        self.base_url = "https://query1.finance.yahoo.com/v7/finance/spark"
+        self.ttl_seconds = ttl_seconds
+        self.batch_size = batch_size
+        self.scheduler = get_scheduler()
+        
+        # symbol -> {"price", "previous_close", "market_time", "fetched_at"}
+        self.quotes = {}
+        self.lock = threading.Lock()
+    
+    def _fetch_batch(self, symbols):
+        """
+        Pide el último precio de un grupo de símbolos en una sola petición
+        """
+        params = {
+            "symbols": ",".join(symbols),
+            "range": "1d",
+            "interval": "1d"
+        }
+        headers = {"User-Agent": "Mozilla/5.0"}
+        
+        try:
+            # Las cotizaciones incluyen VIX y QQQ: van antes que todo lo demás
+            response = self.scheduler.get(
+                "yahoo", self.base_url, priority=PRIORITY_CRITICAL, params=params, headers=headers
+            )
+            response.raise_for_status()
+            results = response.json().get("spark", {}).get("result", []) or []
+        except Exception as e:
+            log.warning("Error obteniendo cotizaciones", symbols=",".join(symbols), error=str(e))
+            return {}
+        
+        now = time.time()
+        quotes = {}
+        for item in results:
+            symbol = item.get("symbol")
+            responses = item.get("response") or [{}]
+            meta = responses[0].get("meta", {})
+            price = meta.get("regularMarketPrice")
+            
+            if symbol and price:
+                quotes[symbol] = {
+                    "price": price,
+                    "previous_close": meta.get("chartPreviousClose") or meta.get("previousClose"),
+                    "market_time": meta.get("regularMarketTime"),
+                    "fetched_at": now
+                }
+        
+        return quotes
+    
+    def get_quotes(self, symbols):
+        """
+        Devuelve {symbol: quote} para los símbolos pedidos
+        
+        Los símbolos sin precio (error o símbolo inválido) no aparecen
+        """
+        now = time.time()
+        
+        with self.lock:
+            missing = [
+                s for s in dict.fromkeys(symbols)
+                if s not in self.quotes or now - self.quotes[s]["fetched_at"] > self.ttl_seconds
+            ]
+        
+        for i in range(0, len(missing), self.batch_size):
+            fetched = self._fetch_batch(missing[i:i + self.batch_size])
+            with self.lock:
+                self.quotes.update(fetched)
+        
+        with self.lock:
+            return {s: self.quotes[s] for s in symbols if s in self.quotes}
+    
+    def get_price(self, symbol):
+        """Devuelve el último precio de un símbolo (o None)"""
+        quote = self.get_quotes([symbol]).get(symbol)
+        return quote["price"] if quote else None
+
+
+# Un solo servicio por proceso, compartido por todos los recolectores
+_quote_service = None
+_quote_service_lock = threading.Lock()
+
+
+def get_quote_service():
+    """Devuelve el servicio compartido del proceso, creándolo si hace falta"""
+    global _quote_service
+    with _quote_service_lock:
+        if _quote_service is None:
+            _quote_service = QuoteService()
+        return _quote_service
+
+
+# ============================================
+# PRUEBA DEL MÓDULO
+# ============================================
+if __name__ == "__main__":
+    from config import NASDAQ_STOCKS, NASDAQ_INDEX
+    
+    service = QuoteService()
+    quotes = service.get_quotes(NASDAQ_STOCKS + [NASDAQ_INDEX, "^VIX"])
+    
+    print("\n" + "="*50)
+    for symbol, quote in quotes.items():
+        print(f"💵 {symbol:6} {quote['price']:10.2f}")
+    print("="*50)
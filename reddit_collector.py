@@ -4,8 +4,76 @@
 # Este módulo busca posts en Reddit sobre el NASDAQ
 # y analiza si el sentimiento es positivo o negativo
 
+import heapq
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+
 import requests
-from config import REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT, NASDAQ_STOCKS
+from config import (
+    REDDIT_CLIENT_ID, REDDIT_CLIENT_SECRET, REDDIT_USER_AGENT,
+    REDDIT_STREAM_ENABLED, REDDIT_STREAM_POLL_SECONDS, REDDIT_STREAM_WINDOW_HOURS,
+    DEFAULT_UNIVERSE
+)
+from request_scheduler import get_scheduler, PRIORITY_CRITICAL, PRIORITY_NORMAL
+from scorers import create_scorer
+from universe import get_universes, get_shard_scheduler, get_result_store, normalize_symbol
+from log import get_logger
+
+log = get_logger("reddit")
+
+
+# ============================================
+# LÉXICO DE REDDIT
+# ============================================
+# Términos positivos (incluye jerga de Reddit/WSB)
+POSITIVE_TERMS = {
+    # Jerga de Reddit
+    "moon": 0.8, "mooning": 0.9, "to the moon": 0.9,
+    "tendies": 0.7, "diamond hands": 0.8, "💎": 0.8,
+    "rocket": 0.7, "🚀": 0.8, "calls": 0.4,
+    "bull": 0.6, "bullish": 0.7, "long": 0.5,
+    "buy": 0.5, "buying": 0.5, "bought": 0.4,
+    "gain": 0.6, "gains": 0.6, "profit": 0.6,
+    "green": 0.5, "up": 0.3, "rally": 0.6,
+    "breakout": 0.6, "squeeze": 0.7, "yolo": 0.5,
+    # Términos financieros positivos
+    "upgrade": 0.7, "beat": 0.6, "growth": 0.5,
+    "strong": 0.4, "earnings beat": 0.7,
+}
+
+# Términos negativos
+NEGATIVE_TERMS = {
+    # Jerga de Reddit
+    "bag holder": -0.7, "bagholding": -0.7,
+    "paper hands": -0.6, "puts": -0.4,
+    "bear": -0.6, "bearish": -0.7, "short": -0.5,
+    "sell": -0.4, "selling": -0.4, "sold": -0.3,
+    "loss": -0.6, "losses": -0.6, "down": -0.3,
+    "red": -0.5, "crash": -0.8, "dump": -0.7,
+    "rip": -0.5, "rug pull": -0.9,
+    # Términos financieros negativos
+    "downgrade": -0.7, "miss": -0.6, "missed": -0.6,
+    "weak": -0.4, "decline": -0.5, "fall": -0.5,
+    "fear": -0.5, "worried": -0.4, "concern": -0.4,
+}
+
+
+# Un solo scorer de Reddit por proceso
+_reddit_scorer = None
+_reddit_scorer_lock = threading.Lock()
+
+
+def get_reddit_scorer():
+    """Devuelve el scorer de Reddit configurado (SENTIMENT_SCORER)"""
+    global _reddit_scorer
+    with _reddit_scorer_lock:
+        if _reddit_scorer is None:
+            _reddit_scorer = create_scorer({**POSITIVE_TERMS, **NEGATIVE_TERMS})
+        return _reddit_scorer
+
 
 class RedditCollector:
     """
@@ -14,13 +82,21 @@ class RedditCollector:
     2. Buscar posts sobre acciones del NASDAQ
     3. Analizar el sentimiento de los posts
     4. Devolver un puntaje de -100 a +100
+    
+    El análisis de texto lo hace un scorer intercambiable (ver scorers.py):
+    por defecto el de SENTIMENT_SCORER, o el que se pase en `scorer`
     """
     
-    def __init__(self):
+    def __init__(self, scorer=None):
         self.client_id = REDDIT_CLIENT_ID
         self.client_secret = REDDIT_CLIENT_SECRET
         self.user_agent = REDDIT_USER_AGENT
         self.access_token = None
+        # La búsqueda del shard y las del mercado corren en paralelo:
+        # que solo una pida el token
+        self.auth_lock = threading.Lock()
+        self.scheduler = get_scheduler()
+        self.scorer = scorer or get_reddit_scorer()
         
         # Subreddits relacionados con trading/acciones
         self.subreddits = [
@@ -44,8 +120,10 @@ class RedditCollector:
         headers = {"User-Agent": self.user_agent}
         
         try:
-            response = requests.post(
+            response = self.scheduler.post(
+                "reddit",
                 "https://www.reddit.com/api/v1/access_token",
+                priority=PRIORITY_CRITICAL,
                 auth=auth,
                 data=data,
                 headers=headers
@@ -54,7 +132,7 @@ class RedditCollector:
             self.access_token = response.json().get("access_token")
             return True
         except Exception as e:
-            print(f"Error autenticando con Reddit: {e}")
+            log.error("Error autenticando con Reddit", error=str(e))
             return False
     
     def search_posts(self, query, subreddit="all", limit=25):
@@ -66,8 +144,8 @@ class RedditCollector:
         - subreddit: En qué subreddit buscar
         - limit: Cuántos posts traer
         """
-        if not self.access_token:
-            if not self.authenticate():
+        with self.auth_lock:
+            if not self.access_token and not self.authenticate():
                 return []
         
         headers = {
@@ -84,13 +162,16 @@ class RedditCollector:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.scheduler.get(
+                "reddit", url, priority=PRIORITY_NORMAL, endpoint="oauth.reddit.com/r/search",
+                headers=headers, params=params
+            )
             response.raise_for_status()
             data = response.json()
             posts = data.get("data", {}).get("children", [])
             return [post["data"] for post in posts]
         except Exception as e:
-            print(f"Error buscando en Reddit: {e}")
+            log.warning("Error buscando en Reddit", query=query, error=str(e))
             return []
     
     def analyze_post(self, post):
@@ -102,13 +183,20 @@ class RedditCollector:
         - Upvotes vs Downvotes
         - Número de comentarios (engagement)
         """
-        title = post.get("title", "").lower()
+        return self.analyze_posts([post])[0]
+    
+    def analyze_posts(self, posts):
+        """
+        Analiza varios posts de una vez (los títulos van en un solo lote
+        al scorer) y devuelve una lista con un score de -1 a +1 por post
+        """
+        sentiments = self.scorer.score_batch([post.get("title", "") for post in posts])
+        return [self._adjust_for_votes(post, sentiment) for post, sentiment in zip(posts, sentiments)]
+    
+    def _adjust_for_votes(self, post, sentiment):
+        """Ajusta el sentimiento del título por la popularidad del post"""
         score = post.get("score", 0)  # Upvotes - Downvotes
         upvote_ratio = post.get("upvote_ratio", 0.5)
-        num_comments = post.get("num_comments", 0)
-        
-        # Analizar el título (similar al análisis de noticias)
-        sentiment = self.analyze_text(title)
         
         # Ajustar por popularidad del post
         # Posts muy upvoteados tienen más influencia
@@ -125,122 +213,407 @@ class RedditCollector:
         # Si tiene muchos downvotes, el sentimiento es más mixto
         ratio_adjustment = (upvote_ratio - 0.5) * 0.5
         
-        final_sentiment = sentiment * popularity_multiplier + ratio_adjustment
+        final_sentiment = float(sentiment) * popularity_multiplier + ratio_adjustment
         
         # Normalizar a -1 a +1
         return max(-1, min(1, final_sentiment))
     
     def analyze_text(self, text):
         """
-        Análisis de sentimiento básico para texto de Reddit
-        
-        Reddit tiene su propio vocabulario, así que incluimos
-        términos específicos de la comunidad
-        """
-        text_lower = text.lower()
-        
-        # Términos positivos (incluye jerga de Reddit/WSB)
-        positive_terms = {
-            # Jerga de Reddit
-            "moon": 0.8, "mooning": 0.9, "to the moon": 0.9,
-            "tendies": 0.7, "diamond hands": 0.8, "💎": 0.8,
-            "rocket": 0.7, "🚀": 0.8, "calls": 0.4,
-            "bull": 0.6, "bullish": 0.7, "long": 0.5,
-            "buy": 0.5, "buying": 0.5, "bought": 0.4,
-            "gain": 0.6, "gains": 0.6, "profit": 0.6,
-            "green": 0.5, "up": 0.3, "rally": 0.6,
-            "breakout": 0.6, "squeeze": 0.7, "yolo": 0.5,
-            # Términos financieros positivos
-            "upgrade": 0.7, "beat": 0.6, "growth": 0.5,
-            "strong": 0.4, "earnings beat": 0.7,
-        }
-        
-        # Términos negativos
-        negative_terms = {
-            # Jerga de Reddit
-            "bag holder": -0.7, "bagholding": -0.7,
-            "paper hands": -0.6, "puts": -0.4,
-            "bear": -0.6, "bearish": -0.7, "short": -0.5,
-            "sell": -0.4, "selling": -0.4, "sold": -0.3,
-            "loss": -0.6, "losses": -0.6, "down": -0.3,
-            "red": -0.5, "crash": -0.8, "dump": -0.7,
-            "rip": -0.5, "rug pull": -0.9,
-            # Términos financieros negativos
-            "downgrade": -0.7, "miss": -0.6, "missed": -0.6,
-            "weak": -0.4, "decline": -0.5, "fall": -0.5,
-            "fear": -0.5, "worried": -0.4, "concern": -0.4,
-        }
-        
-        score = 0
-        matches = 0
-        
-        for term, weight in positive_terms.items():
-            if term in text_lower:
-                score += weight
-                matches += 1
-        
-        for term, weight in negative_terms.items():
-            if term in text_lower:
-                score += weight
-                matches += 1
+        Análisis de sentimiento para texto de Reddit
         
-        if matches == 0:
-            return 0
-        
-        return score / matches
+        Reddit tiene su propio vocabulario: con palabras clave se usan
+        POSITIVE_TERMS y NEGATIVE_TERMS (incluyen jerga de la comunidad)
+        """
+        return self.scorer.score(text)
     
-    def get_social_sentiment(self):
+    def get_social_sentiment(self, universe=DEFAULT_UNIVERSE):
         """
         Obtiene el sentimiento general de Reddit sobre el NASDAQ
+        (o del universo que se pida, ver UNIVERSES en config.py)
+        
+        Si el modo streaming está activo, solo lee el agregado que
+        mantiene el hilo de background (no hace búsquedas)
         
         Retorna:
         - score: Número de -100 a +100
         - details: Información adicional
         """
-        all_scores = []
-        details = {}
+        self.refresh_shard()
+        market_scores = self.search_market(get_universes()[universe]["query"])
+        return self.summarize(universe, market_scores)
+    
+    def refresh_shard(self):
+        """
+        Busca posts de las acciones del shard que toca y guarda su score
+        en el store "social"
         
-        print("💬 Recolectando sentimiento de Reddit...")
+        En modo streaming solo se asegura de que el hilo esté corriendo
         
-        # Buscar posts sobre cada acción
-        for symbol in NASDAQ_STOCKS[:5]:  # Limitamos a 5 para no exceder rate limits
-            symbol_scores = []
-            
+        Retorna cuántas acciones se actualizaron
+        """
+        if REDDIT_STREAM_ENABLED:
+            get_reddit_stream().start()
+            return 0
+        
+        log.info("💬 Recolectando sentimiento de Reddit...")
+        
+        # Buscar posts solo de las acciones del shard que toca
+        # (el tamaño del shard respeta los rate limits)
+        store = get_result_store("social")
+        shard = get_shard_scheduler("social").next_shard()
+        updated = 0
+        
+        for symbol in shard:
+            posts = []
             for subreddit in self.subreddits[:2]:  # Limitamos subreddits
-                posts = self.search_posts(symbol, subreddit, limit=10)
-                
-                for post in posts:
-                    sentiment = self.analyze_post(post)
-                    symbol_scores.append(sentiment)
-                    all_scores.append(sentiment)
+                posts += self.search_posts(symbol, subreddit, limit=10)
+            
+            symbol_scores = self.analyze_posts(posts)
             
             if symbol_scores:
                 avg_score = sum(symbol_scores) / len(symbol_scores)
-                details[symbol] = {
+                store.update(symbol, {
                     "score": round(avg_score * 100, 2),
-                    "posts_analyzed": len(symbol_scores)
-                }
-                print(f"  {symbol}: {len(symbol_scores)} posts, score: {avg_score*100:.1f}")
+                    "posts_analyzed": len(symbol_scores),
+                    "weight": len(symbol_scores)
+                })
+                updated += 1
+                log.debug("Posts analizados", symbol=symbol, posts=len(symbol_scores), score=round(avg_score * 100, 1))
+        
+        return updated
+    
+    def search_market(self, query):
+        """
+        Busca el mercado en general ("NASDAQ", "S&P 500", ...) en
+        wallstreetbets y devuelve el score (-100 a +100) de cada post
         
-        # También buscar "NASDAQ" en general
-        nasdaq_posts = self.search_posts("NASDAQ", "wallstreetbets", limit=20)
-        for post in nasdaq_posts:
-            sentiment = self.analyze_post(post)
-            all_scores.append(sentiment)
+        En modo streaming no busca nada (el stream ya sigue el mercado)
+        """
+        if REDDIT_STREAM_ENABLED:
+            return []
         
-        # Calcular score final
-        if all_scores:
-            final_score = (sum(all_scores) / len(all_scores)) * 100
-        else:
-            final_score = 0
+        posts = self.search_posts(query, "wallstreetbets", limit=20)
+        return [score * 100 for score in self.analyze_posts(posts)]
+    
+    def summarize(self, universe=DEFAULT_UNIVERSE, market_scores=None):
+        """
+        Score social de un universo (sin peticiones)
+        
+        - market_scores: lo que devolvió search_market para la búsqueda del universo
+        """
+        if REDDIT_STREAM_ENABLED:
+            return get_reddit_stream().get_sentiment(universe)
+        
+        definition = get_universes()[universe]
+        store = get_result_store("social")
+        market_scores = market_scores or []
+        
+        # Calcular score final (acciones frescas del universo + posts generales)
+        aggregate = store.aggregate(definition["symbols"])
+        total = (aggregate["score"] or 0) * aggregate["total_weight"] + sum(market_scores)
+        total_posts = aggregate["total_weight"] + len(market_scores)
+        final_score = total / total_posts if total_posts else 0
         
         return {
             "score": round(final_score, 2),
-            "total_posts": len(all_scores),
-            "details": details
+            "total_posts": total_posts,
+            "details": {
+                symbol: {"score": r["score"], "posts_analyzed": r["posts_analyzed"]}
+                for symbol, r in aggregate["details"].items()
+            },
+            "coverage": aggregate["coverage"]
         }
 
 
+# ============================================
+# MODO STREAMING (POLLING CON CURSOR)
+# ============================================
+class RedditStream:
+    """
+    Sigue el listado /new de cada subreddit en un hilo de background.
+    
+    En vez de buscar cada acción cada 15 minutos:
+    1. Pide solo los posts más nuevos que el último visto (cursor "before")
+    2. Analiza cada post una sola vez
+    3. Guarda el sentimiento en una ventana de tiempo por acción
+    4. Mantiene sumas acumuladas para que leer el score sea O(1)
+    """
+    
+    # Cuántos ids de posts recordamos para no analizarlos dos veces
+    MAX_SEEN_IDS = 5000
+    
+    # Palabras en mayúsculas que también son tickers cortos (ON, IT, NOW...):
+    # sin "$" delante no cuentan como mención de la acción
+    TICKER_STOPWORDS = frozenset(
+        list("ABCDEFGHIJKLMNOPQRSTUVWXYZ") + [
+            "AI", "ALL", "AM", "AN", "ANY", "ARE", "AT", "ATH", "BE", "BIG", "BY",
+            "CAN", "CAT", "CEO", "CPI", "DD", "DE", "DIS", "DO", "EA", "EPS", "ETF",
+            "EV", "FDA", "FED", "FOR", "GDP", "GO", "HAS", "HE", "IF", "IMO", "IN",
+            "IPO", "IS", "IT", "LOW", "MA", "ME", "MET", "MO", "MS", "MY", "NEW",
+            "NO", "NOW", "OF", "OK", "ON", "ONE", "OR", "OUT", "PM", "SEC", "SO",
+            "THE", "TO", "UP", "US", "USA", "USD", "WAS", "WE", "WHO", "WHY", "YOU"
+        ]
+    )
+    
+    # Si un cursor devuelve vacío tantas veces seguidas, lo reiniciamos
+    # (pasa cuando el post del cursor se borra)
+    MAX_EMPTY_POLLS = 5
+    
+    def __init__(self, collector=None, universes=None,
+                 poll_seconds=REDDIT_STREAM_POLL_SECONDS,
+                 window_hours=REDDIT_STREAM_WINDOW_HOURS):
+        self.collector = collector or RedditCollector()
+        self.poll_seconds = poll_seconds
+        self.window_seconds = window_hours * 3600
+        
+        # Acciones de cada universo y la unión de todas
+        universes = universes or get_universes()
+        self.universe_symbols = {name: set(u["symbols"]) for name, u in universes.items()}
+        self.symbols = set().union(*self.universe_symbols.values())
+        
+        # "$AAPL" o "AAPL" como palabra completa, con clase opcional ("BRK.B");
+        # un punto sin letra de clase detrás es el fin de la oración ("NVDA.")
+        # La búsqueda general o el ETF del universo (ej: "NASDAQ"/"QQQ")
+        # cuenta como mercado general
+        # Sacamos los candidatos a ticker del título y los buscamos en el set
+        # (así el costo no depende del tamaño del universo)
+        self.ticker_pattern = re.compile(r"(?<![A-Za-z0-9])(\$?)([A-Z][A-Z0-9]{0,5}(?:\.[A-Z])?)(?![A-Za-z0-9])")
+        self.market_patterns = {
+            name: re.compile(
+                r"(?<!\w)(" + "|".join(re.escape(term) for term in (u["query"], u["index"])) + r")(?!\w)",
+                re.IGNORECASE
+            )
+            for name, u in universes.items()
+        }
+        
+        # Cursor por subreddit (fullname del post más nuevo visto, ej: "t3_abc123")
+        self.cursors = {}
+        self.empty_polls = {}
+        self.seen_ids = OrderedDict()
+        
+        # Ventana: heap de (created_utc, orden, símbolos, universos, sentiment)
+        # Los posts llegan mezclados entre subreddits (no en orden de
+        # created_utc): el heap deja siempre el más viejo primero
+        self.window = []
+        self.window_order = itertools.count()
+        self.symbol_totals = {}     # symbol -> [suma, cantidad]
+        self.universe_totals = {}   # universo -> [suma, cantidad]
+        
+        self.lock = threading.Lock()
+        self.start_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_poll = None
+    
+    def start(self):
+        """
+        Arranca el hilo de polling (si no está corriendo ya)
+        
+        La primera pasada se hace aquí mismo para que la primera
+        lectura no devuelva una ventana vacía
+        """
+        with self.start_lock:
+            if self.thread and self.thread.is_alive():
+                return
+            
+            self.poll_once()
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+    
+    def stop(self):
+        """Detiene el hilo de polling"""
+        self.stop_event.set()
+    
+    def _run(self):
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self.poll_once()
+            except Exception as e:
+                log.error("Error en el stream de Reddit", error=str(e))
+    
+    def fetch_new(self, subreddit, limit=100):
+        """
+        Pide los posts más nuevos que el cursor de este subreddit
+        
+        Reddit devuelve el listado del más nuevo al más viejo
+        """
+        if not self.collector.access_token:
+            if not self.collector.authenticate():
+                return []
+        
+        headers = {
+            "Authorization": f"Bearer {self.collector.access_token}",
+            "User-Agent": self.collector.user_agent
+        }
+        
+        params = {"limit": limit}
+        cursor = self.cursors.get(subreddit)
+        if cursor:
+            params["before"] = cursor
+        
+        try:
+            response = self.collector.scheduler.get(
+                "reddit",
+                f"https://oauth.reddit.com/r/{subreddit}/new",
+                priority=PRIORITY_NORMAL,
+                endpoint="oauth.reddit.com/r/new",
+                headers=headers,
+                params=params
+            )
+            if response.status_code == 401:
+                # El token expiró: lo pediremos de nuevo en la próxima pasada
+                self.collector.access_token = None
+                return []
+            response.raise_for_status()
+            posts = response.json().get("data", {}).get("children", [])
+            return [post["data"] for post in posts]
+        except Exception as e:
+            log.warning("Error leyendo /new", subreddit=subreddit, error=str(e))
+            return []
+    
+    def poll_once(self):
+        """
+        Una pasada por todos los subreddits: analiza solo posts no vistos
+        """
+        for subreddit in self.collector.subreddits:
+            posts = self.fetch_new(subreddit)
+            
+            if not posts:
+                self.empty_polls[subreddit] = self.empty_polls.get(subreddit, 0) + 1
+                if self.empty_polls[subreddit] >= self.MAX_EMPTY_POLLS:
+                    self.cursors.pop(subreddit, None)
+                    self.empty_polls[subreddit] = 0
+                continue
+            
+            self.empty_polls[subreddit] = 0
+            # El primero del listado es el más nuevo
+            self.cursors[subreddit] = posts[0].get("name") or self.cursors.get(subreddit)
+            
+            self._ingest(list(reversed(posts)))
+        
+        self.last_poll = time.time()
+        with self.lock:
+            self._expire(time.time())
+    
+    def _ingest(self, posts):
+        """
+        Analiza los posts que no hemos visto y los mete en la ventana
+        
+        Los títulos de todos los posts nuevos van en un solo lote al scorer
+        """
+        now = time.time()
+        candidates = []
+        
+        for post in posts:
+            post_id = post.get("name") or post.get("id")
+            if not post_id or post_id in self.seen_ids:
+                continue
+            
+            self.seen_ids[post_id] = True
+            if len(self.seen_ids) > self.MAX_SEEN_IDS:
+                self.seen_ids.popitem(last=False)
+            
+            created = post.get("created_utc") or now
+            if created < now - self.window_seconds:
+                continue
+            
+            title = post.get("title", "")
+            symbols = [s for s in dict.fromkeys(self._tickers(title)) if s in self.symbols]
+            # Cuenta para un universo si menciona una de sus acciones o el mercado
+            universes = [
+                name for name, universe_symbols in self.universe_symbols.items()
+                if any(s in universe_symbols for s in symbols) or self.market_patterns[name].search(title)
+            ]
+            if not universes:
+                continue  # No habla de nada que sigamos
+            
+            candidates.append((post, created, symbols, universes))
+        
+        if not candidates:
+            return
+        
+        sentiments = self.collector.analyze_posts([candidate[0] for candidate in candidates])
+        
+        with self.lock:
+            for (post, created, symbols, universes), sentiment in zip(candidates, sentiments):
+                heapq.heappush(self.window, (created, next(self.window_order), symbols, universes, sentiment))
+                for names, totals_by_name in ((symbols, self.symbol_totals), (universes, self.universe_totals)):
+                    for name in names:
+                        totals = totals_by_name.setdefault(name, [0.0, 0])
+                        totals[0] += sentiment
+                        totals[1] += 1
+    
+    def _tickers(self, title):
+        """
+        Candidatos a ticker de un título, en el formato del universo
+        
+        Los de 1 a 3 letras que son palabras comunes (TICKER_STOPWORDS)
+        solo cuentan con "$" delante ("$ON" sí, "ON" no)
+        """
+        for dollar, ticker in self.ticker_pattern.findall(title):
+            if not dollar and len(ticker) <= 3 and ticker in self.TICKER_STOPWORDS:
+                continue
+            yield normalize_symbol(ticker)
+    
+    def _expire(self, now):
+        """Saca de la ventana los posts más viejos que window_seconds"""
+        cutoff = now - self.window_seconds
+        while self.window and self.window[0][0] < cutoff:
+            _, _, symbols, universes, sentiment = heapq.heappop(self.window)
+            for names, totals_by_name in ((symbols, self.symbol_totals), (universes, self.universe_totals)):
+                for name in names:
+                    totals = totals_by_name[name]
+                    totals[0] -= sentiment
+                    totals[1] -= 1
+                    if totals[1] == 0:
+                        del totals_by_name[name]
+    
+    def get_sentiment(self, universe=DEFAULT_UNIVERSE):
+        """
+        Lee el agregado actual de un universo (mismo formato que get_social_sentiment)
+        """
+        self.start()
+        universe_symbols = self.universe_symbols[universe]
+        
+        with self.lock:
+            self._expire(time.time())
+            
+            total_sum, total_count = self.universe_totals.get(universe, (0.0, 0))
+            final_score = (total_sum / total_count) * 100 if total_count else 0
+            details = {
+                symbol: {
+                    "score": round(total / count * 100, 2),
+                    "posts_analyzed": count
+                }
+                for symbol, (total, count) in self.symbol_totals.items()
+                if symbol in universe_symbols
+            }
+            
+            return {
+                "score": round(final_score, 2),
+                "total_posts": total_count,
+                "details": details,
+                "mode": "stream",
+                "window_hours": self.window_seconds / 3600
+            }
+
+
+# Un solo stream por proceso (el servidor crea collectors nuevos en cada refresh)
+_stream = None
+_stream_lock = threading.Lock()
+
+
+def get_reddit_stream():
+    """Devuelve el stream compartido del proceso, creándolo si hace falta"""
+    global _stream
+    with _stream_lock:
+        if _stream is None:
+            _stream = RedditStream()
+        return _stream
+
+
 # ============================================
 # PRUEBA DEL MÓDULO
 # ============================================
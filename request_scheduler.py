@@ -0,0 +1,246 @@
+# ============================================
+# PLANIFICADOR GLOBAL DE PETICIONES
+# ============================================
+# Todas las peticiones a Finnhub, Yahoo y Reddit pasan por aquí.
+# Cada proveedor tiene:
+# - Un "token bucket" con su límite de peticiones por minuto
+# - Una cola de prioridad: lo urgente (VIX, QQQ) sale antes que lo masivo
+#   (analistas)
+# - Una pausa automática cuando el proveedor responde 429 con Retry-After
+# - Un circuit breaker por endpoint (ver circuit_breaker.py)
+# - Un cache HTTP en disco para las respuestas GET (ver http_cache.py)
+
+import heapq
+import itertools
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+from config import PROVIDER_LIMITS, MAX_RETRY_AFTER_SECONDS, MAX_RETRIES, REQUEST_TIMEOUT_SECONDS
+from circuit_breaker import get_breaker, CircuitOpenError
+from http_cache import get_http_cache
+from log import get_logger
+
+log = get_logger("scheduler")
+
+# Prioridades (número más bajo = sale antes)
+PRIORITY_CRITICAL = 0   # VIX, QQQ, cotizaciones
+PRIORITY_NORMAL = 5     # Noticias, Reddit
+PRIORITY_BULK = 10      # Analistas y otros datos que cambian poco
+
+
+class ProviderQueue:
+    """
+    Token bucket + cola de prioridad de un proveedor
+    
+    Un hilo que quiere hacer una petición se pone en la cola y espera
+    a que sea el primero Y haya un token disponible
+    """
+    
+    def __init__(self, name, per_minute, burst):
+        self.name = name
+        self.rate = per_minute / 60.0      # tokens por segundo
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0           # por Retry-After
+        
+        self.waiting = []                 # heap de (prioridad, orden)
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        
+        # Estadísticas para /api/health
+        self.sent = 0
+        self.throttled = 0
+    
+    def _refill(self, now):
+        elapsed = now - self.last_refill
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.last_refill = now
+    
+    def acquire(self, priority):
+        """Bloquea hasta que esta petición tenga turno y token"""
+        with self.condition:
+            ticket = (priority, next(self.counter))
+            heapq.heappush(self.waiting, ticket)
+            
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                
+                if self.waiting[0] == ticket and self.tokens >= 1 and now >= self.paused_until:
+                    heapq.heappop(self.waiting)
+                    self.tokens -= 1
+                    self.sent += 1
+                    # Despertar al siguiente de la cola
+                    self.condition.notify_all()
+                    return
+                
+                # Esperar lo que falte para el próximo token o el fin de la pausa
+                wait = max((1 - self.tokens) / self.rate, self.paused_until - now, 0.01)
+                self.condition.wait(timeout=wait)
+    
+    def pause(self, seconds):
+        """Pausa el proveedor (el upstream pidió que esperemos)"""
+        with self.condition:
+            self.throttled += 1
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0
+            self.condition.notify_all()
+    
+    def status(self):
+        with self.condition:
+            now = time.monotonic()
+            self._refill(now)
+            return {
+                "tokens": round(self.tokens, 2),
+                "queued": len(self.waiting),
+                "paused_seconds": round(max(0, self.paused_until - now), 1),
+                "sent": self.sent,
+                "throttled": self.throttled
+            }
+
+
+def parse_retry_after(value):
+    """
+    Convierte un header Retry-After en segundos
+    
+    Puede venir como número ("120") o como fecha HTTP
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def endpoint_name(url):
+    """Nombre del endpoint para su circuit breaker: host + ruta (sin parámetros)"""
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}"
+
+
+class RequestScheduler:
+    """
+    Esta clase:
+    1. Encola cada petición en la cola de su proveedor según su prioridad
+    2. La envía cuando hay token disponible
+    3. Si el proveedor responde 429/503 con Retry-After, pausa toda la cola
+       de ese proveedor y reintenta la petición
+    4. Reusa las respuestas GET guardadas en el cache HTTP mientras estén
+       frescas, y si no lo están pregunta si cambiaron (304)
+    """
+    
+    def __init__(self, limits=PROVIDER_LIMITS, cache=None):
+        self.providers = {
+            name: ProviderQueue(name, conf["per_minute"], conf["burst"])
+            for name, conf in limits.items()
+        }
+        self.cache = cache if cache is not None else get_http_cache()
+    
+    def request(self, provider, method, url, priority=PRIORITY_NORMAL, endpoint=None, cache=True, **kwargs):
+        """
+        Hace una petición HTTP respetando los límites del proveedor
+        
+        Parámetros:
+        - provider: "finnhub", "yahoo" o "reddit"
+        - method: "GET", "POST", ...
+        - url: URL completa
+        - priority: PRIORITY_CRITICAL, PRIORITY_NORMAL o PRIORITY_BULK
+        - endpoint: nombre del circuit breaker (por defecto host + ruta);
+          útil cuando la ruta lleva un símbolo (ej: /chart/AAPL)
+        - cache: False para no usar el cache HTTP (solo aplica a GET)
+        - kwargs: se pasan tal cual a requests (params, headers, auth, ...)
+        
+        Retorna el objeto Response de requests (un CachedResponse si salió
+        del cache: su json() no se vuelve a parsear).
+        Lanza CircuitOpenError si el endpoint está caído.
+        """
+        http_cache = self.cache if cache and method == "GET" else None
+        entry = None
+        if http_cache is not None:
+            entry = http_cache.lookup(url, kwargs.get("params"))
+            if entry is not None:
+                # Fresca: ni petición ni token del proveedor
+                if entry.is_fresh():
+                    return http_cache.hit(entry, url)
+                kwargs["headers"] = {**(kwargs.get("headers") or {}), **entry.validators()}
+        
+        breaker = get_breaker(endpoint or endpoint_name(url))
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuito abierto para {breaker.name}")
+        
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT_SECONDS)
+        
+        try:
+            response = self._send(provider, method, url, priority, kwargs)
+        except Exception:
+            breaker.record_failure()
+            raise
+        
+        # Los 5xx cuentan como fallo; un 4xx o un 429 significan que el endpoint responde
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        
+        if http_cache is not None:
+            response = http_cache.store(url, kwargs.get("params"), response, entry)
+        
+        return response
+    
+    def _send(self, provider, method, url, priority, kwargs):
+        """Envía la petición por la cola del proveedor, reintentando si pide esperar"""
+        queue = self.providers[provider]
+        
+        for attempt in range(MAX_RETRIES + 1):
+            queue.acquire(priority)
+            response = requests.request(method, url, **kwargs)
+            
+            if response.status_code not in (429, 503):
+                return response
+            
+            # El upstream nos pide que esperemos
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is None:
+                retry_after = 2 ** attempt * 5
+            
+            queue.pause(retry_after)
+            
+            if retry_after > MAX_RETRY_AFTER_SECONDS or attempt == MAX_RETRIES:
+                return response
+            
+            log.warning("⏳ El proveedor pidió esperar, reintentando...", provider=provider, retry_after=round(retry_after))
+        
+        return response
+    
+    def get(self, provider, url, priority=PRIORITY_NORMAL, **kwargs):
+        return self.request(provider, "GET", url, priority=priority, **kwargs)
+    
+    def post(self, provider, url, priority=PRIORITY_NORMAL, **kwargs):
+        return self.request(provider, "POST", url, priority=priority, **kwargs)
+    
+    def status(self):
+        """Estado de cada proveedor (para /api/health)"""
+        return {name: queue.status() for name, queue in self.providers.items()}
+
+
+# Un solo planificador por proceso, compartido por todos los recolectores
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Devuelve el planificador compartido del proceso, creándolo si hace falta"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
@@ -0,0 +1,125 @@
+# ============================================
+# VELAS EN VARIAS TEMPORALIDADES (RESAMPLING)
+# ============================================
+# Arma velas OHLCV más largas (1h, 1d) a partir de UNA serie fina
+# (ej: 15m) ya descargada, sin pedir nada más a Yahoo.
+#
+# Las velas se agrupan en hora local del mercado (gmtoffset de Yahoo):
+# - 1d: por día
+# - 1h: por hora contada desde la apertura (9:30, 10:30, ...), igual que
+#   las velas de 1h de Yahoo
+# - el resto: por bloques de su duración desde la apertura
+
+import numpy as np
+from config import MARKET_HOURS
+
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "1d": 86400
+}
+
+
+def to_arrays(data):
+    """
+    Convierte lo que devuelve TechnicalCollector.get_stock_data a arrays
+    de numpy (sin las velas que no tienen cierre)
+    
+    Si `data` ya son arrays (ej: de from_closes) se devuelve tal cual
+    
+    Retorna None si no hay velas
+    """
+    if not data or data.get("close") is None or not len(data["close"]):
+        return None
+    if isinstance(data["close"], np.ndarray):
+        return data
+    
+    closes = np.array([np.nan if c is None else c for c in data["close"]], dtype=np.float64)
+    valid = ~np.isnan(closes)
+    if not valid.any():
+        return None
+    
+    closes = closes[valid]
+    
+    def column(name, default):
+        """Columna sin las velas descartadas; los huecos se llenan con `default`"""
+        values = data.get(name) or []
+        if len(values) != len(valid):
+            return default
+        array = np.array([np.nan if v is None else v for v in values], dtype=np.float64)[valid]
+        return np.where(np.isnan(array), default, array)
+    
+    return {
+        "timestamps": np.array(data["timestamps"], dtype=np.int64)[valid],
+        "open": column("open", closes),
+        "high": column("high", closes),
+        "low": column("low", closes),
+        "close": closes,
+        "volume": column("volume", np.zeros(len(closes))),
+        "gmtoffset": data.get("gmtoffset") or 0
+    }
+
+
+def from_closes(timestamps, closes, gmtoffset=0):
+    """
+    Velas en arrays (como to_arrays) cuando solo hay cierres, por ejemplo
+    las del endpoint "spark" de Yahoo: open, high y low son el mismo
+    array que close (sin copias) y el volumen es 0
+    
+    Retorna None si no hay cierres
+    """
+    closes = np.array(closes, dtype=np.float64)   # None → nan
+    valid = ~np.isnan(closes)
+    if not valid.any():
+        return None
+    closes = closes[valid]
+    return {
+        "timestamps": np.array(timestamps, dtype=np.int64)[valid],
+        "open": closes,
+        "high": closes,
+        "low": closes,
+        "close": closes,
+        "volume": np.zeros(len(closes)),
+        "gmtoffset": gmtoffset or 0
+    }
+
+
+def resample(bars, timeframe, base_interval):
+    """
+    Agrupa velas (las de to_arrays) en velas de `timeframe`
+    
+    - base_interval: intervalo de las velas de entrada (ej: "15m")
+    
+    Retorna un dict con los mismos arrays, o None si `timeframe` es más
+    corto que las velas de entrada
+    """
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    base_seconds = TIMEFRAME_SECONDS[base_interval]
+    if seconds < base_seconds:
+        return None
+    if seconds == base_seconds:
+        return bars
+    
+    local = bars["timestamps"] + bars["gmtoffset"]
+    if timeframe == "1d":
+        keys = local // 86400
+    else:
+        hours, minutes = (int(part) for part in MARKET_HOURS[0].split(":"))
+        keys = (local - (hours * 3600 + minutes * 60)) // seconds
+    
+    # Las velas vienen ordenadas: cada grupo empieza donde cambia la clave
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.concatenate((starts[1:], [len(keys)])) - 1
+    
+    return {
+        "timestamps": bars["timestamps"][starts],
+        "open": bars["open"][starts],
+        "high": np.maximum.reduceat(bars["high"], starts),
+        "low": np.minimum.reduceat(bars["low"], starts),
+        "close": bars["close"][ends],
+        "volume": np.add.reduceat(bars["volume"], starts),
+        "gmtoffset": bars["gmtoffset"]
+    }
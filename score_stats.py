@@ -0,0 +1,294 @@
+# ============================================
+# ESTADÍSTICAS DEL HISTORIAL DE SCORES
+# ============================================
+# Un final_score de 35 dice poco sin contexto: ¿es alto para esta semana?
+# Por cada universo guardamos estadísticas del score final y de cada
+# componente en varias ventanas (STATS_WINDOWS: 1 día, 7 días, 30 días)
+# y las respuestas incluyen el z-score y el percentil del valor actual.
+#
+# Memoria fija por ventana, sin guardar el historial:
+# - La ventana se divide en N buckets de tiempo (ej: 7 días = 28 buckets
+#   de 6 horas). Cada bucket es un resumen que se puede combinar:
+#   Welford (cantidad, media, M2) + histograma de bins fijos (los scores
+#   van de -100 a 100, así que un bin por punto alcanza)
+# - Al consultar se combinan los buckets vivos; los que salen de la
+#   ventana se descartan enteros
+# - Además, una EWMA (media exponencial con vida media en horas) por ventana
+
+import json
+import math
+import threading
+import time
+import numpy as np
+from config import STATS_WINDOWS, STATS_FILE
+from snapshot import atomic_write_json
+from log import get_logger
+
+log = get_logger("stats")
+
+SCORE_MIN = -100
+SCORE_MAX = 100
+BINS = SCORE_MAX - SCORE_MIN   # Un bin por punto de score
+
+
+class Summary:
+    """
+    Resumen combinable de un conjunto de scores
+    
+    - count, mean, m2: Welford (varianza = m2 / (count - 1))
+    - histogram: cuántos scores cayeron en cada bin de 1 punto
+    """
+    
+    __slots__ = ("count", "mean", "m2", "histogram")
+    
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.histogram = np.zeros(BINS, dtype=np.int64)
+    
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.histogram[bin_of(value)] += 1
+    
+    def merge(self, other):
+        """Suma otro resumen a este (fórmula de Chan para media y M2)"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.histogram += other.histogram
+    
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else None
+    
+    def percentile_rank(self, value):
+        """Porcentaje de scores por debajo de `value` (interpolando dentro de su bin)"""
+        if self.count == 0:
+            return None
+        index = bin_of(value)
+        below = int(self.histogram[:index].sum())
+        # Dentro del bin se supone que los scores están repartidos parejo
+        fraction = min(max(value, SCORE_MIN), SCORE_MAX) - (SCORE_MIN + index)
+        return 100 * (below + fraction * int(self.histogram[index])) / self.count
+    
+    def quantile(self, q):
+        """Score por debajo del cual queda la fracción `q` (0 a 1)"""
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = np.cumsum(self.histogram)
+        index = min(int(np.searchsorted(cumulative, target)), BINS - 1)
+        in_bin = int(self.histogram[index])
+        before = int(cumulative[index]) - in_bin
+        fraction = (target - before) / in_bin if in_bin else 0
+        return SCORE_MIN + index + fraction
+    
+    def to_dict(self):
+        nonzero = np.flatnonzero(self.histogram)
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "histogram": {int(i): int(self.histogram[i]) for i in nonzero}
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls()
+        summary.count = data["count"]
+        summary.mean = data["mean"]
+        summary.m2 = data["m2"]
+        for index, count in data["histogram"].items():
+            summary.histogram[int(index)] = count
+        return summary
+
+
+def bin_of(value):
+    """Bin del histograma de un score (los de fuera de -100..100 van al extremo)"""
+    return min(max(int(math.floor(value - SCORE_MIN)), 0), BINS - 1)
+
+
+class Window:
+    """
+    Estadísticas de los scores de las últimas `hours` horas
+    
+    Parámetros:
+    - hours: largo de la ventana
+    - buckets: en cuántos buckets se divide (más buckets = el borde
+      de la ventana se mueve con más precisión)
+    - halflife_hours: vida media de la EWMA
+    """
+    
+    def __init__(self, hours, buckets, halflife_hours):
+        self.bucket_seconds = hours * 3600 / buckets
+        self.buckets = buckets
+        self.halflife_seconds = halflife_hours * 3600
+        self.summaries = {}     # número de bucket -> Summary
+        self.ewma = None
+        self.last_time = None
+    
+    def add(self, value, now):
+        bucket = int(now // self.bucket_seconds)
+        self.summaries.setdefault(bucket, Summary()).add(value)
+        self._expire(bucket)
+        
+        # EWMA según el tiempo transcurrido (no según la cantidad de muestras)
+        if self.ewma is None:
+            self.ewma = value
+        else:
+            alpha = 1 - 0.5 ** (max(now - self.last_time, 0) / self.halflife_seconds)
+            self.ewma += alpha * (value - self.ewma)
+        self.last_time = now
+    
+    def _expire(self, current):
+        for bucket in [b for b in self.summaries if b <= current - self.buckets]:
+            del self.summaries[bucket]
+    
+    def summary(self, now):
+        """Los buckets vivos combinados en un solo Summary"""
+        self._expire(int(now // self.bucket_seconds))
+        merged = Summary()
+        for summary in self.summaries.values():
+            merged.merge(summary)
+        return merged
+    
+    def describe(self, value, now):
+        """
+        Contexto de `value` frente a los scores de la ventana
+        
+        Retorna {"count", "mean", "std", "median", "ewma", "z_score", "percentile"}
+        """
+        summary = self.summary(now)
+        std = summary.std()
+        z_score = (value - summary.mean) / std if std else None
+        percentile = summary.percentile_rank(value)
+        median = summary.quantile(0.5)
+        return {
+            "count": summary.count,
+            "mean": round(summary.mean, 2) if summary.count else None,
+            "std": round(std, 2) if std is not None else None,
+            "median": round(median, 2) if median is not None else None,
+            "ewma": round(self.ewma, 2) if self.ewma is not None else None,
+            "z_score": round(z_score, 2) if z_score is not None else None,
+            "percentile": round(percentile, 1) if percentile is not None else None
+        }
+    
+    def to_dict(self):
+        return {
+            "summaries": {str(b): s.to_dict() for b, s in self.summaries.items()},
+            "ewma": self.ewma,
+            "last_time": self.last_time
+        }
+    
+    def load(self, data):
+        self.summaries = {int(b): Summary.from_dict(s) for b, s in data["summaries"].items()}
+        self.ewma = data["ewma"]
+        self.last_time = data["last_time"]
+
+
+class ScoreStats:
+    """
+    Ventanas de STATS_WINDOWS para cada serie de cada universo
+    (el score final y cada componente)
+    
+    Uso (al publicar cada resultado):
+        result["stats"] = score_stats.describe(universe, result)
+        score_stats.record(universe, result)
+    """
+    
+    def __init__(self, windows=STATS_WINDOWS):
+        self.windows_config = windows
+        self.series = {}    # (universo, serie) -> {ventana: Window}
+        self.lock = threading.Lock()
+    
+    def _windows(self, universe, name):
+        key = (universe, name)
+        if key not in self.series:
+            self.series[key] = {
+                window: Window(config["hours"], config["buckets"], config["halflife_hours"])
+                for window, config in self.windows_config.items()
+            }
+        return self.series[key]
+    
+    @staticmethod
+    def _values(result):
+        """Las series de un resultado: "final_score" y los componentes sin error"""
+        values = {"final_score": result["final_score"]}
+        for name, data in result.get("components", {}).items():
+            if "error" not in data:
+                values[name] = data["score"]
+        return values
+    
+    def record(self, universe, result, now=None):
+        """Suma los scores de un resultado al historial"""
+        now = time.time() if now is None else now
+        with self.lock:
+            for name, value in self._values(result).items():
+                for window in self._windows(universe, name).values():
+                    window.add(value, now)
+    
+    def describe(self, universe, result, now=None):
+        """
+        Z-score y percentil de cada score del resultado frente al historial
+        (sin contar el resultado mismo)
+        
+        Retorna {"final_score": {ventana: {...}}, "components": {componente: {ventana: {...}}}}
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            described = {
+                name: {
+                    window_name: window.describe(value, now)
+                    for window_name, window in self._windows(universe, name).items()
+                }
+                for name, value in self._values(result).items()
+            }
+        return {
+            "final_score": described.pop("final_score"),
+            "components": described
+        }
+    
+    def save(self, path=STATS_FILE):
+        """Guarda el estado en disco (para no empezar de cero al reiniciar)"""
+        with self.lock:
+            data = {
+                "version": 1,
+                "series": [
+                    {"universe": universe, "name": name,
+                     "windows": {w: window.to_dict() for w, window in windows.items()}}
+                    for (universe, name), windows in self.series.items()
+                ]
+            }
+        try:
+            atomic_write_json(path, data)
+        except Exception as e:
+            log.error("Error guardando estadísticas", error=str(e))
+    
+    def load(self, path=STATS_FILE):
+        """Lee el estado guardado (las ventanas que ya no están en STATS_WINDOWS se ignoran)"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log.warning("Error leyendo estadísticas", error=str(e))
+            return
+        
+        with self.lock:
+            for series in data.get("series", []):
+                windows = self._windows(series["universe"], series["name"])
+                for window_name, state in series["windows"].items():
+                    if window_name in windows:
+                        windows[window_name].load(state)
+
+
+# Unas solas estadísticas por proceso
+score_stats = ScoreStats()
@@ -0,0 +1,327 @@
+# ============================================
+# ANALIZADORES DE SENTIMIENTO DE TEXTO (INTERCAMBIABLES)
+# ============================================
+# Los recolectores de noticias y de Reddit no analizan el texto ellos
+# mismos: usan un "scorer" con esta interfaz:
+#
+#   scorer.score_batch(texts) → array de numpy, un score de -1 a +1 por texto
+#   scorer.score(text)        → un score de -1 a +1
+#
+# Hay dos:
+# - KeywordScorer: promedio de pesos de palabras clave (el análisis original)
+# - LocalModelScorer: modelo lineal (regresión logística) sobre unigramas y
+#   bigramas hasheados, entrenado offline con train_scorer.py. Corre en CPU,
+#   sin red, con los pesos mapeados en memoria y un cache en disco.
+#
+# create_scorer() elige según SENTIMENT_SCORER en config.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+from batch_scorer import BagOfWordsScorer, TOKEN_PATTERN, DOC_SEPARATOR
+from config import (
+    SENTIMENT_SCORER, SENTIMENT_MODEL_DIR,
+    SENTIMENT_CACHE_FILE, SENTIMENT_CACHE_MAX_ENTRIES
+)
+from log import get_logger
+
+log = get_logger("scorer")
+
+# Carpeta del proyecto (para resolver rutas relativas de config.py)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Archivos del modelo: cada versión en su propia carpeta dentro de
+# SENTIMENT_MODEL_DIR, y CURRENT_FILE dice cuál es la vigente
+WEIGHTS_FILE = "weights.npy"
+META_FILE = "meta.json"
+CURRENT_FILE = "current.json"
+
+
+def resolve_path(path):
+    """Rutas relativas se toman desde la carpeta del proyecto"""
+    return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
+
+def current_model_dir(model_dir):
+    """
+    Carpeta con los pesos y el meta.json de la versión vigente
+    
+    Las dos cosas cambian juntas: una versión nueva se escribe en otra
+    carpeta y después se cambia CURRENT_FILE (de forma atómica)
+    
+    Los modelos guardados antes de las versiones están en model_dir mismo
+    """
+    try:
+        with open(os.path.join(model_dir, CURRENT_FILE)) as f:
+            return os.path.join(model_dir, json.load(f)["version"])
+    except FileNotFoundError:
+        return model_dir
+
+
+# ============================================
+# PALABRAS CLAVE
+# ============================================
+class KeywordScorer:
+    """
+    Score = promedio de los pesos de las palabras clave que aparecen
+    en el texto (0 si no aparece ninguna)
+    
+    Las palabras simples se buscan en lote con BagOfWordsScorer. Las
+    frases y emojis (ej: "to the moon", "🚀") se buscan como substring.
+    """
+    
+    name = "keyword"
+    
+    def __init__(self, lexicon):
+        words = {w: weight for w, weight in lexicon.items() if TOKEN_PATTERN.fullmatch(w)}
+        self.phrases = {w: weight for w, weight in lexicon.items() if w not in words}
+        self.bag = BagOfWordsScorer(words)
+    
+    def score_batch(self, texts):
+        sums, found = self.bag.totals(texts)
+        
+        if self.phrases:
+            for i, text in enumerate(texts):
+                text_lower = text.lower()
+                for phrase, weight in self.phrases.items():
+                    if phrase in text_lower:
+                        sums[i] += weight
+                        found[i] += 1
+        
+        scores = np.zeros(len(texts))
+        has_words = found > 0
+        scores[has_words] = np.clip(sums[has_words] / found[has_words], -1, 1)
+        return scores
+    
+    def score(self, text):
+        return float(self.score_batch([text])[0])
+
+
+# ============================================
+# N-GRAMAS HASHEADOS
+# ============================================
+class HashedNgrams:
+    """
+    Convierte un lote de textos en una matriz dispersa de features:
+    cada unigrama y bigrama de tokens cae en una de 2**n_bits columnas
+    (por hash) con signo +1 o -1 (así los choques se compensan)
+    
+    Se usa igual al entrenar (train_scorer.py) y al predecir
+    """
+    
+    # Tokens distintos cuyo hash recordamos antes de vaciar el cache
+    MAX_CACHED_TOKENS = 200000
+    
+    def __init__(self, n_bits):
+        self.n_bits = n_bits
+        self.mask = np.uint64((1 << n_bits) - 1)
+        # token -> hash (el separador de textos es 0; los demás, crc32 + 1)
+        self.hashes = {DOC_SEPARATOR.strip(): 0}
+        self.lock = threading.Lock()
+    
+    def _token_hashes(self, tokens):
+        with self.lock:
+            hashes = self.hashes
+            values = [hashes.get(token, -1) for token in tokens]
+            for i, value in enumerate(values):
+                if value < 0:
+                    value = zlib.crc32(tokens[i].encode()) + 1
+                    hashes[tokens[i]] = values[i] = value
+            if len(hashes) > self.MAX_CACHED_TOKENS:
+                self.hashes = {DOC_SEPARATOR.strip(): 0}
+        return np.array(values, dtype=np.uint64)
+    
+    def transform(self, texts):
+        """
+        Retorna (docs, columns, signs): el texto, la columna y el signo de
+        cada feature presente (cada feature una vez por texto)
+        """
+        blob = DOC_SEPARATOR.join(text.lower() for text in texts)
+        hashes = self._token_hashes(TOKEN_PATTERN.findall(blob))
+        
+        separators = hashes == 0
+        docs = np.cumsum(separators)
+        
+        # Unigramas: todos los tokens menos los separadores
+        words = ~separators
+        unigrams = hashes[words]
+        unigram_docs = docs[words]
+        
+        # Bigramas: dos tokens seguidos del mismo texto
+        pairs = words[:-1] & words[1:]
+        with np.errstate(over="ignore"):
+            bigrams = hashes[:-1][pairs] * np.uint64(0x9E3779B1) + hashes[1:][pairs]
+        bigram_docs = docs[1:][pairs]
+        
+        values = np.concatenate([unigrams, bigrams])
+        feature_docs = np.concatenate([unigram_docs, bigram_docs]).astype(np.int64)
+        
+        # Mezclamos los bits del hash (splitmix64) y sacamos columna y signo
+        with np.errstate(over="ignore"):
+            values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            values ^= values >> np.uint64(31)
+        columns = ((values >> np.uint64(1)) & self.mask).astype(np.int64)
+        signs = np.where(values & np.uint64(1), -1.0, 1.0)
+        
+        keys, first = np.unique(feature_docs * (1 << self.n_bits) + columns, return_index=True)
+        return keys >> self.n_bits, keys & ((1 << self.n_bits) - 1), signs[first]
+
+
+# ============================================
+# CACHE DE RESULTADOS EN DISCO
+# ============================================
+class ScoreCache:
+    """
+    Guarda en SQLite el score de cada texto ya analizado por el modelo
+    
+    La clave es el hash de (versión del modelo, texto): si se entrena un
+    modelo nuevo, sus scores no se mezclan con los del anterior.
+    Cuando hay más de max_entries se borran los más viejos.
+    """
+    
+    # Cuántas claves se consultan por query (límite de parámetros de SQLite)
+    CHUNK_SIZE = 500
+    
+    def __init__(self, path, version, max_entries=SENTIMENT_CACHE_MAX_ENTRIES):
+        self.version = version
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, score REAL)")
+        self.conn.commit()
+    
+    def key(self, text):
+        return hashlib.sha1(f"{self.version}\0{text}".encode()).digest()
+    
+    def get_many(self, keys):
+        """Devuelve {clave: score} de las claves que están en el cache"""
+        found = {}
+        with self.lock:
+            for start in range(0, len(keys), self.CHUNK_SIZE):
+                chunk = keys[start:start + self.CHUNK_SIZE]
+                rows = self.conn.execute(
+                    f"SELECT key, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                found.update(rows)
+        return found
+    
+    def put_many(self, items):
+        """Guarda pares (clave, score)"""
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO scores (key, score) VALUES (?, ?)", items)
+            # Los rowid crecen con cada inserción: los más chicos son los más viejos
+            self.conn.execute(
+                "DELETE FROM scores WHERE rowid <= (SELECT MAX(rowid) FROM scores) - ?",
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+
+# ============================================
+# MODELO LOCAL
+# ============================================
+class LocalModelScorer:
+    """
+    Regresión logística sobre n-gramas hasheados
+    
+    Archivos de la versión vigente (ver current_model_dir; los genera
+    train_scorer.py):
+    - weights.npy: un peso por columna (se abre con mmap, no se copia a memoria)
+    - meta.json: n_bits, bias y versión del modelo
+    
+    Score = 2 * P(positivo) - 1, de -1 a +1
+    """
+    
+    name = "local"
+    
+    def __init__(self, model_dir=SENTIMENT_MODEL_DIR, cache_file=SENTIMENT_CACHE_FILE):
+        model_dir = current_model_dir(resolve_path(model_dir))
+        with open(os.path.join(model_dir, META_FILE)) as f:
+            meta = json.load(f)
+        
+        self.weights = np.load(os.path.join(model_dir, WEIGHTS_FILE), mmap_mode="r")
+        self.bias = float(meta["bias"])
+        self.version = meta["version"]
+        self.features = HashedNgrams(int(meta["n_bits"]))
+        
+        if len(self.weights) != 1 << self.features.n_bits:
+            raise ValueError(f"{WEIGHTS_FILE} no coincide con n_bits={self.features.n_bits}")
+        
+        self.cache = None
+        if cache_file:
+            try:
+                self.cache = ScoreCache(resolve_path(cache_file), self.version)
+            except sqlite3.Error as e:
+                log.warning("No se pudo abrir el cache de scores, sigo sin cache", error=str(e))
+    
+    def predict(self, texts):
+        """Aplica el modelo a un lote de textos (sin cache)"""
+        if not texts:
+            return np.zeros(0)
+        docs, columns, signs = self.features.transform(texts)
+        margins = np.bincount(docs, weights=self.weights[columns] * signs, minlength=len(texts))
+        # 2 * sigmoid(m) - 1 == tanh(m / 2)
+        return np.tanh((margins + self.bias) / 2)
+    
+    def score_batch(self, texts):
+        if self.cache is None:
+            return self.predict(texts)
+        
+        keys = [self.cache.key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        
+        scores = np.array([cached.get(key, 0.0) for key in keys])
+        if missing:
+            predicted = self.predict([texts[i] for i in missing])
+            scores[missing] = predicted
+            self.cache.put_many([(keys[i], float(score)) for i, score in zip(missing, predicted)])
+        return scores
+    
+    def score(self, text):
+        return float(self.score_batch([text])[0])
+
+
+# Un modelo por carpeta, compartido por todos los recolectores del proceso
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_local_model(model_dir=SENTIMENT_MODEL_DIR):
+    """Devuelve el modelo local de model_dir, cargándolo la primera vez"""
+    with _models_lock:
+        if model_dir not in _models:
+            _models[model_dir] = LocalModelScorer(model_dir)
+        return _models[model_dir]
+
+
+def create_scorer(lexicon, kind=SENTIMENT_SCORER):
+    """
+    Crea el scorer configurado
+    
+    - lexicon: palabras clave del recolector (para KeywordScorer)
+    - kind: "keyword" o "local"
+    
+    Si el modelo local no está entrenado (no hay pesos), usa palabras clave
+    """
+    if kind == "local":
+        try:
+            return get_local_model()
+        except FileNotFoundError:
+            log.warning("No hay modelo entrenado, usando palabras clave", model_dir=SENTIMENT_MODEL_DIR)
+        except (OSError, ValueError, KeyError) as e:
+            log.error("Error cargando el modelo local, usando palabras clave", error=str(e))
+    elif kind != "keyword":
+        log.warning("SENTIMENT_SCORER desconocido, usando palabras clave", scorer=kind)
+    
+    return KeywordScorer(lexicon)
@@ -4,14 +4,106 @@
 # Este es el CEREBRO del sistema
 # Combina todos los factores y calcula el Sentiment Score final
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-from config import PESOS
+from config import (
+    PESOS, DEFAULT_UNIVERSE,
+    SENTIMENT_DEADLINE_SECONDS, LAST_GOOD_HALF_LIFE_MINUTES, LAST_GOOD_MAX_AGE_HOURS
+)
+from components import DependencyExecutor, default_sources, default_components
+from quote_service import get_quote_service
+from universe import get_universes, get_shard_scheduler
 
 # Importar todos los recolectores
 from news_collector import NewsCollector
 from reddit_collector import RedditCollector
 from technical_collector import TechnicalCollector
 from analyst_collector import AnalystCollector
+from log import get_logger
+
+log = get_logger("calculator")
+
+
+# ============================================
+# ÚLTIMO VALOR BUENO DE CADA COMPONENTE
+# ============================================
+# Si un componente falla o no termina a tiempo, usamos su último
+# valor bueno en vez de sacarlo del promedio (así el score no salta)
+last_good_components = {}   # (universo, nombre) -> {"score", "details", "timestamp"}
+last_good_lock = threading.Lock()
+
+
+def remember_component(name, score, details, timestamp=None, universe=DEFAULT_UNIVERSE):
+    """Guarda el último valor bueno de un componente de un universo"""
+    with last_good_lock:
+        last_good_components[(universe, name)] = {
+            "score": score,
+            "details": details,
+            "timestamp": timestamp or time.time()
+        }
+
+
+def seed_last_good(result, last_updated):
+    """
+    Carga los últimos valores buenos desde el resultado de un universo
+    (por ejemplo el snapshot que se lee al arrancar el servidor)
+    """
+    timestamp = last_updated.timestamp()
+    universe = result.get("universe", DEFAULT_UNIVERSE)
+    for name, data in result.get("components", {}).items():
+        if "error" in data or data.get("stale"):
+            continue
+        with last_good_lock:
+            current = last_good_components.get((universe, name))
+            if current and current["timestamp"] >= timestamp:
+                continue
+        remember_component(name, data["score"], data.get("details"), timestamp, universe)
+
+
+def last_good_fallback(name, weight, reason, universe=DEFAULT_UNIVERSE):
+    """
+    Devuelve el último valor bueno de un componente, atenuado por su edad
+    
+    score_atenuado = score × 0.5 ^ (edad / vida_media)
+    
+    Retorna None si no hay valor bueno o es demasiado viejo
+    """
+    with last_good_lock:
+        last_good = last_good_components.get((universe, name))
+    
+    if not last_good:
+        return None
+    
+    age = time.time() - last_good["timestamp"]
+    if age > LAST_GOOD_MAX_AGE_HOURS * 3600:
+        return None
+    
+    decay = 0.5 ** (age / (LAST_GOOD_HALF_LIFE_MINUTES * 60))
+    
+    return {
+        "score": round(last_good["score"] * decay, 2),
+        "weight": weight,
+        "details": last_good["details"],
+        "stale": True,
+        "stale_reason": reason,
+        "age_seconds": round(age),
+        "original_score": last_good["score"]
+    }
+
+
+# Interpretación del score: (desde qué score, texto), de menor a mayor
+INTERPRETATION_LEVELS = [
+    (None, "Strong Bearish 🔴🔴"),
+    (-50, "Bearish 🔴"),
+    (-30, "Slightly Bearish 🔴"),
+    (-10, "Neutral ⚪"),
+    (10, "Slightly Bullish 🟢"),
+    (30, "Bullish 🟢"),
+    (50, "Strong Bullish 🟢🟢")
+]
+
 
 class SentimentCalculator:
     """
@@ -20,19 +112,55 @@ class SentimentCalculator:
     2. Aplica los pesos configurados
     3. Calcula el Sentiment Score final de -100 a +100
     4. Genera un reporte completo
+    
+    Calcula varios universos a la vez (NASDAQ, S&P 500, ...) con UN solo
+    juego de peticiones: cada dato se pide una vez (el VIX, los ETFs y las
+    acciones que están en varios universos no se repiten) y después se
+    arma el resultado de cada universo con esos datos
+    
+    Los componentes y los datos que necesita cada uno están en
+    self.components (ver components.py); add_component agrega uno nuevo
     """
     
-    def __init__(self):
+    def __init__(self, universes=None):
+        """
+        - universes: nombres de los universos a calcular
+          (por defecto todos los de UNIVERSES en config.py)
+        """
+        # Las cotizaciones se comparten entre técnicos y analistas
+        self.quote_service = get_quote_service()
+        
         self.news_collector = NewsCollector()
         self.reddit_collector = RedditCollector()
-        self.technical_collector = TechnicalCollector()
-        self.analyst_collector = AnalystCollector()
+        self.technical_collector = TechnicalCollector(quote_service=self.quote_service)
+        self.analyst_collector = AnalystCollector(quote_service=self.quote_service)
         
         self.pesos = PESOS
+        self.universes = list(universes or get_universes())
+        
+        self.sources = default_sources(
+            self.news_collector, self.reddit_collector, self.technical_collector, self.analyst_collector
+        )
+        self.components = default_components(
+            self.news_collector, self.reddit_collector, self.technical_collector, self.analyst_collector
+        )
+        self.executor = DependencyExecutor(self.sources)
     
-    def calculate_sentiment(self):
+    def add_component(self, component, sources=None):
         """
-        Calcula el Sentiment Score completo
+        Agrega un componente (ver components.Component)
+        
+        - sources: fuentes de datos nuevas que necesita, {tipo: fetch}
+        
+        Su peso sale de PESOS (sin peso, se muestra pero no cuenta en el score)
+        """
+        self.sources.update(sources or {})
+        self.components.append(component)
+    
+    def calculate_sentiment(self, universe=None):
+        """
+        Calcula el Sentiment Score completo de un universo
+        (por defecto el primero de self.universes)
         
         Retorna:
         {
@@ -42,116 +170,156 @@ class SentimentCalculator:
             "timestamp": cuando se calculó
         }
         """
-        print("\n" + "="*60)
-        print("🚀 CALCULANDO NASDAQ SENTIMENT SCORE")
-        print("="*60 + "\n")
+        return self.calculate_all()[universe or self.universes[0]]
+    
+    def calculate_all(self, print_summary=False):
+        """
+        Calcula el Sentiment Score de todos los universos
         
-        components = {}
+        - print_summary: imprimir el resumen con barras de cada universo
+          (al correr este archivo directamente); si no, va una sola línea al log
         
-        # ==========================================
-        # 1. NOTICIAS
-        # ==========================================
-        try:
-            news_result = self.news_collector.get_news_sentiment()
-            components["news_sentiment"] = {
-                "score": news_result["score"],
-                "weight": self.pesos["news_sentiment"],
-                "details": news_result
-            }
-        except Exception as e:
-            print(f"⚠️ Error en noticias: {e}")
-            components["news_sentiment"] = {"score": 0, "weight": self.pesos["news_sentiment"], "error": str(e)}
+        Retorna {universo: resultado} (cada resultado con el formato
+        de calculate_sentiment)
+        """
+        log.info("🚀 Calculando sentiment score", universes=",".join(self.universes))
         
-        # ==========================================
-        # 2. REDES SOCIALES (Reddit)
-        # ==========================================
-        try:
-            social_result = self.reddit_collector.get_social_sentiment()
-            components["social_sentiment"] = {
-                "score": social_result["score"],
-                "weight": self.pesos["social_sentiment"],
-                "details": social_result
-            }
-        except Exception as e:
-            print(f"⚠️ Error en Reddit: {e}")
-            components["social_sentiment"] = {"score": 0, "weight": self.pesos["social_sentiment"], "error": str(e)}
+        definitions = get_universes()
+        # El deadline cuenta desde aquí: incluye la precarga de precios
+        deadline = time.monotonic() + SENTIMENT_DEADLINE_SECONDS
         
-        # ==========================================
-        # 3. INDICADORES TÉCNICOS
-        # ==========================================
-        try:
-            technical_result = self.technical_collector.get_technical_sentiment()
-            components["technical"] = {
-                "score": technical_result["score"],
-                "weight": self.pesos["technical"],
-                "details": technical_result
-            }
-        except Exception as e:
-            print(f"⚠️ Error en técnicos: {e}")
-            components["technical"] = {"score": 0, "weight": self.pesos["technical"], "error": str(e)}
+        # Pedir los precios en vivo de una vez (shards de analistas y técnicos + ETFs + VIX).
+        # Si no termina antes del deadline, los componentes arrancan igual
+        # (cada uno pide los precios que le falten) y la precarga sigue en background
+        analyst_shard = get_shard_scheduler("analyst").current()
+        technical_shard = get_shard_scheduler("technical").current()
+        indexes = [definitions[name]["index"] for name in self.universes]
+        pool = ThreadPoolExecutor(max_workers=1)
+        prefetch = pool.submit(self.quote_service.get_quotes, list(dict.fromkeys(
+            analyst_shard + technical_shard + indexes + ["^VIX"]
+        )))
+        pool.shutdown(wait=False)
+        wait([prefetch], timeout=SENTIMENT_DEADLINE_SECONDS)
         
         # ==========================================
-        # 4. VIX
+        # LANZAR TODAS LAS PETICIONES EN PARALELO
         # ==========================================
-        try:
-            vix_result = self.technical_collector.get_vix_sentiment()
-            components["vix"] = {
-                "score": vix_result["score"],
-                "weight": self.pesos["vix"],
-                "details": vix_result
-            }
-        except Exception as e:
-            print(f"⚠️ Error en VIX: {e}")
-            components["vix"] = {"score": 0, "weight": self.pesos["vix"], "error": str(e)}
+        # Cada dato se pide una vez y cada componente se calcula apenas
+        # llegan sus inputs. Esperamos como máximo SENTIMENT_DEADLINE_SECONDS;
+        # lo que no termine sigue en background y actualiza su último valor
+        # bueno al acabar
+        futures = self.executor.run(self.components, self.universes)
         
-        # ==========================================
-        # 5. PUT/CALL RATIO
-        # ==========================================
-        try:
-            putcall_result = self.technical_collector.get_put_call_sentiment()
-            components["put_call_ratio"] = {
-                "score": putcall_result["score"],
-                "weight": self.pesos["put_call_ratio"],
-                "details": putcall_result
-            }
-        except Exception as e:
-            print(f"⚠️ Error en Put/Call: {e}")
-            components["put_call_ratio"] = {"score": 0, "weight": self.pesos["put_call_ratio"], "error": str(e)}
+        for component in self.components:
+            for future, universes in self._group_futures(component, futures).items():
+                future.add_done_callback(self._remember_when_done(component.name, universes))
+        
+        done, _ = wait(set(futures.values()), timeout=max(0, deadline - time.monotonic()))
+        
+        for component in self.components:
+            component_futures = self._group_futures(component, futures)
+            if any(future not in done for future in component_futures):
+                log.warning("⏱️ Componente sin terminar al llegar al deadline", name=component.name, deadline=SENTIMENT_DEADLINE_SECONDS)
+                continue
+            errors = {str(f.exception()) for f in component_futures if f.exception() is not None}
+            for error in errors:
+                log.warning("⚠️ Error en componente", name=component.name, error=error)
         
         # ==========================================
-        # 6. RECOMENDACIONES DE ANALISTAS
+        # ARMAR EL RESULTADO DE CADA UNIVERSO
         # ==========================================
-        try:
-            analyst_result = self.analyst_collector.get_analyst_sentiment()
-            components["analyst_recommendations"] = {
-                "score": analyst_result["score"],
-                "weight": self.pesos["analyst_recommendations"],
-                "details": analyst_result
+        timestamp = datetime.now().isoformat()
+        results = {}
+        
+        for universe in self.universes:
+            components = {}
+            for component in self.components:
+                components[component.name] = self._component(
+                    universe, component, futures[(component.name, universe)], done
+                )
+            
+            final_score = self._calculate_weighted_score(components)
+            interpretation = self._interpret_score(final_score)
+            
+            result = {
+                "universe": universe,
+                "index": definitions[universe]["index"],
+                "final_score": round(final_score, 2),
+                "interpretation": interpretation,
+                "components": components,
+                "timestamp": timestamp,
+                "weights_used": self.pesos
             }
-        except Exception as e:
-            print(f"⚠️ Error en analistas: {e}")
-            components["analyst_recommendations"] = {"score": 0, "weight": self.pesos["analyst_recommendations"], "error": str(e)}
+            
+            # Imprimir resumen
+            if print_summary:
+                self._print_summary(result)
+            else:
+                log.info(
+                    "📊 Score calculado", universe=universe, final_score=result["final_score"],
+                    interpretation=interpretation,
+                    scores={name: data["score"] for name, data in components.items()}
+                )
+            results[universe] = result
         
-        # ==========================================
-        # CALCULAR SCORE FINAL
-        # ==========================================
-        final_score = self._calculate_weighted_score(components)
-        interpretation = self._interpret_score(final_score)
+        return results
+    
+    def _group_futures(self, component, futures):
+        """{Future: universos que lo usan} de un componente"""
+        grouped = {}
+        for universe in self.universes:
+            grouped.setdefault(futures[(component.name, universe)], []).append(universe)
+        return grouped
+    
+    def _component(self, universe, component, future, done):
+        """
+        Resultado de un componente para un universo
         
-        result = {
-            "final_score": round(final_score, 2),
-            "interpretation": interpretation,
-            "components": components,
-            "timestamp": datetime.now().isoformat(),
-            "weights_used": self.pesos
-        }
+        Si sus datos no llegaron a tiempo, fallaron o no tienen nada
+        para este universo, usa el último valor bueno (atenuado)
+        """
+        name = component.name
+        weight = self.pesos.get(name, 0)
         
-        # Imprimir resumen
-        self._print_summary(result)
+        if future not in done:
+            error = "timeout"
+        elif future.exception() is not None:
+            error = str(future.exception())
+        else:
+            result = future.result()
+            if "error" not in result:
+                return {
+                    "score": result["score"],
+                    "weight": weight,
+                    "details": result
+                }
+            log.warning("⚠️ Error en componente", name=name, universe=universe, error=result["error"])
+            error = result["error"]
         
-        return result
+        # Usar el último valor bueno (atenuado) si lo hay
+        fallback = last_good_fallback(name, weight, error, universe)
+        if fallback:
+            log.info("↩️ Usando último valor bueno", name=name, universe=universe, age_seconds=fallback["age_seconds"])
+            return fallback
+        return {"score": 0, "weight": weight, "error": error}
     
-    def _calculate_weighted_score(self, components):
+    @staticmethod
+    def _remember_when_done(name, universes):
+        """
+        Callback que guarda el resultado de un componente en sus universos
+        cuando termina bien (aunque sea después del deadline)
+        """
+        def callback(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            if "error" not in result:
+                for universe in universes:
+                    remember_component(name, result["score"], result, universe=universe)
+        return callback
+    
+    @staticmethod
+    def _calculate_weighted_score(components):
         """
         Calcula el score final ponderado
         
@@ -175,31 +343,23 @@ class SentimentCalculator:
         
         return total_weighted_score / total_weight
     
-    def _interpret_score(self, score):
+    @staticmethod
+    def _interpret_score(score):
         """
-        Interpreta el score en texto
+        Interpreta el score en texto (ver INTERPRETATION_LEVELS)
         """
-        if score >= 50:
-            return "Strong Bullish 🟢🟢"
-        elif score >= 30:
-            return "Bullish 🟢"
-        elif score >= 10:
-            return "Slightly Bullish 🟢"
-        elif score >= -10:
-            return "Neutral ⚪"
-        elif score >= -30:
-            return "Slightly Bearish 🔴"
-        elif score >= -50:
-            return "Bearish 🔴"
-        else:
-            return "Strong Bearish 🔴🔴"
+        interpretation = INTERPRETATION_LEVELS[0][1]
+        for threshold, text in INTERPRETATION_LEVELS[1:]:
+            if score >= threshold:
+                interpretation = text
+        return interpretation
     
     def _print_summary(self, result):
         """
         Imprime un resumen bonito del resultado
         """
         print("\n" + "="*60)
-        print("📊 RESUMEN DEL SENTIMENT SCORE")
+        print(f"📊 RESUMEN DEL SENTIMENT SCORE ({result.get('universe', DEFAULT_UNIVERSE)})")
         print("="*60)
         
         print(f"\n🎯 SCORE FINAL: {result['final_score']}")
@@ -247,16 +407,81 @@ def get_sentiment_json():
     return calculator.calculate_sentiment()
 
 
+# ============================================
+# SCORE POR ACCIÓN
+# ============================================
+def calculate_symbol_sentiment(result, symbol):
+    """
+    Calcula el score compuesto de una acción a partir de un resultado
+    ya calculado (no hace ninguna petición)
+    
+    Usa los componentes que tienen datos por acción:
+    - news_sentiment: details[symbol].score
+    - social_sentiment: details[symbol].score
+    - technical: symbols[symbol].score
+    - analyst_recommendations: 60% recomendaciones + 40% price target
+    
+    Los pesos son los del cálculo general, renormalizados entre los
+    componentes que tienen datos de esta acción
+    
+    Retorna None si ningún componente tiene datos de la acción
+    """
+    components = result.get("components", {})
+    symbol_components = {}
+    
+    def component_details(name):
+        return components.get(name, {}).get("details", {}) or {}
+    
+    news = component_details("news_sentiment").get("details", {}).get(symbol)
+    if news:
+        symbol_components["news_sentiment"] = {"score": news["score"], "news_count": news.get("news_count")}
+    
+    social = component_details("social_sentiment").get("details", {}).get(symbol)
+    if social:
+        symbol_components["social_sentiment"] = {"score": social["score"], "posts_analyzed": social.get("posts_analyzed")}
+    
+    technical = component_details("technical").get("symbols", {}).get(symbol)
+    if technical:
+        symbol_components["technical"] = {"score": technical["score"], "rsi": technical.get("rsi")}
+    
+    analyst = component_details("analyst_recommendations").get("details", {}).get(symbol)
+    if analyst:
+        score = analyst["recommendation_score"] * 0.6 + analyst.get("price_target_score", 0) * 0.4
+        symbol_components["analyst_recommendations"] = {
+            "score": round(score, 2),
+            "price_target": analyst.get("price_target"),
+            "current_price": analyst.get("current_price")
+        }
+    
+    if not symbol_components:
+        return None
+    
+    weights = result.get("weights_used", PESOS)
+    for name, data in symbol_components.items():
+        data["weight"] = weights.get(name, 0)
+    
+    final_score = SentimentCalculator._calculate_weighted_score(symbol_components)
+    
+    return {
+        "symbol": symbol,
+        "final_score": round(final_score, 2),
+        "interpretation": SentimentCalculator._interpret_score(final_score),
+        "components": symbol_components,
+        "market_score": result.get("final_score"),
+        "timestamp": result.get("timestamp")
+    }
+
+
 # ============================================
 # EJECUTAR SI SE CORRE DIRECTAMENTE
 # ============================================
 if __name__ == "__main__":
     calculator = SentimentCalculator()
-    result = calculator.calculate_sentiment()
+    results = calculator.calculate_all(print_summary=True)
     
-    # También guardar en un archivo JSON
+    # También guardar en un archivo JSON (un resultado por universo)
     import json
     with open("sentiment_result.json", "w") as f:
-        json.dump(result, f, indent=2)
+        json.dump(results, f, indent=2)
     
     print("\n✅ Resultado guardado en 'sentiment_result.json'")
@@ -4,15 +4,30 @@
 # Este servidor expone endpoints para que tu frontend
 # pueda obtener los datos de sentimiento
 
-from flask import Flask, jsonify, request
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
 from datetime import datetime
 import json
+import os
 import threading
 import time
 
 # Importar el calculador
-from sentiment_calculator import SentimentCalculator
+from sentiment_calculator import SentimentCalculator, calculate_symbol_sentiment, seed_last_good
+from config import DEFAULT_UNIVERSE, INTRADAY_ENABLED, WHATIF_MAX_SCENARIOS, CACHE_DURATION_MINUTES
+from intraday import get_intraday_tracker, apply_intraday, is_market_open
+from universe import get_universes
+from request_scheduler import get_scheduler
+from http_cache import get_http_cache
+from circuit_breaker import breakers_status
+from event_broadcaster import broadcaster
+from snapshot import save_snapshot, load_snapshot
+from projection import ProjectionCache, parse_fields, PROJECTABLE_FIELDS
+from whatif import WeightScenarios
+from score_stats import score_stats
+from log import get_logger
+
+log = get_logger("server")
 
 # ==========================================
 # CONFIGURACIÓN DEL SERVIDOR
@@ -28,14 +43,37 @@ CORS(app, origins=[
 ])
 
 # Cache para no hacer demasiadas peticiones a las APIs
+# "results" tiene el último resultado de cada universo: {universo: resultado}
 sentiment_cache = {
-    "data": None,
+    "results": None,
     "last_updated": None,
-    "updating": False
+    "updating": False,
+    "generation": 0,   # Sube cada vez que se publica un resultado nuevo
+    "source": None     # "snapshot" (leído de disco al arrancar) o "live"
+}
+
+# Evita que dos hilos calculen a la vez
+update_lock = threading.Lock()
+
+# Hilo de la actualización en curso (ver start_background_update)
+update_thread = None
+update_thread_lock = threading.Lock()
+
+# Scores por acción calculados a partir del resultado de cada generación
+# (se calculan la primera vez que se piden y se borran al cambiar la generación)
+symbol_cache = {
+    "generation": None,
+    "results": {}   # (universo, símbolo) -> resultado
 }
+symbol_cache_lock = threading.Lock()
 
-# El sentimiento se actualiza cada 15 minutos
-CACHE_DURATION_MINUTES = 15
+# Respuestas de /api/sentiment ya serializadas (una por universo, proyección y generación)
+projection_caches = {}   # universo -> ProjectionCache
+projection_cache_lock = threading.Lock()
+
+# Scores de los componentes listos para /api/sentiment/whatif (uno por universo y generación)
+whatif_cache = {}   # universo -> (generación, WeightScenarios)
+whatif_cache_lock = threading.Lock()
 
 
 # ==========================================
@@ -51,9 +89,14 @@ def home():
         "name": "NASDAQ Sentiment Tracker API",
         "version": "1.0.0",
         "endpoints": {
-            "/api/sentiment": "GET - Obtener el sentiment score actual",
+            "/api/sentiment": "GET - Obtener el sentiment score actual (?universe=nasdaq|sp500|russell)",
+            "/api/universes": "GET - Universos disponibles y su último score",
             "/api/sentiment/refresh": "POST - Forzar actualización del score",
-            "/api/health": "GET - Estado del servidor"
+            "/api/sentiment/<symbol>": "GET - Score compuesto de una acción",
+            "/api/sentiment/whatif": "GET/POST - Score con otros pesos (sin pedir datos nuevos)",
+            "/api/sentiment/stream": "GET - Eventos (SSE) cada vez que cambia el score",
+            "/api/health": "GET - Estado del servidor",
+            "/api/ready": "GET - ¿Hay datos para servir? (fresh / stale / empty)"
         },
         "documentation": "https://nasdaqsentimenttracker.netlify.app"
     })
@@ -68,48 +111,141 @@ def health():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "cache": {
-            "has_data": sentiment_cache["data"] is not None,
+            "has_data": sentiment_cache["results"] is not None,
             "last_updated": sentiment_cache["last_updated"],
             "updating": sentiment_cache["updating"]
-        }
+        },
+        "stream_clients": broadcaster.clients,
+        "intraday": {
+            "enabled": INTRADAY_ENABLED,
+            "market_open": is_market_open(),
+            "last_update": get_intraday_tracker().last_update if INTRADAY_ENABLED else None
+        },
+        "upstream": get_scheduler().status(),
+        "http_cache": get_http_cache().status() if get_http_cache() else None,
+        "breakers": breakers_status()
+    })
+
+
+@app.route("/api/ready")
+def ready():
+    """
+    Readiness: ¿podemos servir datos?
+    
+    - state "fresh": hay datos recientes
+    - state "stale": hay datos pero viejos (ej: snapshot al arrancar)
+    - state "empty": no hay nada que servir (503)
+    
+    Con ?fresh=1 solo responde 200 si los datos están frescos
+    """
+    if sentiment_cache["results"] is None:
+        state = "empty"
+    elif is_cache_fresh():
+        state = "fresh"
+    else:
+        state = "stale"
+    
+    require_fresh = request.args.get("fresh") == "1"
+    is_ready = state == "fresh" or (state == "stale" and not require_fresh)
+    
+    return jsonify({
+        "ready": is_ready,
+        "state": state,
+        "source": sentiment_cache["source"],
+        "updating": sentiment_cache["updating"],
+        "last_updated": sentiment_cache["last_updated"].isoformat() if sentiment_cache["last_updated"] else None
+    }), 200 if is_ready else 503
+
+
+@app.route("/api/universes")
+def list_universes():
+    """
+    Universos disponibles (ETF de referencia, número de acciones y último score)
+    """
+    results = sentiment_cache["results"] or {}
+    return jsonify({
+        "success": True,
+        "default": DEFAULT_UNIVERSE,
+        "universes": [
+            {
+                "name": name,
+                "index": universe["index"],
+                "symbols": len(universe["symbols"]),
+                "final_score": results[name]["final_score"] if name in results else None,
+                "interpretation": results[name]["interpretation"] if name in results else None
+            }
+            for name, universe in get_universes().items()
+        ]
     })
 
 
+def requested_universe():
+    """Universo pedido con ?universe= (DEFAULT_UNIVERSE si no se pide), o None si no existe"""
+    name = request.args.get("universe", DEFAULT_UNIVERSE).strip().lower()
+    return name if name in get_universes() else None
+
+
+def unknown_universe():
+    """Respuesta 404 para un ?universe= que no existe"""
+    return jsonify({
+        "success": False,
+        "error": f"Unknown universe: {request.args.get('universe')}",
+        "valid_universes": list(get_universes())
+    }), 404
+
+
+def cached_result(universe):
+    """Último resultado de un universo (None si todavía no hay)"""
+    results = sentiment_cache["results"]
+    return results.get(universe) if results else None
+
+
 @app.route("/api/sentiment")
 def get_sentiment():
     """
     Endpoint principal - devuelve el sentiment score
     
     Usa cache para no sobrecargar las APIs
+    
+    Parámetros opcionales:
+    - universe: nasdaq (por defecto), sp500, russell... (ver /api/universes)
+    - fields: campos a devolver, separados por coma
+      (universe, final_score, interpretation, timestamp, scores, components, weights_used, stats)
+    - compact=1: solo final_score, interpretation, timestamp y scores
     """
+    universe = requested_universe()
+    if universe is None:
+        return unknown_universe()
+    
+    fields, invalid = parse_fields(request.args.get("fields"), request.args.get("compact") == "1")
+    if invalid:
+        return jsonify({
+            "success": False,
+            "error": f"Unknown fields: {', '.join(invalid)}",
+            "valid_fields": list(PROJECTABLE_FIELDS)
+        }), 400
+    
     # Verificar si necesitamos actualizar el cache
-    needs_update = False
+    needs_update = not is_cache_fresh()
     
-    if sentiment_cache["data"] is None:
-        needs_update = True
-    elif sentiment_cache["last_updated"]:
-        time_since_update = (datetime.now() - sentiment_cache["last_updated"]).total_seconds()
-        if time_since_update > CACHE_DURATION_MINUTES * 60:
-            needs_update = True
-    
-    # Si necesitamos actualizar y no está ya actualizando
-    if needs_update and not sentiment_cache["updating"]:
-        # Actualizar en background
-        thread = threading.Thread(target=update_sentiment_cache)
-        thread.start()
+    # Si necesitamos actualizar
+    if needs_update:
+        # Actualizar en background (o sumarse a la actualización que ya está corriendo)
+        thread = start_background_update()
         
         # Si no hay datos previos, esperar a que termine
-        if sentiment_cache["data"] is None:
+        if sentiment_cache["results"] is None:
             thread.join(timeout=60)  # Esperar máximo 60 segundos
     
-    # Devolver datos del cache
-    if sentiment_cache["data"]:
-        return jsonify({
-            "success": True,
-            "data": sentiment_cache["data"],
-            "cached": True,
-            "last_updated": sentiment_cache["last_updated"].isoformat() if sentiment_cache["last_updated"] else None
-        })
+    # Devolver datos del cache (serializados una sola vez por generación)
+    generation = sentiment_cache["generation"]
+    data = cached_result(universe)
+    
+    if data:
+        with projection_cache_lock:
+            cache = projection_caches.setdefault(universe, ProjectionCache())
+            payload = cache.get(generation, data, fields, build_sentiment_payload)
+        return Response(payload, mimetype="application/json")
     else:
         return jsonify({
             "success": False,
@@ -118,6 +254,16 @@ def get_sentiment():
         }), 503
 
 
+def build_sentiment_payload(view, fields):
+    """Arma y serializa la respuesta de /api/sentiment para una proyección"""
+    return app.json.dumps({
+        "success": True,
+        "data": view.result if fields is None else view.project(fields),
+        "cached": True,
+        "last_updated": sentiment_cache["last_updated"].isoformat() if sentiment_cache["last_updated"] else None
+    }, separators=(",", ":"))
+
+
 @app.route("/api/sentiment/refresh", methods=["POST"])
 def refresh_sentiment():
     """
@@ -140,8 +286,7 @@ def refresh_sentiment():
             }), 429
     
     # Iniciar actualización
-    thread = threading.Thread(target=update_sentiment_cache)
-    thread.start()
+    start_background_update()
     
     return jsonify({
         "success": True,
@@ -153,9 +298,16 @@ def refresh_sentiment():
 def get_components():
     """
     Devuelve solo los componentes individuales (para el dashboard)
+    
+    Acepta ?universe= igual que /api/sentiment
     """
-    if sentiment_cache["data"]:
-        components = sentiment_cache["data"].get("components", {})
+    universe = requested_universe()
+    if universe is None:
+        return unknown_universe()
+    
+    data = cached_result(universe)
+    if data:
+        components = data.get("components", {})
         
         # Formatear para el frontend
         formatted = []
@@ -168,8 +320,9 @@ def get_components():
         
         return jsonify({
             "success": True,
+            "universe": universe,
             "components": formatted,
-            "final_score": sentiment_cache["data"].get("final_score", 0)
+            "final_score": data.get("final_score", 0)
         })
     
     return jsonify({
@@ -178,38 +331,377 @@ def get_components():
     }), 503
 
 
+@app.route("/api/sentiment/whatif", methods=["GET", "POST"])
+def whatif_sentiment():
+    """
+    Recalcula el score final con otros pesos a partir de los componentes
+    del último resultado (sin peticiones a las APIs, ver whatif.py)
+    
+    - GET ?news_sentiment=40&vix=0                   → un escenario
+    - POST {"weights": {"news_sentiment": 40}}       → un escenario
+    - POST {"weights": [{...}, {...}]}               → varios escenarios
+    - POST {"components": ["vix", "technical"],
+            "weights": [[10, 30], [0, 50]]}          → varios, como vectores
+    
+    Los pesos que no se mandan quedan como en el resultado. Acepta ?universe=
+    """
+    universe = requested_universe()
+    if universe is None:
+        return unknown_universe()
+    
+    # La generación antes que el resultado: si se publica uno nuevo entre
+    # las dos lecturas, el modelo queda con la generación vieja y se rearma
+    generation = sentiment_cache["generation"]
+    result = cached_result(universe)
+    if result is None:
+        return jsonify({
+            "success": False,
+            "error": "No data available yet. Please try again in a moment."
+        }), 503
+    
+    components = None
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            return jsonify({"success": False, "error": "Body must be a JSON object"}), 400
+        scenarios = body.get("weights", {})
+        components = body.get("components")
+        if components is not None and (
+            not isinstance(components, list) or not all(isinstance(c, str) for c in components)
+        ):
+            return jsonify({"success": False, "error": "components must be a list of component names"}), 400
+    else:
+        try:
+            scenarios = {
+                name: float(value) for name, value in request.args.items() if name != "universe"
+            }
+        except ValueError:
+            return jsonify({"success": False, "error": "Weights must be numbers"}), 400
+    
+    # Un dict o un vector suelto es un solo escenario
+    single = isinstance(scenarios, dict) or (
+        isinstance(scenarios, list) and bool(scenarios)
+        and not any(isinstance(s, (list, dict)) for s in scenarios)
+    )
+    if single:
+        scenarios = [scenarios]
+    if not isinstance(scenarios, list) or not scenarios:
+        return jsonify({"success": False, "error": "weights must be an object, a list or a list of lists"}), 400
+    if len(scenarios) > WHATIF_MAX_SCENARIOS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many scenarios (max {WHATIF_MAX_SCENARIOS})"
+        }), 400
+    
+    with whatif_cache_lock:
+        cached = whatif_cache.get(universe)
+        if cached is None or cached[0] != generation:
+            cached = whatif_cache[universe] = (generation, WeightScenarios(result))
+    model = cached[1]
+    
+    try:
+        matrix = model.weight_matrix(scenarios, components)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e), "valid_components": model.names}), 400
+    
+    final_scores, interpretations = model.evaluate(matrix)
+    
+    data = {
+        "success": True,
+        "universe": universe,
+        "timestamp": result.get("timestamp"),
+        "components": model.names,
+        "current": {
+            "final_score": result.get("final_score"),
+            "interpretation": result.get("interpretation"),
+            "weights": dict(zip(model.names, model.weights.tolist()))
+        },
+        "final_scores": final_scores,
+        "interpretations": interpretations
+    }
+    if single:
+        data["final_score"] = final_scores[0]
+        data["interpretation"] = interpretations[0]
+        data["weights"] = dict(zip(model.names, matrix[0].tolist()))
+    
+    return Response(app.json.dumps(data, separators=(",", ":")), mimetype="application/json")
+
+
+@app.route("/api/sentiment/stream")
+def stream_sentiment():
+    """
+    Canal Server-Sent Events: manda un evento compacto cada vez que
+    se publica un score nuevo, y heartbeats mientras tanto
+    
+    En el frontend:
+        const source = new EventSource(API_URL + "/stream");
+        source.addEventListener("score", e => console.log(JSON.parse(e.data)));
+    """
+    try:
+        last_event_id = int(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        last_event_id = 0
+    
+    return Response(
+        broadcaster.stream(last_event_id),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"   # Que nginx no acumule los eventos
+        }
+    )
+
+
+def sentiment_subroutes():
+    """
+    Rutas fijas bajo /api/sentiment/ ({nombre: métodos}, ej: "refresh": POST)
+    
+    Sus nombres no son símbolos: /api/sentiment/<symbol> no los atiende
+    """
+    return {
+        rule.rule.rsplit("/", 1)[1]: rule.methods - {"HEAD", "OPTIONS"}
+        for rule in app.url_map.iter_rules()
+        if rule.rule.startswith("/api/sentiment/") and "<" not in rule.rule
+    }
+
+
+@app.route("/api/sentiment/<symbol>")
+def get_symbol_sentiment(symbol):
+    """
+    Score compuesto de una acción (noticias, Reddit, técnicos y analistas)
+    
+    Se calcula a partir del resultado en cache, nunca hace peticiones
+    a las APIs. Se guarda hasta que llegue una generación nueva.
+    
+    Con ?universe= usa ese universo; si no, el primero que tenga la acción
+    
+    Un GET a una ruta fija que no acepta GET (ej: /api/sentiment/refresh)
+    responde 405, no "No data for REFRESH"
+    """
+    methods = sentiment_subroutes().get(symbol.lower())
+    if methods is not None:
+        response = jsonify({"success": False, "error": "Method not allowed"})
+        response.headers["Allow"] = ", ".join(sorted(methods))
+        return response, 405
+    
+    # La generación antes que los resultados (ver whatif_sentiment)
+    generation = sentiment_cache["generation"]
+    results = sentiment_cache["results"]
+    
+    if not results:
+        return jsonify({
+            "success": False,
+            "error": "No data available"
+        }), 503
+    
+    symbol = symbol.upper()
+    
+    if "universe" in request.args:
+        universe = requested_universe()
+        if universe is None:
+            return unknown_universe()
+        candidates = [universe]
+    else:
+        candidates = [name for name, u in get_universes().items() if symbol in u["symbols"]]
+    
+    symbol_result = None
+    
+    with symbol_cache_lock:
+        if symbol_cache["generation"] != generation:
+            symbol_cache["generation"] = generation
+            symbol_cache["results"] = {}
+        
+        for universe in candidates:
+            if universe not in results:
+                continue
+            symbol_result = symbol_cache["results"].get((universe, symbol))
+            if symbol_result is None:
+                symbol_result = calculate_symbol_sentiment(results[universe], symbol)
+                # Los símbolos sin datos no se guardan (así el cache no crece con basura)
+                if symbol_result is not None:
+                    symbol_result["universe"] = universe
+                    symbol_cache["results"][(universe, symbol)] = symbol_result
+            if symbol_result is not None:
+                break
+    
+    if symbol_result is None:
+        return jsonify({
+            "success": False,
+            "error": f"No data for {symbol}"
+        }), 404
+    
+    return jsonify({
+        "success": True,
+        "data": symbol_result,
+        "generation": generation
+    })
+
+
 # ==========================================
 # FUNCIÓN PARA ACTUALIZAR EL CACHE
 # ==========================================
+def publish_result(results, last_updated, source, record=True):
+    """
+    Publica los resultados ({universo: resultado}) en el cache: sube la
+    generación y avisa a los clientes conectados por SSE
+    
+    El evento lleva el score del universo por defecto arriba (como antes)
+    y el de cada universo en "universes"
+    
+    Cada resultado lleva en "stats" su z-score y percentil frente al
+    historial; con record=False (ej: el snapshot al arrancar, que ya se
+    contó, o los publish intradía) no se suma al historial
+    """
+    for universe, result in results.items():
+        result["stats"] = score_stats.describe(universe, result)
+        if record:
+            score_stats.record(universe, result)
+    
+    sentiment_cache["results"] = results
+    sentiment_cache["last_updated"] = last_updated
+    sentiment_cache["source"] = source
+    sentiment_cache["generation"] += 1
+    
+    main = results.get(DEFAULT_UNIVERSE) or next(iter(results.values()))
+    broadcaster.publish({
+        "generation": sentiment_cache["generation"],
+        "final_score": main["final_score"],
+        "interpretation": main["interpretation"],
+        "timestamp": main["timestamp"],
+        "universes": {
+            name: {"final_score": r["final_score"], "interpretation": r["interpretation"]}
+            for name, r in results.items()
+        }
+    })
+
+
+def is_cache_fresh():
+    """True si hay datos y tienen menos de CACHE_DURATION_MINUTES"""
+    if sentiment_cache["results"] is None or not sentiment_cache["last_updated"]:
+        return False
+    time_since_update = (datetime.now() - sentiment_cache["last_updated"]).total_seconds()
+    return time_since_update <= CACHE_DURATION_MINUTES * 60
+
+
 def update_sentiment_cache():
     """
     Actualiza el cache con datos frescos
     """
     global sentiment_cache
     
-    if sentiment_cache["updating"]:
+    if not update_lock.acquire(blocking=False):
         return
     
     sentiment_cache["updating"] = True
     
     try:
-        print("\n🔄 Actualizando sentiment cache...")
+        log.info("🔄 Actualizando sentiment cache...")
         calculator = SentimentCalculator()
-        result = calculator.calculate_sentiment()
+        results = calculator.calculate_all()
+        
+        # En horario de mercado VIX, Put/Call y técnicos salen del modo intradía
+        # (son más nuevos que los diarios que acabamos de calcular)
+        if INTRADAY_ENABLED and is_market_open():
+            results = apply_intraday(results, get_intraday_tracker().recent_updates())
         
-        sentiment_cache["data"] = result
-        sentiment_cache["last_updated"] = datetime.now()
-        print("✅ Cache actualizado exitosamente")
+        last_updated = datetime.now()
+        publish_result(results, last_updated, "live")
         
+        # Guardar en disco para el próximo arranque
+        save_snapshot(results, last_updated)
+        score_stats.save()
+        log.info("✅ Cache actualizado", generation=sentiment_cache["generation"])
+    
     except Exception as e:
-        print(f"❌ Error actualizando cache: {e}")
+        log.error("❌ Error actualizando cache", exc_info=True, error=str(e))
     finally:
         sentiment_cache["updating"] = False
+        update_lock.release()
+
+
+def publish_intraday(updates):
+    """
+    Aplica los componentes intradía (VIX, Put/Call, técnicos) al último
+    resultado y lo publica
+    
+    No cambia last_updated: el refresh completo sigue su ritmo. Tampoco
+    se suma al historial de score_stats (record=False): si no, las horas de
+    mercado, con un publish por minuto, pesarían mucho más que el resto
+    del día en el z-score y el percentil
+    """
+    if not update_lock.acquire(blocking=False):
+        return   # Hay un refresh completo en curso: ese publica
+    try:
+        if sentiment_cache["results"] is None:
+            return
+        results = apply_intraday(sentiment_cache["results"], updates)
+        publish_result(results, sentiment_cache["last_updated"], sentiment_cache["source"], record=False)
+    finally:
+        update_lock.release()
+
+
+def start_background_update():
+    """
+    Lanza update_sentiment_cache en un hilo, o devuelve el que ya está
+    corriendo: así muchas peticiones a la vez (ej: al arrancar sin datos)
+    esperan todas el mismo cálculo
+    """
+    global update_thread
+    with update_thread_lock:
+        if update_thread is None or not update_thread.is_alive():
+            update_thread = threading.Thread(target=update_sentiment_cache, daemon=True)
+            update_thread.start()
+        return update_thread
+
+
+def warm_start():
+    """
+    Arranque sin bloquear:
+    1. Carga el último snapshot de disco (aunque esté viejo) y lo sirve
+    2. Si no está fresco, lanza el cálculo en background
+    """
+    results, last_updated = load_snapshot()
+    score_stats.load()
+    
+    if results:
+        publish_result(results, last_updated, "snapshot", record=False)
+        # Los componentes del snapshot sirven de respaldo si algo falla
+        for result in results.values():
+            seed_last_good(result, last_updated)
+        log.info("📂 Snapshot cargado", calculated=last_updated.isoformat())
+    
+    if not is_cache_fresh():
+        start_background_update()
+    
+    if INTRADAY_ENABLED:
+        get_intraday_tracker().start(on_update=publish_intraday)
 
 
 # ==========================================
 # INICIAR SERVIDOR
 # ==========================================
+# Importar este módulo no arranca nada (ni refresh ni modo intradía): así
+# batch.py, las pruebas o una consola pueden usarlo sin pedir datos.
+# El warm start lo hace create_app (gunicorn) o __main__
+_warm_started = False
+_warm_start_lock = threading.Lock()
+
+
+def create_app():
+    """
+    App para gunicorn ("server:create_app()"): hace el warm start una
+    sola vez por proceso (sin --preload, en cada worker después del fork)
+    """
+    global _warm_started
+    with _warm_start_lock:
+        if not _warm_started:
+            _warm_started = True
+            warm_start()
+    return app
+
+
 if __name__ == "__main__":
     print("""
     ╔═══════════════════════════════════════════════════╗
@@ -222,10 +714,11 @@ if __name__ == "__main__":
     ╚═══════════════════════════════════════════════════╝
     """)
     
-    # Pre-cargar datos al iniciar
-    print("📊 Pre-cargando datos iniciales...")
-    update_sentiment_cache()
+    # Con debug=True Flask lanza un proceso hijo que es el que sirve;
+    # solo ese hace el warm start
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        warm_start()
     
     # Iniciar servidor
-    # Para producción usar: gunicorn server:app
+    # Para producción usar: gunicorn "server:create_app()"
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,70 @@
+# ============================================
+# SNAPSHOT DURABLE DEL RESULTADO
+# ============================================
+# Guarda cada resultado calculado en un archivo local para que,
+# al reiniciar el servidor, se pueda servir de inmediato
+# (aunque esté viejo) mientras se calcula uno nuevo
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from config import SNAPSHOT_FILE, DEFAULT_UNIVERSE
+from log import get_logger
+
+log = get_logger("snapshot")
+
+
+def atomic_write_json(path, data):
+    """
+    Escribe un JSON de forma atómica
+    
+    Primero escribe un archivo temporal en la misma carpeta y luego
+    lo renombra: quien lea el archivo ve el contenido viejo o el
+    nuevo, nunca uno a medias
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_snapshot(results, last_updated, path=SNAPSHOT_FILE):
+    """Guarda los resultados ({universo: resultado}) y cuándo se calcularon"""
+    try:
+        atomic_write_json(path, {
+            "results": results,
+            "last_updated": last_updated.isoformat()
+        })
+    except Exception as e:
+        log.error("Error guardando snapshot", error=str(e))
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """
+    Lee el último snapshot guardado
+    
+    Retorna ({universo: resultado}, last_updated) o (None, None) si no hay
+    
+    Los snapshots de antes de los universos (un solo "result") se leen
+    como resultado del universo por defecto
+    """
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        results = data["results"] if "results" in data else {DEFAULT_UNIVERSE: data["result"]}
+        return results, datetime.fromisoformat(data["last_updated"])
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        log.warning("Error leyendo snapshot", error=str(e))
+        return None, None
@@ -7,8 +7,23 @@
 # - Put/Call Ratio
 # - Datos de precio
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from config import (
+    DEFAULT_UNIVERSE, TECHNICAL_BASE_INTERVAL, TECHNICAL_BASE_PERIOD, TECHNICAL_TIMEFRAMES,
+    QUOTE_BATCH_SIZE, CHART_FALLBACK_WORKERS
+)
+from quote_service import get_quote_service
+from request_scheduler import get_scheduler, PRIORITY_CRITICAL, PRIORITY_NORMAL
+from resample import to_arrays, from_closes, resample
+from universe import get_universes, get_shard_scheduler, get_result_store
+from log import get_logger
+
+log = get_logger("technical")
+
+# Días de historia de cada período de get_stock_data
+# ("60d" es un día menos: Yahoo rechaza velas de 15m de hace más de 60 días)
+PERIOD_DAYS = {"1d": 1, "5d": 5, "1mo": 30, "60d": 59, "3mo": 90, "6mo": 180, "1y": 365}
 
 class TechnicalCollector:
     """
@@ -16,11 +31,16 @@ class TechnicalCollector:
     que no requieren análisis de texto
     """
     
-    def __init__(self):
+    def __init__(self, quote_service=None):
         # Usamos Yahoo Finance (no requiere API key)
         self.base_url = "https://query1.finance.yahoo.com/v8/finance/chart"
+        # Cierres de muchos símbolos en una petición (ver get_stock_data_many)
+        self.spark_url = "https://query1.finance.yahoo.com/v7/finance/spark"
+        # Precios en vivo compartidos con los demás recolectores
+        self.quote_service = quote_service or get_quote_service()
+        self.scheduler = get_scheduler()
     
-    def get_stock_data(self, symbol, period="1mo", interval="1d"):
+    def get_stock_data(self, symbol, period="1mo", interval="1d", priority=PRIORITY_NORMAL, start=None, end=None):
         """
         Obtiene datos históricos de una acción
         
@@ -28,11 +48,20 @@ class TechnicalCollector:
         - symbol: Símbolo (ej: "AAPL", "^VIX", "QQQ")
         - period: Período (1d, 5d, 1mo, 3mo, 6mo, 1y)
         - interval: Intervalo (1m, 5m, 15m, 1h, 1d)
+        - priority: Prioridad en la cola de Yahoo (VIX y QQQ son críticos)
+        - start: timestamp desde el que se piden velas (en vez de period);
+          sirve para pedir solo las velas nuevas
+        - end: timestamp hasta el que se piden velas (por defecto ahora);
+          con start sirve para pedir un rango del pasado
         """
+        now = datetime.fromtimestamp(end) if end is not None else datetime.now()
+        if start is None:
+            start = (now - timedelta(days=PERIOD_DAYS.get(period, 30))).timestamp()
+        
         url = f"{self.base_url}/{symbol}"
         params = {
-            "period1": int((datetime.now() - timedelta(days=30)).timestamp()),
-            "period2": int(datetime.now().timestamp()),
+            "period1": int(start),
+            "period2": int(now.timestamp()),
             "interval": interval
         }
         
@@ -41,7 +70,12 @@ class TechnicalCollector:
         }
         
         try:
-            response = requests.get(url, params=params, headers=headers)
+            # Sin cache HTTP: period2 (ahora) cambia en cada petición y la
+            # respuesta guardada nunca se volvería a usar
+            response = self.scheduler.get(
+                "yahoo", url, priority=priority, endpoint="query1.finance.yahoo.com/v8/finance/chart",
+                cache=False, params=params, headers=headers
+            )
             response.raise_for_status()
             data = response.json()
             
@@ -50,6 +84,8 @@ class TechnicalCollector:
             quotes = result.get("indicators", {}).get("quote", [{}])[0]
             
             return {
+                # Diferencia con UTC de la bolsa (para agrupar velas por día, ver resample.py)
+                "gmtoffset": result.get("meta", {}).get("gmtoffset", 0),
                 "timestamps": timestamps,
                 "open": quotes.get("open", []),
                 "high": quotes.get("high", []),
@@ -58,12 +94,86 @@ class TechnicalCollector:
                 "volume": quotes.get("volume", [])
             }
         except Exception as e:
-            print(f"Error obteniendo datos de {symbol}: {e}")
+            log.warning("Error obteniendo datos", symbol=symbol, error=str(e))
             return None
     
+    def get_stock_data_many(self, symbols, period="1mo", interval="1d", priority=PRIORITY_NORMAL):
+        """
+        Velas de muchos símbolos con pocas peticiones: hasta QUOTE_BATCH_SIZE
+        por petición al endpoint "spark" de Yahoo (solo trae cierres)
+        
+        Los símbolos que spark no devuelve se piden uno por uno con
+        get_stock_data, como máximo CHART_FALLBACK_WORKERS a la vez
+        
+        Retorna {símbolo: velas en arrays (ver resample.to_arrays)};
+        los símbolos sin datos no aparecen
+        """
+        symbols = list(dict.fromkeys(symbols))
+        bars = {}
+        for i in range(0, len(symbols), QUOTE_BATCH_SIZE):
+            bars.update(self._fetch_spark(symbols[i:i + QUOTE_BATCH_SIZE], period, interval, priority))
+        
+        missing = [s for s in symbols if s not in bars]
+        if missing:
+            def fetch(symbol):
+                return symbol, to_arrays(self.get_stock_data(symbol, period, interval, priority))
+            
+            with ThreadPoolExecutor(max_workers=CHART_FALLBACK_WORKERS) as executor:
+                for symbol, data in executor.map(fetch, missing):
+                    if data is not None:
+                        bars[symbol] = data
+        
+        return bars
+    
+    def _fetch_spark(self, symbols, period, interval, priority):
+        """Cierres de un grupo de símbolos en una sola petición ({símbolo: arrays})"""
+        params = {
+            "symbols": ",".join(symbols),
+            "range": period,
+            "interval": interval
+        }
+        headers = {"User-Agent": "Mozilla/5.0"}
+        
+        try:
+            response = self.scheduler.get("yahoo", self.spark_url, priority=priority, params=params, headers=headers)
+            response.raise_for_status()
+            results = response.json().get("spark", {}).get("result", []) or []
+        except Exception as e:
+            log.warning("Error obteniendo velas en lote", symbols=len(symbols), error=str(e))
+            return {}
+        
+        requested = set(symbols)
+        bars = {}
+        for item in results:
+            symbol = item.get("symbol")
+            chart = (item.get("response") or [{}])[0]
+            timestamps = chart.get("timestamp") or []
+            closes = ((chart.get("indicators") or {}).get("quote") or [{}])[0].get("close") or []
+            if symbol not in requested or not timestamps or len(timestamps) != len(closes):
+                continue
+            data = from_closes(timestamps, closes, chart.get("meta", {}).get("gmtoffset"))
+            if data is not None:
+                bars[symbol] = data
+        return bars
+    
     # ==========================================
     # VIX - ÍNDICE DE MIEDO
     # ==========================================
+    def get_last_price(self, symbol):
+        """
+        Último precio de un símbolo (ej: "^VIX"): primero lo busca en las
+        cotizaciones y si no está, usa el último cierre diario
+        
+        Retorna None si no hay datos
+        """
+        price = self.quote_service.get_price(symbol)
+        if price is not None:
+            return price
+        
+        data = self.get_stock_data(symbol, priority=PRIORITY_CRITICAL)
+        closes = [p for p in data["close"] if p is not None] if data else []
+        return closes[-1] if closes else None
+    
     def get_vix_sentiment(self):
         """
         Obtiene el VIX y lo convierte a un score de sentimiento
@@ -78,16 +188,14 @@ class TechnicalCollector:
         - VIX 25-30: Alto → -50 a -25
         - VIX > 30: Muy alto (pánico) → -100 a -50
         """
-        print("😱 Obteniendo VIX...")
-        
-        data = self.get_stock_data("^VIX")
-        
-        if not data or not data["close"]:
+        log.info("😱 Obteniendo VIX...")
+        return self.score_vix(self.get_last_price("^VIX"))
+    
+    def score_vix(self, vix_value):
+        """Convierte un valor del VIX a score (sin peticiones)"""
+        if vix_value is None:
             return {"score": 0, "vix_value": None, "error": "No data"}
         
-        # Obtener el último valor del VIX
-        vix_value = data["close"][-1]
-        
         # Convertir VIX a sentimiento (-100 a +100)
         # Fórmula: invertimos la escala porque VIX alto = malo
         if vix_value < 12:
@@ -111,7 +219,7 @@ class TechnicalCollector:
         else:
             score = -95  # Pánico extremo
         
-        print(f"  VIX actual: {vix_value:.2f} → Score: {score}")
+        log.debug("VIX", value=round(vix_value, 2), score=score)
         
         return {
             "score": score,
@@ -200,25 +308,31 @@ class TechnicalCollector:
         
         return ema
     
-    def get_technical_sentiment(self):
+    def score_prices(self, prices):
         """
-        Obtiene indicadores técnicos del NASDAQ (QQQ) y los convierte a sentimiento
+        Calcula RSI, MACD y tendencia de una serie de precios de cierre
+        y los convierte a un score de -100 a +100
         """
-        print("📊 Calculando indicadores técnicos...")
-        
-        data = self.get_stock_data("QQQ")
-        
-        if not data or not data["close"]:
-            return {"score": 0, "error": "No data"}
-        
-        prices = [p for p in data["close"] if p is not None]
-        
         # Calcular RSI
         rsi = self.calculate_rsi(prices)
         
         # Calcular MACD
         macd, _ = self.calculate_macd(prices)
         
+        # Medias de los últimos 5 y 20 precios (tendencia)
+        if len(prices) >= 20:
+            sma5 = sum(prices[-5:]) / 5
+            sma20 = sum(prices[-20:]) / 20
+        else:
+            sma5 = sma20 = None
+        
+        return self.score_indicators(rsi, macd, sma5, sma20)
+    
+    def score_indicators(self, rsi, macd, sma5, sma20):
+        """
+        Convierte RSI, MACD y medias (SMA 5 y 20) ya calculados a un score
+        de -100 a +100 (None = no hay suficientes precios)
+        """
         # Convertir RSI a sentimiento
         if rsi is not None:
             if rsi > 70:
@@ -248,9 +362,7 @@ class TechnicalCollector:
             macd_score = 0
         
         # Calcular tendencia de precio (últimos 5 días vs 20 días)
-        if len(prices) >= 20:
-            sma5 = sum(prices[-5:]) / 5
-            sma20 = sum(prices[-20:]) / 20
+        if sma5 is not None and sma20 is not None:
             trend_score = 20 if sma5 > sma20 else -20
         else:
             trend_score = 0
@@ -259,10 +371,6 @@ class TechnicalCollector:
         final_score = (rsi_score + macd_score + trend_score) / 3 * 1.5
         final_score = max(-100, min(100, final_score))
         
-        print(f"  RSI: {rsi:.1f if rsi else 'N/A'} → Score: {rsi_score}")
-        print(f"  MACD: {macd:.2f if macd else 'N/A'} → Score: {macd_score}")
-        print(f"  Tendencia → Score: {trend_score}")
-        
         return {
             "score": round(final_score, 2),
             "rsi": round(rsi, 2) if rsi else None,
@@ -274,6 +382,149 @@ class TechnicalCollector:
             }
         }
     
+    def get_base_bars(self, symbol, priority=PRIORITY_NORMAL):
+        """Velas de TECHNICAL_BASE_INTERVAL de las que salen todas las temporalidades"""
+        return self.get_stock_data(
+            symbol, period=TECHNICAL_BASE_PERIOD, interval=TECHNICAL_BASE_INTERVAL, priority=priority
+        )
+    
+    def score_timeframes(self, data, live_price=None):
+        """
+        Score técnico que combina las temporalidades de TECHNICAL_TIMEFRAMES
+        (ej: 1d, 1h y 15m), todas armadas desde las mismas velas
+        
+        - data: velas de TECHNICAL_BASE_INTERVAL (ver get_base_bars)
+        - live_price: reemplaza el último cierre de cada temporalidad
+        
+        Retorna el resultado de score_prices de la primera temporalidad
+        (RSI, MACD...) con el score combinado y el detalle de cada una en
+        "timeframes", o None si no hay datos
+        
+        Las temporalidades sin precios suficientes para el RSI no cuentan
+        """
+        bars = to_arrays(data)
+        if bars is None:
+            return None
+        
+        timeframes = {}
+        for timeframe in TECHNICAL_TIMEFRAMES:
+            frame = resample(bars, timeframe, TECHNICAL_BASE_INTERVAL)
+            if frame is None:
+                continue
+            prices = frame["close"].tolist()
+            if live_price:
+                prices[-1] = live_price
+            timeframes[timeframe] = self.score_prices(prices)
+        
+        if not timeframes:
+            return None
+        
+        used = [tf for tf, r in timeframes.items() if r["rsi"] is not None] or list(timeframes)
+        total_weight = sum(TECHNICAL_TIMEFRAMES[tf] for tf in used)
+        score = sum(timeframes[tf]["score"] * TECHNICAL_TIMEFRAMES[tf] for tf in used) / total_weight
+        
+        result = dict(next(iter(timeframes.values())))
+        result["score"] = round(score, 2)
+        result["timeframes"] = {
+            tf: {
+                "score": r["score"],
+                "rsi": r["rsi"],
+                "macd": r["macd"],
+                "weight": TECHNICAL_TIMEFRAMES[tf] if tf in used else 0
+            }
+            for tf, r in timeframes.items()
+        }
+        return result
+    
+    def refresh_symbol_technicals(self):
+        """
+        Calcula los técnicos de las acciones del shard que toca
+        y los guarda en el store "technical"
+        
+        Retorna cuántas acciones se actualizaron
+        """
+        store = get_result_store("technical")
+        shard = get_shard_scheduler("technical").next_shard()
+        quotes = self.quote_service.get_quotes(shard)
+        bars = self.get_stock_data_many(shard, period=TECHNICAL_BASE_PERIOD, interval=TECHNICAL_BASE_INTERVAL)
+        updated = 0
+        
+        for symbol in shard:
+            live_price = quotes[symbol]["price"] if symbol in quotes else None
+            result = self.score_timeframes(bars.get(symbol), live_price)
+            if result is None:
+                continue
+            
+            store.update(symbol, {
+                "score": result["score"],
+                "rsi": result["rsi"],
+                "macd": result["macd"]
+            })
+            updated += 1
+        
+        return updated
+    
+    def get_technical_sentiment(self, universe=DEFAULT_UNIVERSE):
+        """
+        Obtiene indicadores técnicos del NASDAQ (QQQ) y los convierte a sentimiento
+        (o del ETF del universo que se pida, ver UNIVERSES en config.py)
+        
+        También refresca los técnicos de un shard de acciones; esos
+        no cambian el score del índice, solo se guardan en "symbols"
+        """
+        log.info("📊 Calculando indicadores técnicos...")
+        
+        index = get_universes()[universe]["index"]
+        index_result = self.score_index(index)
+        self.refresh_symbol_technicals()
+        return self.summarize(universe, index_result)
+    
+    def score_index(self, symbol):
+        """Técnicos de un ETF (ej: QQQ) con su precio en vivo, o None si no hay datos"""
+        data = self.get_base_bars(symbol, priority=PRIORITY_CRITICAL)
+        return self.score_index_bars(symbol, data, self.quote_service.get_price(symbol))
+    
+    def score_index_bars(self, symbol, data, live_price=None):
+        """
+        Igual que score_index, con las velas (get_base_bars) y el precio
+        en vivo ya descargados (sin peticiones)
+        """
+        # La última vela puede estar atrasada: usamos el precio en vivo
+        result = self.score_timeframes(data, live_price)
+        if result is None:
+            return None
+        
+        if log.enabled("debug"):
+            log.debug(
+                "Técnicos del índice", symbol=symbol, score=result["score"],
+                rsi=result["rsi"], macd=result["macd"], **result["details"],
+                timeframes={tf: r["score"] for tf, r in result["timeframes"].items()}
+            )
+        
+        return result
+    
+    def summarize(self, universe=DEFAULT_UNIVERSE, index_result=None):
+        """
+        Score técnico de un universo (sin peticiones)
+        
+        - index_result: lo que devolvió score_index para el ETF del universo
+        
+        Los técnicos por acción se guardan en "symbols"
+        (para el score por acción de /api/sentiment/<symbol>)
+        """
+        if index_result is None:
+            return {"score": 0, "error": "No data"}
+        
+        definition = get_universes()[universe]
+        symbols = get_result_store("technical").aggregate(definition["symbols"])
+        
+        result = dict(index_result)
+        result["index"] = definition["index"]
+        result["symbols"] = symbols["details"]
+        result["coverage"] = symbols["coverage"]
+        
+        return result
+    
     # ==========================================
     # PUT/CALL RATIO
     # ==========================================
@@ -287,13 +538,14 @@ class TechnicalCollector:
         NOTA: Obtener datos reales de Put/Call ratio requiere APIs de pago
         Por ahora, usamos una estimación basada en el VIX
         """
-        print("📈 Estimando Put/Call Ratio...")
+        log.info("📈 Estimando Put/Call Ratio...")
         
         # Como no tenemos acceso gratuito al Put/Call real,
         # lo estimamos basándonos en el VIX (están correlacionados)
-        vix_data = self.get_vix_sentiment()
-        vix_value = vix_data.get("vix_value", 20)
-        
+        return self.score_put_call(self.get_last_price("^VIX"))
+    
+    def score_put_call(self, vix_value):
+        """Estima el Put/Call Ratio a partir del VIX y lo convierte a score (sin peticiones)"""
         if vix_value is None:
             return {"score": 0, "ratio": None, "estimated": True}
         
@@ -320,7 +572,7 @@ class TechnicalCollector:
         else:
             score = -50
         
-        print(f"  Put/Call Ratio estimado: {estimated_ratio:.2f} → Score: {score}")
+        log.debug("Put/Call Ratio estimado", ratio=round(estimated_ratio, 2), score=score)
         
         return {
             "score": score,
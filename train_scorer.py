@@ -0,0 +1,186 @@
+# ============================================
+# ENTRENAMIENTO DEL MODELO LOCAL DE SENTIMIENTO
+# ============================================
+# Entrena offline el modelo que usa LocalModelScorer (scorers.py):
+# regresión logística sobre unigramas y bigramas hasheados.
+#
+# Uso:
+#   python train_scorer.py datos.csv
+#   python train_scorer.py datos.csv --out models/sentiment --bits 18 --epochs 200
+#
+# datos.csv necesita dos columnas:
+# - text: el titular, resumen o post
+# - label: positive / negative / neutral, o un número de -1 a +1
+#
+# Al terminar compara la exactitud del modelo con la de las palabras
+# clave en una parte de los datos que no se usó para entrenar
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import shutil
+import tempfile
+from datetime import datetime
+
+import numpy as np
+from config import SENTIMENT_MODEL_DIR
+from news_collector import POSITIVE_WORDS, NEGATIVE_WORDS
+from scorers import (
+    HashedNgrams, KeywordScorer, LocalModelScorer, WEIGHTS_FILE, META_FILE, CURRENT_FILE, resolve_path
+)
+from snapshot import atomic_write_json
+
+LABELS = {"positive": 1.0, "neutral": 0.0, "negative": -1.0}
+
+
+def save_model(out_dir, weights, bias, meta):
+    """
+    Guarda una versión nueva del modelo y la deja como vigente
+    
+    Los pesos y el meta.json se escriben juntos en una carpeta nueva
+    (out_dir/<versión>) y recién después se cambia CURRENT_FILE: quien
+    cargue el modelo ve la versión vieja completa o la nueva completa,
+    nunca pesos nuevos con el bias o n_bits viejos
+    
+    Se conservan la versión vigente y la anterior (un proceso puede
+    haber leído CURRENT_FILE justo antes del cambio); las demás se borran
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    version = meta["version"]
+    version_dir = os.path.join(out_dir, version)
+    
+    if not os.path.isdir(version_dir):
+        tmp_dir = tempfile.mkdtemp(dir=out_dir, prefix=".tmp-")
+        try:
+            with open(os.path.join(tmp_dir, WEIGHTS_FILE), "wb") as f:
+                np.save(f, weights)
+            atomic_write_json(os.path.join(tmp_dir, META_FILE), meta)
+            os.rename(tmp_dir, version_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+    
+    current_path = os.path.join(out_dir, CURRENT_FILE)
+    try:
+        with open(current_path) as f:
+            previous = json.load(f)["version"]
+    except (FileNotFoundError, ValueError, KeyError):
+        previous = None
+    atomic_write_json(current_path, {"version": version})
+    
+    keep = {version, previous}
+    for name in os.listdir(out_dir):
+        path = os.path.join(out_dir, name)
+        if name not in keep and os.path.isfile(os.path.join(path, META_FILE)):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_examples(path):
+    """Lee (texto, label de -1 a +1) del CSV"""
+    texts = []
+    labels = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            text = (row.get("text") or "").strip()
+            label = (row.get("label") or "").strip().lower()
+            if not text or not label:
+                continue
+            value = LABELS[label] if label in LABELS else max(-1.0, min(1.0, float(label)))
+            texts.append(text)
+            labels.append(value)
+    return texts, np.array(labels)
+
+
+def train(features, texts, labels, epochs=200, learning_rate=0.5, l2=1e-6):
+    """
+    Regresión logística con AdaGrad sobre la matriz dispersa de features
+    
+    El label de -1 a +1 se usa como probabilidad de ser positivo:
+    neutral (0) = 0.5
+    """
+    n_texts = len(texts)
+    n_columns = 1 << features.n_bits
+    docs, columns, signs = features.transform(texts)
+    target = (labels + 1) / 2
+    
+    weights = np.zeros(n_columns)
+    squared_gradients = np.full(n_columns, 1e-8)
+    bias = 0.0
+    
+    for epoch in range(epochs):
+        margins = np.bincount(docs, weights=weights[columns] * signs, minlength=n_texts) + bias
+        probabilities = 1 / (1 + np.exp(-margins))
+        errors = probabilities - target
+        
+        gradient = np.bincount(columns, weights=errors[docs] * signs, minlength=n_columns) / n_texts
+        gradient += l2 * weights
+        squared_gradients += gradient ** 2
+        weights -= learning_rate * gradient / np.sqrt(squared_gradients)
+        bias -= learning_rate * errors.mean()
+        
+        if epoch % 50 == 0 or epoch == epochs - 1:
+            loss = -np.mean(target * np.log(probabilities + 1e-12)
+                            + (1 - target) * np.log(1 - probabilities + 1e-12))
+            print(f"  época {epoch}: log loss {loss:.4f}")
+    
+    return weights, bias
+
+
+def accuracy(scores, labels, threshold=0.33):
+    """Exactitud en 3 clases: negativo (< -threshold), neutral, positivo (> threshold)"""
+    predicted = np.where(scores > threshold, 1, np.where(scores < -threshold, -1, 0))
+    expected = np.where(labels > threshold, 1, np.where(labels < -threshold, -1, 0))
+    return float(np.mean(predicted == expected)) if len(labels) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el modelo local de sentimiento")
+    parser.add_argument("data", help="CSV con columnas text,label")
+    parser.add_argument("--out", default=SENTIMENT_MODEL_DIR, help="Carpeta del modelo")
+    parser.add_argument("--bits", type=int, default=18, help="Columnas = 2**bits")
+    parser.add_argument("--epochs", type=int, default=200)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Parte de los datos para evaluar")
+    args = parser.parse_args()
+    
+    texts, labels = load_examples(args.data)
+    if not texts:
+        raise SystemExit(f"No hay ejemplos en {args.data}")
+    
+    order = list(range(len(texts)))
+    random.Random(42).shuffle(order)
+    n_test = int(len(order) * args.holdout)
+    test, train_rows = order[:n_test], order[n_test:]
+    
+    print(f"🧠 Entrenando con {len(train_rows)} ejemplos ({n_test} para evaluar)...")
+    features = HashedNgrams(args.bits)
+    weights, bias = train(
+        features, [texts[i] for i in train_rows], labels[train_rows], epochs=args.epochs
+    )
+    
+    out_dir = resolve_path(args.out)
+    weights = weights.astype(np.float32)
+    
+    save_model(out_dir, weights, bias, {
+        "n_bits": args.bits,
+        "bias": bias,
+        "version": hashlib.sha1(weights.tobytes() + str(bias).encode()).hexdigest()[:16],
+        "trained_at": datetime.now().isoformat(),
+        "examples": len(train_rows)
+    })
+    print(f"✅ Modelo guardado en {out_dir}")
+    
+    if test:
+        test_texts = [texts[i] for i in test]
+        model_scores = LocalModelScorer(out_dir, cache_file=None).predict(test_texts)
+        keyword_scores = KeywordScorer({**POSITIVE_WORDS, **NEGATIVE_WORDS}).score_batch(test_texts)
+        
+        print(f"📊 Exactitud (3 clases) con {n_test} ejemplos de prueba:")
+        print(f"  Palabras clave: {accuracy(keyword_scores, labels[test]):.1%}")
+        print(f"  Modelo local:   {accuracy(model_scores, labels[test]):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+# ============================================
+# UNIVERSO DE ACCIONES Y RECOLECCIÓN POR SHARDS
+# ============================================
+# Este módulo:
+# - Carga la lista de acciones de cada universo (NASDAQ, S&P 500, ...)
+# - Divide la UNIÓN de todos los universos en shards que se refrescan
+#   en round-robin (una acción que está en dos universos se pide una vez)
+# - Guarda el último resultado de cada acción con su antigüedad
+#
+# Así cada refresh procesa solo un shard y el costo no crece
+# con el tamaño ni con el número de universos
+
+import os
+import threading
+import time
+from config import (
+    NASDAQ_STOCKS, UNIVERSE_FILE, UNIVERSES, DEFAULT_UNIVERSE,
+    SHARD_SIZES, SYMBOL_RESULT_MAX_AGE_HOURS, CACHE_DURATION_MINUTES
+)
+from log import get_logger
+
+log = get_logger("universe")
+
+# Carpeta del proyecto (para resolver rutas relativas de config.py)
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_universe(path=UNIVERSE_FILE, fallback=NASDAQ_STOCKS):
+    """
+    Lee un archivo de símbolos
+    
+    Formato: un símbolo por línea (también acepta comas o espacios).
+    Las líneas que empiezan con # se ignoran y los duplicados se quitan.
+    Los símbolos se normalizan con normalize_symbol
+    
+    Si el archivo no existe (o está vacío), devuelve fallback
+    """
+    if not os.path.isabs(path):
+        path = os.path.join(BASE_DIR, path)
+    
+    try:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        log.warning("No se encontró el archivo del universo, usando los símbolos por defecto", path=path, symbols=len(fallback))
+        return list(fallback)
+    
+    symbols = []
+    for line in lines:
+        line = line.split("#", 1)[0]
+        for symbol in line.replace(",", " ").split():
+            symbols.append(normalize_symbol(symbol))
+    
+    return list(dict.fromkeys(symbols)) or list(fallback)
+
+
+def normalize_symbol(symbol):
+    """
+    Símbolo en el formato del universo: en mayúsculas y con las clases de
+    acciones con guion, como las pide Yahoo (BRK.B → BRK-B; ver finnhub_symbol)
+    """
+    return symbol.strip().upper().replace(".", "-")
+
+
+def finnhub_symbol(symbol):
+    """Símbolo como lo pide Finnhub: las clases de acciones van con punto (BRK-B → BRK.B)"""
+    return symbol.replace("-", ".")
+
+
+_universes = None
+_universes_lock = threading.Lock()
+
+
+def get_universes():
+    """
+    Devuelve todos los universos de UNIVERSES (se cargan una sola vez)
+    
+    {nombre: {"index": "QQQ", "query": "NASDAQ", "symbols": [...]}}
+    
+    El universo por defecto usa NASDAQ_STOCKS si no encuentra su archivo
+    """
+    global _universes
+    with _universes_lock:
+        if _universes is None:
+            _universes = {}
+            for name, definition in UNIVERSES.items():
+                fallback = NASDAQ_STOCKS if name == DEFAULT_UNIVERSE else []
+                _universes[name] = {
+                    "index": definition["index"],
+                    "query": definition.get("query", name),
+                    "symbols": load_universe(definition["file"], fallback)
+                }
+        return _universes
+
+
+def get_universe(name=DEFAULT_UNIVERSE):
+    """Devuelve las acciones de un universo"""
+    return get_universes()[name]["symbols"]
+
+
+def get_fetch_symbols():
+    """
+    Unión de las acciones de todos los universos, sin repetir
+    
+    Es lo que recorren los shards: cada acción se pide una sola vez
+    aunque esté en varios universos
+    """
+    symbols = []
+    for universe in get_universes().values():
+        symbols += universe["symbols"]
+    return list(dict.fromkeys(symbols))
+
+
+# ============================================
+# SHARDS EN ROUND-ROBIN
+# ============================================
+class ShardScheduler:
+    """
+    Reparte un universo en shards de tamaño fijo y los entrega en orden
+    
+    Ejemplo con 100 acciones y shard_size=10:
+    refresh 1 → acciones 0-9, refresh 2 → 10-19, ... refresh 11 → 0-9
+    """
+    
+    def __init__(self, symbols, shard_size):
+        self.symbols = list(symbols)
+        self.shard_size = max(1, shard_size)
+        self.position = 0
+        self.lock = threading.Lock()
+    
+    @property
+    def shard_count(self):
+        return max(1, -(-len(self.symbols) // self.shard_size))
+    
+    def current(self):
+        """Devuelve el shard actual sin avanzar"""
+        with self.lock:
+            return self._slice(self.position)
+    
+    def advance(self):
+        """Pasa al siguiente shard (vuelve al principio al terminar)"""
+        with self.lock:
+            self.position = (self.position + self.shard_size) % max(1, len(self.symbols))
+    
+    def next_shard(self):
+        """Devuelve el shard actual y avanza"""
+        with self.lock:
+            shard = self._slice(self.position)
+            self.position = (self.position + self.shard_size) % max(1, len(self.symbols))
+            return shard
+    
+    def _slice(self, start):
+        shard = self.symbols[start:start + self.shard_size]
+        # El último shard se completa con el principio de la lista
+        if len(shard) < self.shard_size and len(self.symbols) > len(shard):
+            shard += self.symbols[:min(self.shard_size - len(shard), start)]
+        return shard
+
+
+# ============================================
+# ÚLTIMO RESULTADO POR ACCIÓN
+# ============================================
+class SymbolResultStore:
+    """
+    Guarda el último resultado de cada acción y cuándo se obtuvo
+    
+    Cada resultado es un diccionario con al menos:
+    - score: Número de -100 a +100
+    - weight: Cuánto pesa en el promedio (ej: número de noticias)
+    """
+    
+    def __init__(self, max_age_hours):
+        self.max_age_seconds = max_age_hours * 3600
+        self.results = {}   # symbol -> (timestamp, result)
+        self.lock = threading.Lock()
+    
+    def update(self, symbol, result, timestamp=None):
+        with self.lock:
+            self.results[symbol] = (timestamp or time.time(), result)
+    
+    def get(self, symbol):
+        """Devuelve (timestamp, result) de una acción, o None"""
+        with self.lock:
+            return self.results.get(symbol)
+    
+    def aggregate(self, symbols):
+        """
+        Promedio ponderado de los resultados frescos de las acciones dadas
+        
+        Retorna:
+        - score: Promedio ponderado de -100 a +100 (None si no hay datos frescos)
+        - details: Resultado de cada acción fresca
+        - coverage: Cuántas acciones están frescas, viejas o sin datos
+        """
+        now = time.time()
+        total = 0
+        total_weight = 0
+        details = {}
+        fresh = stale = missing = 0
+        oldest_age = 0
+        
+        with self.lock:
+            for symbol in symbols:
+                entry = self.results.get(symbol)
+                if entry is None:
+                    missing += 1
+                    continue
+                
+                timestamp, result = entry
+                age = now - timestamp
+                if age > self.max_age_seconds:
+                    stale += 1
+                    continue
+                
+                fresh += 1
+                oldest_age = max(oldest_age, age)
+                weight = result.get("weight", 1)
+                total += result["score"] * weight
+                total_weight += weight
+                details[symbol] = result
+        
+        return {
+            "score": total / total_weight if total_weight else None,
+            "total_weight": total_weight,
+            "details": details,
+            "coverage": {
+                "symbols_total": len(symbols),
+                "symbols_fresh": fresh,
+                "symbols_stale": stale,
+                "symbols_missing": missing,
+                "oldest_age_seconds": round(oldest_age)
+            }
+        }
+
+
+def shard_size(name, symbol_count):
+    """
+    Tamaño del shard del recolector `name` para recorrer `symbol_count` acciones
+    
+    SHARD_SIZES[name], o más si con ese tamaño la vuelta completa no entra
+    en SYMBOL_RESULT_MAX_AGE_HOURS[name] (se deja un refresh de margen):
+    si no, las últimas acciones de la vuelta ya estarían viejas cuando
+    les toque otra vez y dejarían de contar
+    """
+    configured = SHARD_SIZES.get(name, 10)
+    max_age_minutes = SYMBOL_RESULT_MAX_AGE_HOURS.get(name, 24) * 60
+    refreshes = max(1, int(max_age_minutes // CACHE_DURATION_MINUTES) - 1)
+    required = -(-symbol_count // refreshes)
+    
+    if required > configured:
+        log.info("Shard agrandado para recorrer todas las acciones a tiempo",
+                 name=name, symbols=symbol_count, configured=configured, shard_size=required)
+        return required
+    return configured
+
+
+# Un scheduler y un store por recolector, compartidos en el proceso
+_schedulers = {}
+_stores = {}
+_registry_lock = threading.Lock()
+
+
+def get_shard_scheduler(name):
+    """Devuelve el scheduler de shards del recolector `name`"""
+    with _registry_lock:
+        if name not in _schedulers:
+            symbols = get_fetch_symbols()
+            _schedulers[name] = ShardScheduler(symbols, shard_size(name, len(symbols)))
+        return _schedulers[name]
+
+
+def get_result_store(name):
+    """Devuelve el store de resultados por acción del recolector `name`"""
+    with _registry_lock:
+        if name not in _stores:
+            _stores[name] = SymbolResultStore(SYMBOL_RESULT_MAX_AGE_HOURS.get(name, 24))
+        return _stores[name]
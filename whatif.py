@@ -0,0 +1,113 @@
+# ============================================
+# ESCENARIOS DE PESOS (WHAT-IF)
+# ============================================
+# Recalcula el score final con otros pesos a partir de los scores de los
+# componentes ya calculados: sin peticiones, solo álgebra.
+#
+# Con k escenarios y n componentes:
+#   W  = matriz k × n de pesos
+#   s  = score de cada componente
+#   ok = 1 si el componente no tuvo error (los que fallaron no cuentan)
+#
+#   final = (W · (s × ok)) / (W · ok)
+#
+# Igual que SentimentCalculator._calculate_weighted_score, pero cada
+# operación se hace sobre los 10.000 escenarios a la vez.
+
+import numpy as np
+from sentiment_calculator import INTERPRETATION_LEVELS
+
+# Umbrales y textos de la interpretación para np.searchsorted
+THRESHOLDS = np.array([threshold for threshold, _ in INTERPRETATION_LEVELS[1:]], dtype=np.float64)
+LABELS = np.array([text for _, text in INTERPRETATION_LEVELS], dtype=object)
+
+
+def interpret_scores(scores):
+    """Interpretación de muchos scores a la vez (igual que _interpret_score)"""
+    return LABELS[np.searchsorted(THRESHOLDS, scores, side="right")].tolist()
+
+
+class WeightScenarios:
+    """
+    Los scores de los componentes de un resultado, listos para evaluar
+    escenarios de pesos (se arma una vez por generación)
+    
+    Parámetros:
+    - result: un resultado de SentimentCalculator
+    """
+    
+    def __init__(self, result):
+        components = result.get("components", {})
+        self.names = list(components)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.scores = np.array([data.get("score", 0) for data in components.values()], dtype=np.float64)
+        self.ok = np.array(["error" not in data for data in components.values()], dtype=np.float64)
+        # Los pesos con los que se calculó el resultado
+        self.weights = np.array([data.get("weight", 0) for data in components.values()], dtype=np.float64)
+    
+    def weight_matrix(self, scenarios, components=None):
+        """
+        Arma la matriz k × n de pesos
+        
+        - scenarios: lista de escenarios; cada uno es
+          - un dict {componente: peso}: cambia esos pesos, los demás
+            quedan como en el resultado
+          - una lista de pesos en el orden de `components`
+        - components: orden de las listas (por defecto self.names)
+        
+        Lanza ValueError si hay componentes que no existen o pesos inválidos
+        """
+        if components is None:
+            components = self.names
+        unknown = [name for name in components if name not in self.index]
+        if unknown:
+            raise ValueError(f"Unknown components: {', '.join(unknown)}")
+        columns = [self.index[name] for name in components]
+        
+        matrix = np.tile(self.weights, (len(scenarios), 1))
+        rows = [i for i, scenario in enumerate(scenarios) if not isinstance(scenario, dict)]
+        
+        # Listas de pesos: se copian todas juntas
+        if rows:
+            try:
+                vectors = np.array([scenarios[i] for i in rows], dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError("Each weights vector must be a list of numbers")
+            if vectors.ndim != 2 or vectors.shape[1] != len(columns):
+                raise ValueError(f"Each weights vector must have {len(columns)} values ({', '.join(components)})")
+            matrix[np.ix_(rows, columns)] = vectors
+        
+        # Dicts: solo cambian los pesos que traen
+        for i, scenario in enumerate(scenarios):
+            if not isinstance(scenario, dict):
+                continue
+            for name, weight in scenario.items():
+                if name not in self.index:
+                    raise ValueError(f"Unknown components: {name}")
+                if isinstance(weight, bool) or not isinstance(weight, (int, float)):
+                    raise ValueError(f"Invalid weight for {name}: {weight}")
+                matrix[i, self.index[name]] = weight
+        
+        if not np.isfinite(matrix).all() or (matrix < 0).any():
+            raise ValueError("Weights must be finite and non-negative")
+        return matrix
+    
+    def evaluate(self, matrix):
+        """
+        Score final e interpretación de cada fila de la matriz de pesos
+        
+        Retorna (final_scores, interpretations); los scores redondeados
+        a 2 decimales como final_score
+        """
+        # Se suma componente por componente (vectorizado sobre los escenarios)
+        # en el mismo orden que _calculate_weighted_score: así el resultado
+        # es idéntico hasta el último bit, también al redondear
+        sums = np.zeros(len(matrix))
+        totals = np.zeros(len(matrix))
+        for column in np.flatnonzero(self.ok):
+            sums += self.scores[column] * matrix[:, column]
+            totals += matrix[:, column]
+        final_scores = np.divide(sums, totals, out=np.zeros(len(matrix)), where=totals > 0)
+        # round() de Python (no np.round): así coincide exacto con final_score en los empates
+        return [round(score, 2) for score in final_scores.tolist()], interpret_scores(final_scores)
+